@@ -0,0 +1,143 @@
+"""
+List Serialization Benchmark
+============================
+
+Per-item cost of serializing a 1,000-element list endpoint response:
+
+- default: what ``get_assets`` / ``get_tokens`` / ``get_transactions`` do
+  today: parse ISO ``created_at`` strings in the route, then FastAPI
+  validates each element against ``response_model`` and encodes the result
+  with the stdlib ``json`` encoder.
+- fast: ``FAST_JSON_RESPONSES=1``; the Mongo documents are rendered as-is by
+  ``TrustedJSONResponse``.
+
+Run from ``backend/`` (needs the backend requirements installed):
+
+    python -m benchmarks.bench_list_serialization [--items 1000] [--repeat 50]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from server import RWAAsset, Token, Transaction  # noqa: E402
+from services.fast_json import TrustedJSONResponse, orjson  # noqa: E402
+
+
+def _created_at(i: int) -> str:
+    return (datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i)).isoformat()
+
+
+def asset_docs(n: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()),
+        "name": f"Asset {i}",
+        "asset_type": "real_estate",
+        "description": "Office building, 12 floors, long-term lease",
+        "value_usd": 1_250_000.0 + i,
+        "owner_id": str(uuid.uuid4()),
+        "status": "active",
+        "metadata": {"location": "Madrid", "area_m2": 4200, "tags": ["office", "leased"]},
+        "blockchain_network": "polygon",
+        "created_at": _created_at(i)
+    } for i in range(n)]
+
+
+def token_docs(n: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()),
+        "asset_id": str(uuid.uuid4()),
+        "token_symbol": f"QPC{i}",
+        "total_supply": 1_000_000,
+        "available_supply": 1_000_000 - i,
+        "price_per_token": 1.25,
+        "blockchain_network": "polygon",
+        "contract_address": f"0x{uuid.uuid4().hex}",
+        "created_at": _created_at(i)
+    } for i in range(n)]
+
+
+def transaction_docs(n: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()),
+        "transaction_type": "buy",
+        "buyer_id": str(uuid.uuid4()),
+        "seller_id": None,
+        "token_id": str(uuid.uuid4()),
+        "quantity": 10 + i,
+        "total_amount": 12.5 * (10 + i),
+        "status": "completed",
+        "payment_session_id": f"cs_test_{uuid.uuid4().hex}",
+        "blockchain_tx_hash": f"0x{uuid.uuid4().hex}",
+        "created_at": _created_at(i)
+    } for i in range(n)]
+
+
+def _parse_created_at(docs: List[dict]) -> None:
+    # Mirrors the fromisoformat loop in the route handlers
+    for doc in docs:
+        if isinstance(doc["created_at"], str):
+            doc["created_at"] = datetime.fromisoformat(doc["created_at"])
+
+
+async def render_default(field, docs: List[dict]) -> bytes:
+    _parse_created_at(docs)
+    content = await serialize_response(field=field, response_content=docs, is_coroutine=True)
+    # Same settings as fastapi.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+async def render_fast(field, docs: List[dict]) -> bytes:
+    return TrustedJSONResponse(docs).body
+
+
+async def best_time(render, field, docs: List[dict], repeat: int) -> float:
+    """Best-of-``repeat`` wall time in seconds for one full list"""
+    best = float("inf")
+    for _ in range(repeat):
+        batch = copy.deepcopy(docs)
+        start = time.perf_counter()
+        await render(field, batch)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def run(items: int, repeat: int) -> None:
+    encoder = f"orjson {orjson.__version__}" if orjson is not None else "stdlib json (orjson not installed)"
+    print(f"{items} items per list, best of {repeat} runs, fast path encoder: {encoder}\n")
+    print(f"{'endpoint':<24}{'default us/item':>16}{'fast us/item':>14}{'speedup':>10}")
+
+    for name, model, factory in (("GET /api/assets", RWAAsset, asset_docs),
+                                 ("GET /api/tokens", Token, token_docs),
+                                 ("GET /api/transactions", Transaction, transaction_docs)):
+        docs = factory(items)
+        field = create_response_field(name=f"Response_{model.__name__}", type_=List[model])
+        default_s = await best_time(render_default, field, docs, repeat)
+        fast_s = await best_time(render_fast, field, docs, repeat)
+        print(f"{name:<24}{default_s / items * 1e6:>16.2f}{fast_s / items * 1e6:>14.2f}"
+              f"{default_s / fast_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.repeat))
@@ -0,0 +1,165 @@
+"""
+Payments Client Latency Benchmark
+=================================
+
+Latency of Stripe checkout-status lookups against a local fake Stripe API
+served over HTTPS (self-signed certificate), comparing:
+
+- per_request: a fresh Stripe HTTP client for every call, as happened when
+  each route built its own ``StripeCheckout``; every call pays a TCP
+  connect and a TLS handshake.
+- pooled: the app-lifetime ``PaymentsClient`` HTTP client; connections are
+  kept alive and reused.
+
+Both the sync SDK path (requests) and the async one (httpx) are measured.
+Run from ``backend/``:
+
+    python -m benchmarks.bench_payments_client [--calls 200]
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import json
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import stripe  # noqa: E402
+
+from services.payments_client import PaymentsClient  # noqa: E402
+
+API_KEY = "sk_test_benchmark"
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        session_id = self.path.rsplit("/", 1)[-1]
+        body = json.dumps({
+            "id": session_id,
+            "object": "checkout.session",
+            "status": "complete",
+            "payment_status": "paid",
+            "amount_total": 2500,
+            "currency": "usd",
+            "metadata": {"token_id": "tok_1", "quantity": "10"}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _self_signed_cert(directory: Path):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(hours=1))
+        .add_extension(x509.SubjectAlternativeName([
+            x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1"))
+        ]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    return cert_path, key_path
+
+
+def start_fake_stripe(directory: Path) -> str:
+    cert_path, key_path = _self_signed_cert(directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStripeHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # The SDK verifies TLS against stripe.ca_bundle_path
+    stripe.ca_bundle_path = str(cert_path)
+    return f"https://127.0.0.1:{server.server_address[1]}"
+
+
+def _summary(samples: List[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return f"p50 {statistics.median(samples) * 1e3:7.2f} ms   p95 {p95 * 1e3:7.2f} ms"
+
+
+def measure_sync(calls: int, setup: Callable[[], None]) -> List[float]:
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        setup()
+        stripe.checkout.Session.retrieve(f"cs_test_{i}", api_key=API_KEY)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def measure_async(calls: int, setup: Callable[[], None]) -> List[float]:
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        setup()
+        await stripe.checkout.Session.retrieve_async(f"cs_test_{i}", api_key=API_KEY)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(calls: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        api_base = start_fake_stripe(Path(tmp))
+        stripe.api_base = api_base
+        stripe.max_network_retries = 0
+
+        def fresh_client():
+            stripe.default_http_client = stripe.RequestsClient(
+                async_fallback_client=stripe.HTTPXClient()
+            )
+
+        pooled = PaymentsClient(api_key=API_KEY, api_base=api_base, max_retries=0)
+        pooled._install_http_client()
+
+        def keep_pooled():
+            stripe.default_http_client = pooled._http_client
+
+        print(f"{calls} checkout status lookups against {api_base} (TLS)\n")
+        print(f"sync  per_request  {_summary(measure_sync(calls, fresh_client))}")
+        print(f"sync  pooled       {_summary(measure_sync(calls, keep_pooled))}")
+        print(f"async per_request  {_summary(asyncio.run(measure_async(calls, fresh_client)))}")
+        print(f"async pooled       {_summary(asyncio.run(measure_async(calls, keep_pooled)))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Stripe client reuse")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    run(args.calls)
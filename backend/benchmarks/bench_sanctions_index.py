@@ -0,0 +1,121 @@
+"""
+Sanctions Screening Benchmark
+=============================
+
+Build time and per-name screening latency of ``SanctionsIndex`` over a
+synthetic list (seeded, so runs are comparable). Half of the entries get one
+alias and about a third of the names have a second surname. Three query sets:
+
+- exact: names taken from the list
+- typo: listed names with one character replaced
+- unlisted: random names built from the same vocabulary
+
+Recall is the share of exact/typo queries with at least one match; hit rate
+on unlisted names approximates the false-positive rate. A final check screens
+a name shared by many entries, all of which must be reported.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_sanctions_index [--entries 100000] [--queries 300]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.sanctions_index import MATCH_THRESHOLD, SanctionsIndex  # noqa: E402
+
+LETTERS = "eaoinrstlhdcumkgybvpfzwjx"
+LETTER_WEIGHTS = [12, 11, 8, 8, 8, 7, 7, 6, 5, 4, 4, 4, 4, 4, 3, 3, 3, 2, 2, 2, 2, 1, 1, 1, 1]
+VOWELS = set("aeiouy")
+DUPLICATE_NAME = "Ali Hassan"
+DUPLICATES = 15
+
+
+def _word(rng: random.Random) -> str:
+    """Pronounceable-ish word: mostly alternating consonants and vowels"""
+    letters = []
+    for i in range(rng.randint(4, 9)):
+        pool = [c for c in LETTERS if (c in VOWELS) != (i % 2 == 0) or rng.random() < 0.25]
+        letters.append(rng.choices(pool, [LETTER_WEIGHTS[LETTERS.index(c)] for c in pool])[0])
+    return "".join(letters).capitalize()
+
+
+def synthetic_entries(n: int, rng: random.Random) -> Tuple[List[Dict], Callable[[], str]]:
+    firsts = [_word(rng) for _ in range(max(100, n // 33))]
+    lasts = [_word(rng) for _ in range(max(1000, n // 3))]
+
+    def person() -> str:
+        name = f"{rng.choice(firsts)} {rng.choice(lasts)}"
+        return name + (f" {rng.choice(lasts)}" if rng.random() < 0.3 else "")
+
+    entries = [
+        {"name": person(), "aliases": [person()] if rng.random() < 0.5 else [], "list": "SYNTHETIC", "country": "XX"}
+        for _ in range(n)
+    ]
+    return entries, person
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    i = rng.randrange(len(name))
+    return name[:i] + rng.choice(LETTERS) + name[i + 1:]
+
+
+def _summary(samples: List[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    return (f"p50 {statistics.median(samples) * 1e3:6.2f} ms   p95 {p95 * 1e3:6.2f} ms   "
+            f"p99 {p99 * 1e3:6.2f} ms")
+
+
+def measure(index: SanctionsIndex, queries: List[str]) -> Tuple[List[float], int]:
+    samples, hits = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        matches = index.screen(query)
+        samples.append(time.perf_counter() - start)
+        hits += bool(matches)
+    return samples, hits
+
+
+def run(entries: int, queries: int, seed: int) -> None:
+    rng = random.Random(seed)
+    data, person = synthetic_entries(entries, rng)
+
+    start = time.perf_counter()
+    index = SanctionsIndex(data)
+    build_s = time.perf_counter() - start
+    print(f"{len(index)} entries, {len(index.variants)} names, {len(index.gram_ids)} trigrams, "
+          f"built in {build_s:.2f} s (threshold {MATCH_THRESHOLD})\n")
+
+    sets: Dict[str, Callable[[], str]] = {
+        "exact": lambda: rng.choice(data)["name"],
+        "typo": lambda: _typo(rng.choice(data)["name"], rng),
+        "unlisted": person,
+    }
+    print(f"{'queries':<10}{'latency':<52}{'hit rate':>9}")
+    for name, make in sets.items():
+        samples, hits = measure(index, [make() for _ in range(queries)])
+        print(f"{name:<10}{_summary(samples):<52}{hits / queries:>9.3f}")
+
+    shared = SanctionsIndex(data[:1000] + [
+        {"name": DUPLICATE_NAME, "aliases": [], "list": "SYNTHETIC", "country": str(i)} for i in range(DUPLICATES)
+    ])
+    found = len(shared.screen(DUPLICATE_NAME))
+    print(f"\n{DUPLICATES} entries named {DUPLICATE_NAME!r}: {found} reported")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sanctions name screening")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=2)
+    args = parser.parse_args()
+    run(args.entries, args.queries, args.seed)
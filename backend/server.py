@@ -1,30 +1,58 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Header, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import os
+import json
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
+import asyncio
 from datetime import datetime, timezone, timedelta
 from emergentintegrations.llm.chat import LlmChat, UserMessage
-from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
+from emergentintegrations.payments.stripe.checkout import CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
 import httpx
 from services_earnings import EarningsService
 from models_earnings import AssetRevenue, DividendDistribution, PortfolioHolding
-from services.jurisdictions import get_jurisdiction, get_all_jurisdictions, get_jurisdiction_summary, get_jurisdiction_risk_score
+from services.jurisdictions import (
+    get_jurisdiction, get_jurisdiction_index, get_jurisdiction_summary, get_jurisdiction_risk_score,
+    reload_jurisdictions, watch_jurisdictions, JURISDICTIONS_HOT_RELOAD
+)
+from services.jurisdiction_compare import compare_jurisdictions
 from services.pqc_real_service import get_pqc_service
 from services.kyc_aml_real_service import get_kyc_aml_service
+from services.sanctions_index import load_sanctions_index, SanctionsIndexUnavailable
+from services.session_cache import get_session_cache
+from services.db_indexes import ensure_indexes
+from services.pagination import fetch_page, clamp_page_size, InvalidCursor
+from services.fast_json import FAST_JSON_RESPONSES, model_projection, trusted_response
+from services.migrate_dates import parse_iso
+from services.supply_reservations import SupplyReservationService
+from services.work_queue import WorkQueue
+from services.report_jobs import validate_callback_url, job_view, deliver_callback
+from services.payments_client import get_payments_client, checkout_hold_seconds, CHECKOUT_HOLD_GRACE_SECONDS
+from services.llm_cache import LLMCache, normalize_analysis_inputs
+from services.singleflight import get_llm_singleflight, prompt_key
+from services.llm_dispatcher import get_llm_dispatcher, LLMOverloaded
+from services.sse_reports import (
+    SSE_HEADERS, stream_report, stream_completion, token_streaming_enabled, log_streaming_mode
+)
+from services.report_renderer import (
+    MODE_TEMPLATE, MODE_HYBRID, MODE_LLM, normalize_mode, render_sections, render_report,
+    narrative_prompt, merge_narrative, _number
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware: timestamps are stored as BSON dates and read back as UTC datetimes
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 # Create the main app
@@ -34,6 +62,22 @@ api_router = APIRouter(prefix="/api")
 # Initialize Earnings Service
 earnings_service = EarningsService(db)
 
+# Atomic token supply reservations for purchases
+supply_reservations = SupplyReservationService(db)
+
+# Stripe checkout clients and pooled HTTP connections, shared for the app lifetime
+payments_client = get_payments_client()
+
+# Content-addressed cache of LLM jurisdictional analyses
+llm_cache = LLMCache(db.llm_cache)
+
+# Coalesces concurrent identical LLM prompts into a single call
+llm_flights = get_llm_singleflight()
+llm_dispatcher = get_llm_dispatcher()
+
+# Session -> User cache shared by every authenticated route
+session_cache = get_session_cache()
+
 # ============ MODELS ============
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -133,8 +177,61 @@ class ISOReport(BaseModel):
     data: Dict[str, Any]
     generated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+# ============ PAGINATION HELPERS ============
+async def paginate(response: Response, collection, query: Dict[str, Any], sort_field: str,
+                   limit: Optional[int], cursor: Optional[str], default_limit: int,
+                   tiebreak: str = "id", projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Keyset-paginated listing; the next page token goes in the X-Next-Cursor header"""
+    try:
+        docs, next_cursor = await fetch_page(
+            collection, query, sort_field,
+            limit=clamp_page_size(limit, default_limit),
+            cursor=cursor,
+            projection=projection or {"_id": 0},
+            tiebreak=tiebreak
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return docs
+
+# ============ STREAMING EXPORT HELPERS ============
+NDJSON_FLUSH_BYTES = 64 * 1024
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+async def iter_ndjson(cursor):
+    """Serialize a Motor cursor as NDJSON without materializing it.
+    
+    Lines are buffered into ~64KB chunks so the response isn't flushed per record.
+    """
+    buffer = []
+    size = 0
+    async for doc in cursor:
+        line = json.dumps(doc, default=_json_default, ensure_ascii=False) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= NDJSON_FLUSH_BYTES:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+def ndjson_response(cursor, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        iter_ndjson(cursor),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # ============ AUTH HELPERS ============
-async def get_current_user(request: Request) -> Optional[User]:
+def get_session_token(request: Request) -> Optional[str]:
     # Try cookie first
     session_token = request.cookies.get("session_token")
     
@@ -144,35 +241,101 @@ async def get_current_user(request: Request) -> Optional[User]:
         if auth_header and auth_header.startswith("Bearer "):
             session_token = auth_header.split("Bearer ")[1]
     
-    if not session_token:
-        return None
-    
+    return session_token
+
+# Joins the session to its user and drops expired sessions server-side.
+# $toDate accepts both BSON dates and the ISO strings written by create_session.
+def _session_lookup_pipeline(session_token: str) -> List[Dict[str, Any]]:
+    return [
+        {"$match": {"session_token": session_token}},
+        {"$match": {"$expr": {"$gt": [{"$toDate": "$expires_at"}, "$$NOW"]}}},
+        {"$limit": 1},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user_id",
+            "foreignField": "id",
+            "as": "user"
+        }},
+        {"$unwind": "$user"},
+        {"$project": {"_id": 0, "user": 1, "expires_at": {"$toDate": "$expires_at"}}}
+    ]
+
+# Flipped off the first time the server rejects the pipeline (MongoDB < 4.2)
+_session_lookup_supported = True
+# Server error codes meaning the pipeline itself is unsupported: unknown
+# operator ($toDate), unknown stage ($lookup), undefined variable ($$NOW)
+_UNSUPPORTED_PIPELINE_CODES = {168, 16436, 40324, 17276}
+
+async def _resolve_session_aggregate(session_token: str):
+    """Resolve session + user in one round-trip. Returns (user_doc, expires_at)."""
+    docs = await db.user_sessions.aggregate(_session_lookup_pipeline(session_token)).to_list(1)
+    if not docs:
+        return None, None
+    
+    user_doc = docs[0]["user"]
+    user_doc.pop("_id", None)
+    expires_at = docs[0]["expires_at"]
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return user_doc, expires_at
+
+async def _resolve_session_sequential(session_token: str):
+    """Two-query fallback for servers without $lookup/$toDate/$$NOW."""
     # Check session
     session = await db.user_sessions.find_one({"session_token": session_token})
     if not session:
-        return None
+        return None, None
     
-    # Convert expires_at to datetime if it's a string
     expires_at = session["expires_at"]
     if isinstance(expires_at, str):
-        expires_at = datetime.fromisoformat(expires_at)
-    
-    # Make sure both datetimes are timezone-aware
-    if expires_at.tzinfo is None:
+        # Not yet converted by services.migrate_dates
+        expires_at = parse_iso(expires_at)
+        if expires_at is None:
+            return None, None
+    elif expires_at.tzinfo is None:
         expires_at = expires_at.replace(tzinfo=timezone.utc)
-    
     if expires_at < datetime.now(timezone.utc):
-        return None
+        return None, None
     
     # Get user
     user_doc = await db.users.find_one({"id": session["user_id"]}, {"_id": 0})
     if not user_doc:
+        return None, None
+    return user_doc, expires_at
+
+async def get_current_user(request: Request) -> Optional[User]:
+    global _session_lookup_supported
+    
+    session_token = get_session_token(request)
+    if not session_token:
         return None
     
-    if isinstance(user_doc.get('created_at'), str):
-        user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
+    cached_user = session_cache.get(session_token)
+    if cached_user is not None:
+        return cached_user
+    
+    user_doc = expires_at = None
+    resolved = False
+    if _session_lookup_supported:
+        try:
+            user_doc, expires_at = await _resolve_session_aggregate(session_token)
+            resolved = True
+        except OperationFailure as e:
+            if e.code in _UNSUPPORTED_PIPELINE_CODES:
+                logging.warning(f"Session $lookup unavailable, using sequential lookup: {e}")
+                _session_lookup_supported = False
+            else:
+                # e.g. a $toDate conversion error on one malformed session
+                logging.warning(f"Session aggregate failed for this request, using sequential lookup: {e}")
+    if not resolved:
+        user_doc, expires_at = await _resolve_session_sequential(session_token)
     
-    return User(**user_doc)
+    if not user_doc:
+        return None
+    
+    user = User(**user_doc)
+    session_cache.put(session_token, user, session_expires_at=expires_at)
+    return user
 
 # ============ AUTH ENDPOINTS ============
 @api_router.post("/auth/session")
@@ -200,9 +363,7 @@ async def create_session(request: Request, response: Response, x_session_id: str
                 name=data["name"],
                 picture=data.get("picture")
             )
-            user_dict = user.model_dump()
-            user_dict['created_at'] = user_dict['created_at'].isoformat()
-            await db.users.insert_one(user_dict)
+            await db.users.insert_one(user.model_dump())
         
         # Create session
         session_token = data["session_token"]
@@ -214,10 +375,8 @@ async def create_session(request: Request, response: Response, x_session_id: str
             expires_at=expires_at
         )
         
-        session_dict = session.model_dump()
-        session_dict['created_at'] = session_dict['created_at'].isoformat()
-        session_dict['expires_at'] = session_dict['expires_at'].isoformat()
-        await db.user_sessions.insert_one(session_dict)
+        # expires_at is a BSON date, so the TTL index purges expired sessions
+        await db.user_sessions.insert_one(session.model_dump())
         
         # Set cookie
         response.set_cookie(
@@ -245,13 +404,22 @@ async def get_me(request: Request):
 
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
-    session_token = request.cookies.get("session_token")
+    session_token = get_session_token(request)
     if session_token:
+        session_cache.invalidate(session_token)
         await db.user_sessions.delete_one({"session_token": session_token})
     
     response.delete_cookie("session_token", path="/")
     return {"message": "Logged out"}
 
+@api_router.get("/auth/session-cache/stats")
+async def get_session_cache_stats(request: Request):
+    """Session cache hit/miss counters (admin only)"""
+    user = await get_current_user(request)
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return session_cache.stats()
+
 # ============ RWA ASSETS ENDPOINTS ============
 @api_router.post("/assets", response_model=RWAAsset)
 async def create_asset(asset_data: RWAAssetCreate, request: Request):
@@ -264,24 +432,23 @@ async def create_asset(asset_data: RWAAssetCreate, request: Request):
         owner_id=user.id
     )
     
-    asset_dict = asset.model_dump()
-    asset_dict['created_at'] = asset_dict['created_at'].isoformat()
-    await db.rwa_assets.insert_one(asset_dict)
+    await db.rwa_assets.insert_one(asset.model_dump())
     
     return asset
 
 @api_router.get("/assets", response_model=List[RWAAsset])
-async def get_assets(asset_type: Optional[str] = None, blockchain: Optional[str] = None):
+async def get_assets(response: Response, asset_type: Optional[str] = None, blockchain: Optional[str] = None,
+                     limit: Optional[int] = None, cursor: Optional[str] = None):
     query = {"status": "active"}
     if asset_type:
         query["asset_type"] = asset_type
     if blockchain:
         query["blockchain_network"] = blockchain
     
-    assets = await db.rwa_assets.find(query, {"_id": 0}).to_list(1000)
-    for asset in assets:
-        if isinstance(asset.get('created_at'), str):
-            asset['created_at'] = datetime.fromisoformat(asset['created_at'])
+    assets = await paginate(response, db.rwa_assets, query, "created_at", limit, cursor, default_limit=1000,
+                            projection=model_projection(RWAAsset))
+    if FAST_JSON_RESPONSES:
+        return trusted_response(response, assets)
     return assets
 
 @api_router.get("/assets/{asset_id}", response_model=RWAAsset)
@@ -289,8 +456,6 @@ async def get_asset(asset_id: str):
     asset = await db.rwa_assets.find_one({"id": asset_id}, {"_id": 0})
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
-    if isinstance(asset.get('created_at'), str):
-        asset['created_at'] = datetime.fromisoformat(asset['created_at'])
     return asset
 
 # ============ TOKENS ENDPOINTS ============
@@ -311,9 +476,7 @@ async def create_token(token_data: TokenCreate, request: Request):
         contract_address=f"0x{uuid.uuid4().hex[:40]}"
     )
     
-    token_dict = token.model_dump()
-    token_dict['created_at'] = token_dict['created_at'].isoformat()
-    await db.tokens.insert_one(token_dict)
+    await db.tokens.insert_one(token.model_dump())
     
     # Update asset status
     await db.rwa_assets.update_one(
@@ -324,15 +487,16 @@ async def create_token(token_data: TokenCreate, request: Request):
     return token
 
 @api_router.get("/tokens", response_model=List[Token])
-async def get_tokens(blockchain: Optional[str] = None):
+async def get_tokens(response: Response, blockchain: Optional[str] = None,
+                     limit: Optional[int] = None, cursor: Optional[str] = None):
     query = {"available_supply": {"$gt": 0}}
     if blockchain:
         query["blockchain_network"] = blockchain
     
-    tokens = await db.tokens.find(query, {"_id": 0}).to_list(1000)
-    for token in tokens:
-        if isinstance(token.get('created_at'), str):
-            token['created_at'] = datetime.fromisoformat(token['created_at'])
+    tokens = await paginate(response, db.tokens, query, "created_at", limit, cursor, default_limit=1000,
+                            projection=model_projection(Token))
+    if FAST_JSON_RESPONSES:
+        return trusted_response(response, tokens)
     return tokens
 
 @api_router.get("/tokens/{token_id}", response_model=Token)
@@ -340,8 +504,6 @@ async def get_token(token_id: str):
     token = await db.tokens.find_one({"id": token_id}, {"_id": 0})
     if not token:
         raise HTTPException(status_code=404, detail="Token not found")
-    if isinstance(token.get('created_at'), str):
-        token['created_at'] = datetime.fromisoformat(token['created_at'])
     return token
 
 # ============ BLOCKCHAIN NETWORKS ============
@@ -371,10 +533,15 @@ async def create_checkout(request: Request):
     
     if not token_id or not origin_url:
         raise HTTPException(status_code=400, detail="token_id and origin_url required")
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        raise HTTPException(status_code=400, detail="quantity must be a positive integer")
     
-    # Get token
-    token = await db.tokens.find_one({"id": token_id})
-    if not token or token["available_supply"] < quantity:
+    # Hold the supply while the buyer is on the Stripe checkout page; the
+    # session closes before the hold lapses
+    reservation, token = await supply_reservations.reserve(
+        token_id, quantity, user.id, ttl_seconds=checkout_hold_seconds(supply_reservations.ttl_seconds)
+    )
+    if not reservation:
         raise HTTPException(status_code=400, detail="Token not available")
     
     amount = float(token["price_per_token"] * quantity)
@@ -382,10 +549,6 @@ async def create_checkout(request: Request):
     # Setup Stripe
     host_url = origin_url
     webhook_url = f"{host_url}/api/webhook/stripe"
-    stripe_checkout = StripeCheckout(
-        api_key=os.environ["STRIPE_API_KEY"],
-        webhook_url=webhook_url
-    )
     
     success_url = f"{origin_url}/payment-success?session_id={{{{CHECKOUT_SESSION_ID}}}}"
     cancel_url = f"{origin_url}/marketplace"
@@ -402,7 +565,15 @@ async def create_checkout(request: Request):
         }
     )
     
-    session = await stripe_checkout.create_checkout_session(checkout_request)
+    try:
+        session = await payments_client.create_checkout_session(
+            webhook_url, checkout_request,
+            expires_at=reservation["expires_at"] - timedelta(seconds=CHECKOUT_HOLD_GRACE_SECONDS)
+        )
+    except Exception:
+        await supply_reservations.release(reservation_id=reservation["id"])
+        raise
+    await supply_reservations.attach_session(reservation["id"], session.session_id)
     
     # Create payment transaction
     payment = PaymentTransaction(
@@ -414,16 +585,123 @@ async def create_checkout(request: Request):
         payment_status="pending",
         metadata={
             "token_id": token_id,
-            "quantity": quantity
+            "quantity": quantity,
+            "reservation_id": reservation["id"]
         }
     )
     
-    payment_dict = payment.model_dump()
-    payment_dict['created_at'] = payment_dict['created_at'].isoformat()
-    await db.payment_transactions.insert_one(payment_dict)
+    await db.payment_transactions.insert_one(payment.model_dump())
     
     return {"url": session.url, "session_id": session.session_id}
 
+async def _settle_payment_supply(payment: Dict[str, Any]) -> bool:
+    """Settle the supply held for a paid checkout; True once it is settled"""
+    reservation_id = payment.get("metadata", {}).get("reservation_id")
+    if reservation_id:
+        await supply_reservations.confirm(reservation_id=reservation_id)
+        reservation = await supply_reservations.get(reservation_id=reservation_id)
+        return bool(reservation) and reservation["status"] == "confirmed"
+    
+    # Checkouts created before reservations: claim the payment, then take the supply
+    claimed = await db.payment_transactions.find_one_and_update(
+        {"session_id": payment["session_id"], "supply_settled": {"$exists": False}},
+        {"$set": {"supply_settled": False}}
+    )
+    if not claimed:
+        current = await db.payment_transactions.find_one(
+            {"session_id": payment["session_id"]}, {"_id": 0, "supply_settled": 1}
+        )
+        return bool(current and current.get("supply_settled"))
+    
+    token = await supply_reservations.take_supply(
+        payment["metadata"]["token_id"], int(payment["metadata"]["quantity"])
+    )
+    await db.payment_transactions.update_one(
+        {"session_id": payment["session_id"]},
+        {"$set": {"supply_settled": token is not None}}
+    )
+    if not token:
+        logging.error(f"Paid checkout {payment['session_id']} could not be fulfilled: token sold out")
+    return token is not None
+
+async def fulfill_payment(session_id: str) -> bool:
+    """Apply a paid checkout: settle supply, record the transaction, update the holding.
+    
+    Every step is idempotent, so status polling, webhook deliveries and queue
+    retries can all run it for the same session and it takes effect once.
+    """
+    payment = await db.payment_transactions.find_one({"session_id": session_id}, {"_id": 0})
+    if not payment:
+        raise LookupError(f"Payment {session_id} not found")
+    if payment["status"] == "completed":
+        return True
+    
+    if not await _settle_payment_supply(payment):
+        return False
+    
+    token_id = payment["metadata"]["token_id"]
+    quantity = int(payment["metadata"]["quantity"])
+    
+    # Create transaction (one per checkout session)
+    transaction = Transaction(
+        transaction_type="buy",
+        buyer_id=payment.get("user_id"),
+        token_id=token_id,
+        quantity=quantity,
+        total_amount=payment["amount"],
+        status="completed",
+        payment_session_id=session_id
+    )
+    try:
+        await db.transactions.update_one(
+            {"payment_session_id": session_id},
+            {"$setOnInsert": transaction.model_dump()},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass
+    
+    # Update/create portfolio holding
+    token = await db.tokens.find_one({"id": token_id}, {"_id": 0, "asset_id": 1, "price_per_token": 1})
+    if token and payment.get("user_id"):
+        await earnings_service.create_or_update_holding(
+            user_id=payment["user_id"],
+            token_id=token_id,
+            asset_id=token["asset_id"],
+            quantity=quantity,
+            price_per_token=token["price_per_token"],
+            purchase_id=session_id
+        )
+    
+    # Mark payment as completed
+    await db.payment_transactions.update_one(
+        {"session_id": session_id},
+        {"$set": {"status": "completed", "payment_status": "paid",
+                  "fulfilled_at": datetime.now(timezone.utc)}}
+    )
+    return True
+
+async def process_webhook_event(event: Dict[str, Any]):
+    """Queue handler for verified Stripe webhook events"""
+    session_id = event.get("session_id")
+    if not session_id:
+        return
+    if event.get("payment_status") == "paid":
+        if not await fulfill_payment(session_id):
+            reservation = await supply_reservations.get(session_id=session_id)
+            if reservation and reservation["status"] == "reclaiming":
+                # Another worker or the sweeper's recovery is settling it; retry later
+                raise RuntimeError(f"Supply for {session_id} is still being reclaimed")
+    elif event.get("event_type") == "checkout.session.expired":
+        await supply_reservations.release(session_id=session_id)
+
+# Persistent, deduplicated webhook event queue drained by background workers
+webhook_queue = WorkQueue(
+    db.webhook_events,
+    process_webhook_event,
+    workers=int(os.environ.get("WEBHOOK_WORKERS", "4"))
+)
+
 @api_router.get("/payments/status/{session_id}")
 async def get_payment_status(session_id: str, request: Request):
     user = await get_current_user(request)
@@ -436,51 +714,24 @@ async def get_payment_status(session_id: str, request: Request):
         raise HTTPException(status_code=404, detail="Payment not found")
     
     # Check Stripe status
-    stripe_checkout = StripeCheckout(
-        api_key=os.environ["STRIPE_API_KEY"],
-        webhook_url=""
-    )
+    stripe_checkout = payments_client.checkout()
     
     try:
         status = await stripe_checkout.get_checkout_status(session_id)
         
-        # Update payment status
+        # Update payment status (a completed payment stays completed)
         await db.payment_transactions.update_one(
-            {"session_id": session_id},
+            {"session_id": session_id, "status": {"$ne": "completed"}},
             {"$set": {"status": status.status, "payment_status": status.payment_status}}
         )
         
-        # If paid and not processed yet, create transaction
+        if status.status == "expired":
+            await supply_reservations.release(session_id=session_id)
+        
+        # Fulfillment normally runs from the webhook queue; doing it here too
+        # is safe (idempotent) and covers deployments without webhooks
         if status.payment_status == "paid" and payment["status"] != "completed":
-            token_id = payment["metadata"]["token_id"]
-            quantity = int(payment["metadata"]["quantity"])
-            
-            # Create transaction
-            transaction = Transaction(
-                transaction_type="buy",
-                buyer_id=user.id,
-                token_id=token_id,
-                quantity=quantity,
-                total_amount=payment["amount"],
-                status="completed",
-                payment_session_id=session_id
-            )
-            
-            trans_dict = transaction.model_dump()
-            trans_dict['created_at'] = trans_dict['created_at'].isoformat()
-            await db.transactions.insert_one(trans_dict)
-            
-            # Update token supply
-            await db.tokens.update_one(
-                {"id": token_id},
-                {"$inc": {"available_supply": -quantity}}
-            )
-            
-            # Mark payment as completed
-            await db.payment_transactions.update_one(
-                {"session_id": session_id},
-                {"$set": {"status": "completed"}}
-            )
+            await fulfill_payment(session_id)
         
         return status.model_dump()
     except Exception as e:
@@ -492,59 +743,154 @@ async def stripe_webhook(request: Request):
     body_bytes = await request.body()
     signature = request.headers.get("Stripe-Signature")
     
-    stripe_checkout = StripeCheckout(
-        api_key=os.environ["STRIPE_API_KEY"],
-        webhook_url=""
-    )
+    stripe_checkout = payments_client.checkout()
     
     try:
         webhook_response = await stripe_checkout.handle_webhook(body_bytes, signature)
-        logging.info(f"Webhook received: {webhook_response}")
-        return {"status": "success"}
     except Exception as e:
         logging.error(f"Webhook error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    
+    # Persist and acknowledge; the workers apply it. Stripe redeliveries share the event id
+    queued = await webhook_queue.enqueue(webhook_response.event_id, {
+        "event_type": webhook_response.event_type,
+        "session_id": webhook_response.session_id,
+        "payment_status": webhook_response.payment_status,
+        "metadata": webhook_response.metadata
+    })
+    logging.info(f"Webhook {webhook_response.event_id} ({webhook_response.event_type}) "
+                 f"{'queued' if queued else 'already received'}")
+    return {"status": "success"}
+
+@api_router.get("/payments/webhook-queue/stats")
+async def get_webhook_queue_stats(request: Request):
+    """Webhook queue backlog and worker counters (admin only)"""
+    user = await get_current_user(request)
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return await webhook_queue.stats()
 
 # ============ TRANSACTIONS ============
 @api_router.get("/transactions", response_model=List[Transaction])
-async def get_transactions(request: Request):
+async def get_transactions(request: Request, response: Response,
+                           limit: Optional[int] = None, cursor: Optional[str] = None):
     user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    transactions = await db.transactions.find(
+    transactions = await paginate(
+        response, db.transactions,
         {"$or": [{"buyer_id": user.id}, {"seller_id": user.id}]},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    for trans in transactions:
-        if isinstance(trans.get('created_at'), str):
-            trans['created_at'] = datetime.fromisoformat(trans['created_at'])
+        "created_at", limit, cursor, default_limit=1000,
+        projection=model_projection(Transaction)
+    )
+    if FAST_JSON_RESPONSES:
+        return trusted_response(response, transactions)
     
     return transactions
 
-# ============ AI ANALYSIS ============
-@api_router.post("/ai/analyze-asset")
-async def analyze_asset(request: Request):
+@api_router.get("/transactions/export")
+async def export_transactions(request: Request):
+    """Stream the user's full transaction history as NDJSON (oldest first)"""
     user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    body = await request.json()
-    asset_data = body.get("asset_data")
-    
-    if not asset_data:
-        raise HTTPException(status_code=400, detail="asset_data required")
+    cursor = db.transactions.find(
+        {"$or": [{"buyer_id": user.id}, {"seller_id": user.id}]},
+        {"_id": 0}
+    ).sort([("created_at", 1), ("id", 1)]).batch_size(500)
     
-    # Initialize AI chat
+    return ndjson_response(cursor, "transactions.ndjson")
+
+# ============ LLM HELPERS ============
+def _llm_chat(session_prefix: str, system_message: str) -> LlmChat:
     chat = LlmChat(
         api_key=os.environ["EMERGENT_LLM_KEY"],
-        session_id=f"analysis_{uuid.uuid4()}",
-        system_message="You are an expert in Real World Asset (RWA) tokenization and financial analysis. Provide detailed, professional analysis."
+        session_id=f"{session_prefix}_{uuid.uuid4()}",
+        system_message=system_message
     )
     chat.with_model("openai", "gpt-4o")
+    return chat
+
+def _llm_unavailable(e: LLMOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="AI analysis is at capacity, please retry shortly",
+        headers={"Retry-After": str(max(1, round(e.retry_after)))}
+    )
+
+async def _ask_llm(chat: LlmChat, prompt: str, namespace: str, use_case: str) -> str:
+    """Send a prompt; concurrent identical prompts share one LLM call.
     
-    prompt = f"""Analyze this Real World Asset for tokenization:
+    ``namespace`` identifies the endpoint (and so its system message and model).
+    The call goes through the shared dispatcher under ``use_case``'s priority;
+    if it can't finish before its deadline the request fails fast with a 503.
+    """
+    try:
+        return await llm_flights.do(
+            prompt_key(namespace, prompt),
+            lambda: llm_dispatcher.run(lambda: chat.send_message(UserMessage(text=prompt)), use_case)
+        )
+    except LLMOverloaded as e:
+        raise _llm_unavailable(e)
+
+async def _cached_llm_report(cache_key: str, session_prefix: str, system_message: str,
+                             prompt: str, namespace: str, use_case: str) -> str:
+    """Cached report text, generated through ``_ask_llm`` on a miss"""
+    response = await llm_cache.get(cache_key)
+    if response is None:
+        response = await _ask_llm(_llm_chat(session_prefix, system_message), prompt, namespace, use_case)
+        await llm_cache.put(cache_key, response, namespace)
+    return response
+
+def _sse_report_response(metadata: Dict[str, Any], session_prefix: str, system_message: str,
+                         prompt: str, namespace: str, use_case: str, finalize,
+                         cache_key: Optional[str] = None) -> StreamingResponse:
+    """Stream an LLM report over SSE (see services.sse_reports).
+    
+    ``finalize(text)`` persists the finished report and returns the ``done`` payload.
+    A cached report is streamed without calling the LLM.
+    """
+    async def events():
+        cached = await llm_cache.get(cache_key) if cache_key else None
+        
+        async def generate() -> str:
+            if cached is not None:
+                return cached
+            response = await _ask_llm(_llm_chat(session_prefix, system_message), prompt, namespace, use_case)
+            if cache_key:
+                await llm_cache.put(cache_key, response, namespace)
+            return response
+        
+        async def dispatched_tokens():
+            try:
+                async with llm_dispatcher.slot(use_case):
+                    async for delta in stream_completion(system_message, prompt):
+                        yield delta
+            except LLMOverloaded as e:
+                raise _llm_unavailable(e)
+        
+        tokens = None
+        if cached is None and token_streaming_enabled():
+            tokens = dispatched_tokens()
+        
+        async def finish(text: str) -> Dict[str, Any]:
+            if tokens is not None and cache_key:
+                await llm_cache.put(cache_key, text, namespace)
+            return await finalize(text)
+        
+        async for event in stream_report(metadata, generate, finish, tokens=tokens):
+            yield event
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# ============ AI ANALYSIS ============
+ANALYZE_ASSET_SYSTEM_MESSAGE = "You are an expert in Real World Asset (RWA) tokenization and financial analysis. Provide detailed, professional analysis."
+
+def _analyze_asset_prompt(asset_data: Dict[str, Any]) -> str:
+    return f"""Analyze this Real World Asset for tokenization:
 
 Asset Name: {asset_data.get('name')}
 Type: {asset_data.get('asset_type')}
@@ -558,56 +904,155 @@ Provide:
 4. Market potential
 5. Compliance considerations for ISO 20022
 """
+
+async def _analyze_asset_input(request: Request) -> Dict[str, Any]:
+    user = await get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    body = await request.json()
+    asset_data = body.get("asset_data")
+    
+    if not asset_data:
+        raise HTTPException(status_code=400, detail="asset_data required")
+    return asset_data
+
+@api_router.post("/ai/analyze-asset")
+async def analyze_asset(request: Request):
+    asset_data = await _analyze_asset_input(request)
     
-    message = UserMessage(text=prompt)
-    response = await chat.send_message(message)
+    # Initialize AI chat
+    chat = _llm_chat("analysis", ANALYZE_ASSET_SYSTEM_MESSAGE)
+    prompt = _analyze_asset_prompt(asset_data)
+    
+    response = await _ask_llm(chat, prompt, "analyze-asset", "analysis")
     
     return {"analysis": response}
 
+@api_router.post("/ai/analyze-asset/stream")
+async def analyze_asset_stream(request: Request):
+    """Same analysis as /ai/analyze-asset, streamed as server-sent events"""
+    asset_data = await _analyze_asset_input(request)
+    
+    async def finalize(analysis: str) -> Dict[str, Any]:
+        return {"analysis": analysis}
+    
+    return _sse_report_response(
+        {"asset_name": asset_data.get("name"), "asset_type": asset_data.get("asset_type")},
+        "analysis", ANALYZE_ASSET_SYSTEM_MESSAGE, _analyze_asset_prompt(asset_data),
+        "analyze-asset", "analysis", finalize
+    )
+
 # ============ JURISDICTIONS ============
+JURISDICTIONS_CACHE_CONTROL = "public, max-age=60"
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison
+    return header.strip() == "*" or etag in (t.strip().removeprefix("W/") for t in header.split(","))
+
+def _precomputed_json(request: Request, body: bytes, etag: str) -> Response:
+    """Serve pre-serialized JSON, or 304 when the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": JURISDICTIONS_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @api_router.get("/jurisdictions")
-async def list_jurisdictions():
+async def list_jurisdictions(request: Request):
     """Get all available jurisdictions for tokenization analysis"""
-    return get_all_jurisdictions()
+    index = get_jurisdiction_index()
+    return _precomputed_json(request, index.list_json, index.list_etag)
 
 @api_router.get("/jurisdictions/{code}")
-async def get_jurisdiction_detail(code: str):
+async def get_jurisdiction_detail(code: str, request: Request):
     """Get detailed jurisdiction profile"""
-    summary = get_jurisdiction_summary(code.upper())
-    if "error" in summary:
+    index = get_jurisdiction_index()
+    body = index.summary_json.get(code.upper())
+    if body is None:
         raise HTTPException(status_code=404, detail=f"Jurisdiction {code} not found")
-    return summary
+    return _precomputed_json(request, body, index.summary_etags[code.upper()])
+
+class ComparisonAsset(BaseModel):
+    type: Optional[str] = None
+    value_usd: Optional[float] = Field(default=None, ge=0)
+    location: Optional[str] = None
+    offering_type: Optional[str] = None
+
+class ComparisonConstraints(BaseModel):
+    max_cost_usd: Optional[float] = Field(default=None, ge=0)
+    max_timeline_days: Optional[int] = Field(default=None, ge=0)
+    retail_allowed: bool = False
+    sandbox_required: bool = False
+    regions: Optional[List[str]] = None
+
+class JurisdictionComparisonRequest(BaseModel):
+    asset: ComparisonAsset = Field(default_factory=ComparisonAsset)
+    constraints: ComparisonConstraints = Field(default_factory=ComparisonConstraints)
+    codes: Optional[List[str]] = None
+    limit: Optional[int] = Field(default=None, ge=1)
+
+@api_router.post("/jurisdictions/compare")
+async def compare_jurisdiction_candidates(req: JurisdictionComparisonRequest):
+    """Rank all jurisdictions for an asset under budget/timeline/investor constraints"""
+    return compare_jurisdictions(
+        req.asset.model_dump(), req.constraints.model_dump(), codes=req.codes, limit=req.limit
+    )
 
-# ============ AI JURISDICTIONAL ANALYSIS (Demo - No Auth for Testing) ============
-@api_router.post("/ai/jurisdictional-analysis-demo")
-async def jurisdictional_analysis_demo(request: Request):
-    """
-    Demo endpoint for jurisdictional analysis (no auth required).
-    Use /ai/jurisdictional-analysis for production.
-    """
-    body = await request.json()
-    
-    # Extract data
-    asset_data = body.get("asset", {})
-    jurisdiction_code = body.get("jurisdiction_code", "").upper()
-    tokenization_intent = body.get("tokenization_intent", {})
-    
-    if not jurisdiction_code:
-        raise HTTPException(status_code=400, detail="jurisdiction_code required")
-    
-    # Get jurisdiction profile
-    jurisdiction = get_jurisdiction(jurisdiction_code)
-    if not jurisdiction:
-        raise HTTPException(status_code=404, detail=f"Jurisdiction {jurisdiction_code} not supported")
+@api_router.post("/jurisdictions/reload")
+async def reload_jurisdiction_data(request: Request):
+    """Reload the jurisdiction data file now instead of waiting for the watcher (admin only)"""
+    user = await get_current_user(request)
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    jurisdiction_summary = get_jurisdiction_summary(jurisdiction_code)
-    risk_score = get_jurisdiction_risk_score(jurisdiction_code)
+    try:
+        await asyncio.to_thread(reload_jurisdictions, True)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Jurisdiction data not loaded: {e}")
+    index = get_jurisdiction_index()
+    return {"data_version": index.data_version, "jurisdictions": len(index.profiles)}
+
+# ============ AI JURISDICTIONAL ANALYSIS (Demo - No Auth for Testing) ============
+# Bump a version whenever its prompt template changes so cached analyses aren't reused
+DOSSIER_PROMPT_VERSION = "pre-legal-dossier/v1"
+JURISDICTIONAL_ANALYSIS_PROMPT_VERSION = "jurisdictional-analysis/v1"
+JURISDICTIONAL_NARRATIVE_PROMPT_VERSION = "jurisdictional-narrative/v1"
+
+def _report_mode(body: Dict[str, Any]) -> str:
+    try:
+        return normalize_mode(body.get("mode"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _render_jurisdictional_report(jurisdiction_code: str, jurisdiction, risk_score: int,
+                                        asset_data: Dict[str, Any], tokenization_intent: Dict[str, Any],
+                                        mode: str) -> Tuple[str, str]:
+    """Template report (see services.report_renderer); returns (report, mode used).
     
-    # Build comprehensive prompt with institutional-grade positioning
-    chat = LlmChat(
-        api_key=os.environ["EMERGENT_LLM_KEY"],
-        session_id=f"demo_jurisdictional_{uuid.uuid4()}",
-        system_message="""You are a SENIOR RWA REGULATORY & RISK ADVISORY ENGINE.
+    In hybrid mode the narrative sections are rewritten by the LLM; if that call
+    fails or returns none of them, the plain template report is returned.
+    """
+    sections = render_sections(jurisdiction, risk_score, asset_data, tokenization_intent)
+    if mode == MODE_HYBRID:
+        cache_key = llm_cache.key(JURISDICTIONAL_NARRATIVE_PROMPT_VERSION, normalize_analysis_inputs(
+            jurisdiction_code, asset_data, tokenization_intent
+        ))
+        try:
+            narrative = await _cached_llm_report(
+                cache_key, "jurisdictional_narrative", JURISDICTIONAL_ANALYSIS_SYSTEM_MESSAGE,
+                narrative_prompt(jurisdiction, sections), JURISDICTIONAL_NARRATIVE_PROMPT_VERSION, "compliance"
+            )
+            sections, replaced = merge_narrative(sections, narrative)
+            if replaced:
+                return render_report(sections), MODE_HYBRID
+        except Exception as e:
+            logger.warning(f"Narrative enrichment failed, using template report: {getattr(e, 'detail', e)}")
+    return render_report(sections), MODE_TEMPLATE
+
+DOSSIER_SYSTEM_MESSAGE = """You are a SENIOR RWA REGULATORY & RISK ADVISORY ENGINE.
 
 Your role is to provide strategic, jurisdiction-aware risk intelligence and decision support for real-world asset (RWA) tokenization projects.
 
@@ -631,38 +1076,15 @@ OPERATING PRINCIPLES:
 7. EXECUTIVE-GRADE: Write in a clear, professional tone suitable for decision-makers.
 
 Always respond in the same language as the user's input (Spanish if input is in Spanish)."""
-    )
-    chat.with_model("openai", "gpt-4o")
-    
-    # Determine recommendation based on risk score
-    if risk_score < 40:
-        decision_recommendation = "PROCEED"
-        decision_emoji = "✅"
-        decision_color = "green"
-    elif risk_score < 70:
-        decision_recommendation = "PROCEED_WITH_CONDITIONS"
-        decision_emoji = "⚠️"
-        decision_color = "yellow"
-    else:
-        decision_recommendation = "DO_NOT_PROCEED"
-        decision_emoji = "❌"
-        decision_color = "red"
-    
-    # Determine investor type based on value and jurisdiction
-    asset_value = asset_data.get('value_usd', 0)
-    if risk_score > 70 or asset_value > 1000000:
-        target_investors = "INSTITUTIONAL_ONLY"
-    elif risk_score > 50 or asset_value > 500000:
-        target_investors = "ACCREDITED_ONLY"
-    else:
-        target_investors = "QUALIFIED_RETAIL"
-    
-    prompt = f"""
+
+def _dossier_prompt(jurisdiction, asset_data: Dict[str, Any], risk_score: int,
+                    decision_recommendation: str, target_investors: str) -> str:
+    return f"""
 Genera un PRE-LEGAL REGULATORY DOSSIER de nivel institucional para tokenización de activos reales (RWA).
 
 ## DATOS DEL ACTIVO
 - Tipo: {asset_data.get('type', 'No especificado')}
-- Valor estimado: ${asset_data.get('value_usd', 0):,.2f} USD
+- Valor estimado: ${_number(asset_data.get('value_usd')) or 0:,.2f} USD
 - Ubicación del activo: {asset_data.get('location', jurisdiction.name)}
 - Descripción: {asset_data.get('description', 'No proporcionada')}
 
@@ -839,9 +1261,73 @@ Validar este análisis con abogados especializados en securities de {jurisdictio
 
 *QuantPayChain - Pre-Legal Regulatory Intelligence for RWA*
 """
+
+@api_router.post("/ai/jurisdictional-analysis-demo")
+async def jurisdictional_analysis_demo(request: Request):
+    """
+    Demo endpoint for jurisdictional analysis (no auth required).
+    Use /ai/jurisdictional-analysis for production.
+    """
+    body = await request.json()
+    
+    # Extract data
+    asset_data = body.get("asset", {})
+    jurisdiction_code = body.get("jurisdiction_code", "").upper()
+    tokenization_intent = body.get("tokenization_intent", {})
+    
+    if not jurisdiction_code:
+        raise HTTPException(status_code=400, detail="jurisdiction_code required")
+    
+    # Get jurisdiction profile
+    jurisdiction = get_jurisdiction(jurisdiction_code)
+    if not jurisdiction:
+        raise HTTPException(status_code=404, detail=f"Jurisdiction {jurisdiction_code} not supported")
     
-    message = UserMessage(text=prompt)
-    response = await chat.send_message(message)
+    jurisdiction_summary = get_jurisdiction_summary(jurisdiction_code)
+    risk_score = get_jurisdiction_risk_score(jurisdiction_code)
+    mode = _report_mode(body)
+    
+    # Determine recommendation based on risk score
+    if risk_score < 40:
+        decision_recommendation = "PROCEED"
+        decision_emoji = "✅"
+        decision_color = "green"
+    elif risk_score < 70:
+        decision_recommendation = "PROCEED_WITH_CONDITIONS"
+        decision_emoji = "⚠️"
+        decision_color = "yellow"
+    else:
+        decision_recommendation = "DO_NOT_PROCEED"
+        decision_emoji = "❌"
+        decision_color = "red"
+    
+    # Determine investor type based on value and jurisdiction
+    asset_value = _number(asset_data.get('value_usd')) or 0
+    if risk_score > 70 or asset_value > 1000000:
+        target_investors = "INSTITUTIONAL_ONLY"
+    elif risk_score > 50 or asset_value > 500000:
+        target_investors = "ACCREDITED_ONLY"
+    else:
+        target_investors = "QUALIFIED_RETAIL"
+    
+    
+    response = None
+    if mode == MODE_LLM:
+        # Identical normalized inputs reuse a cached analysis instead of calling the LLM
+        cache_key = llm_cache.key(DOSSIER_PROMPT_VERSION, normalize_analysis_inputs(
+            jurisdiction_code, asset_data, tokenization_intent
+        ))
+        prompt = _dossier_prompt(jurisdiction, asset_data, risk_score, decision_recommendation, target_investors)
+        try:
+            response = await _cached_llm_report(
+                cache_key, "demo_jurisdictional", DOSSIER_SYSTEM_MESSAGE, prompt, DOSSIER_PROMPT_VERSION, "compliance"
+            )
+        except Exception as e:
+            logger.warning(f"Dossier generation failed, using template report: {getattr(e, 'detail', e)}")
+    if response is None:
+        response, mode = await _render_jurisdictional_report(
+            jurisdiction_code, jurisdiction, risk_score, asset_data, tokenization_intent, mode
+        )
     
     return {
         "report_id": f"QPC-{jurisdiction_code}-{str(uuid.uuid4())[:8].upper()}",
@@ -873,43 +1359,12 @@ Validar este análisis con abogados especializados en securities de {jurisdictio
             "estimated_cost_range": jurisdiction.estimated_legal_cost_usd,
             "regulator": jurisdiction.regulatory_profile.get('regulator'),
             "sandbox_available": jurisdiction.regulatory_profile.get('sandbox_available')
-        }
+        },
+        "report_mode": mode
     }
 
 # ============ AI JURISDICTIONAL ANALYSIS (Enhanced) ============
-@api_router.post("/ai/jurisdictional-analysis")
-async def jurisdictional_analysis(request: Request):
-    """
-    AI-powered jurisdictional analysis for RWA tokenization.
-    Generates comprehensive legal and compliance report based on location.
-    """
-    user = await get_current_user(request)
-    if not user:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    body = await request.json()
-    
-    # Extract data
-    asset_data = body.get("asset", {})
-    jurisdiction_code = body.get("jurisdiction_code", "").upper()
-    tokenization_intent = body.get("tokenization_intent", {})
-    
-    if not jurisdiction_code:
-        raise HTTPException(status_code=400, detail="jurisdiction_code required")
-    
-    # Get jurisdiction profile
-    jurisdiction = get_jurisdiction(jurisdiction_code)
-    if not jurisdiction:
-        raise HTTPException(status_code=404, detail=f"Jurisdiction {jurisdiction_code} not supported")
-    
-    jurisdiction_summary = get_jurisdiction_summary(jurisdiction_code)
-    risk_score = get_jurisdiction_risk_score(jurisdiction_code)
-    
-    # Build comprehensive prompt with institutional-grade positioning
-    chat = LlmChat(
-        api_key=os.environ["EMERGENT_LLM_KEY"],
-        session_id=f"jurisdictional_{uuid.uuid4()}",
-        system_message="""You are a SENIOR RWA REGULATORY & RISK ADVISORY ENGINE.
+JURISDICTIONAL_ANALYSIS_SYSTEM_MESSAGE = """You are a SENIOR RWA REGULATORY & RISK ADVISORY ENGINE.
 
 Your role is to provide strategic, jurisdiction-aware risk intelligence and decision support for real-world asset (RWA) tokenization projects.
 
@@ -933,15 +1388,15 @@ OPERATING PRINCIPLES:
 7. EXECUTIVE-GRADE: Write in a clear, professional tone suitable for decision-makers.
 
 Always respond in the same language as the user's input."""
-    )
-    chat.with_model("openai", "gpt-4o")
-    
-    prompt = f"""
+
+def _jurisdictional_analysis_prompt(jurisdiction, asset_data: Dict[str, Any],
+                                    tokenization_intent: Dict[str, Any]) -> str:
+    return f"""
 Genera un ANÁLISIS DE RIESGO E INTELIGENCIA REGULATORIA para tokenizar el siguiente activo en {jurisdiction.name}:
 
 ## DATOS DEL ACTIVO
 - Tipo: {asset_data.get('type', 'No especificado')}
-- Valor estimado: ${asset_data.get('value_usd', 0):,.2f} USD
+- Valor estimado: ${_number(asset_data.get('value_usd')) or 0:,.2f} USD
 - Ubicación del activo: {asset_data.get('location', jurisdiction.name)}
 - Descripción: {asset_data.get('description', 'No proporcionada')}
 
@@ -1033,83 +1488,177 @@ Este documento constituye un ANÁLISIS PRE-LEGAL de inteligencia regulatoria y r
 
 QuantPayChain opera como motor de inteligencia y decisión, NO como asesor legal.
 """
+
+async def _jurisdictional_analysis_input(request: Request) -> Dict[str, Any]:
+    """Authenticate and validate a jurisdictional analysis request"""
+    user = await get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    return _jurisdictional_params(user.id, await request.json())
+
+def _jurisdictional_params(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    # Extract data
+    asset_data = body.get("asset", {})
+    jurisdiction_code = body.get("jurisdiction_code", "").upper()
+    tokenization_intent = body.get("tokenization_intent", {})
     
-    message = UserMessage(text=prompt)
-    response = await chat.send_message(message)
+    if not jurisdiction_code:
+        raise HTTPException(status_code=400, detail="jurisdiction_code required")
     
-    # Structure the response
+    # Get jurisdiction profile
+    jurisdiction = get_jurisdiction(jurisdiction_code)
+    if not jurisdiction:
+        raise HTTPException(status_code=404, detail=f"Jurisdiction {jurisdiction_code} not supported")
+    
+    return {
+        "user_id": user_id,
+        "asset_data": asset_data,
+        "jurisdiction_code": jurisdiction_code,
+        "jurisdiction": jurisdiction,
+        "tokenization_intent": tokenization_intent,
+        "risk_score": get_jurisdiction_risk_score(jurisdiction_code),
+        "mode": _report_mode(body),
+        # Identical normalized inputs reuse a cached analysis instead of calling the LLM
+        "cache_key": llm_cache.key(JURISDICTIONAL_ANALYSIS_PROMPT_VERSION, normalize_analysis_inputs(
+            jurisdiction_code, asset_data, tokenization_intent
+        ))
+    }
+
+def _jurisdiction_header(params: Dict[str, Any]) -> Dict[str, Any]:
+    jurisdiction = params["jurisdiction"]
+    return {
+        "code": params["jurisdiction_code"],
+        "name": jurisdiction.name,
+        "region": jurisdiction.region,
+        "risk_score": params["risk_score"]
+    }
+
+async def _save_jurisdictional_report(params: Dict[str, Any], report_id: str, analysis: str,
+                                      report_mode: str) -> Dict[str, Any]:
+    """Structure the analysis and store it in jurisdictional_reports"""
+    jurisdiction = params["jurisdiction"]
+    asset_data = params["asset_data"]
     result = {
-        "report_id": str(uuid.uuid4()),
-        "generated_at": datetime.now(timezone.utc).isoformat(),
-        "jurisdiction": {
-            "code": jurisdiction_code,
-            "name": jurisdiction.name,
-            "region": jurisdiction.region,
-            "risk_score": risk_score
-        },
+        "report_id": report_id,
+        "generated_at": datetime.now(timezone.utc),
+        "jurisdiction": _jurisdiction_header(params),
         "asset_summary": {
             "type": asset_data.get('type'),
             "value_usd": asset_data.get('value_usd'),
             "location": asset_data.get('location')
         },
-        "analysis": response,
+        "analysis": analysis,
         "metadata": {
             "regulatory_maturity": jurisdiction.regulatory_profile.get('maturity'),
             "estimated_timeline_days": jurisdiction.estimated_timeline_days,
             "estimated_cost_range": jurisdiction.estimated_legal_cost_usd,
             "typical_structures": jurisdiction.typical_structures
-        }
+        },
+        "report_mode": report_mode
     }
     
-    # Save report to database
     await db.jurisdictional_reports.insert_one({
         **result,
-        "user_id": user.id,
+        "user_id": params["user_id"],
         "_id": result["report_id"]
     })
-    
     return result
 
-@api_router.get("/ai/reports")
-async def get_user_reports(request: Request):
-    """Get user's jurisdictional analysis reports"""
+@api_router.post("/ai/jurisdictional-analysis")
+async def jurisdictional_analysis(request: Request):
+    """
+    AI-powered jurisdictional analysis for RWA tokenization.
+    Generates comprehensive legal and compliance report based on location.
+    
+    ``mode`` selects how the report is written: "template" (local, no LLM),
+    "hybrid" (narrative sections by the LLM) or "llm" (full LLM report).
+    """
+    params = await _jurisdictional_analysis_input(request)
+    return await _run_jurisdictional_analysis(params, str(uuid.uuid4()))
+
+async def _run_jurisdictional_analysis(params: Dict[str, Any], report_id: str) -> Dict[str, Any]:
+    mode = params["mode"]
+    if mode == MODE_LLM:
+        # Build comprehensive prompt with institutional-grade positioning
+        prompt = _jurisdictional_analysis_prompt(
+            params["jurisdiction"], params["asset_data"], params["tokenization_intent"]
+        )
+        try:
+            response = await _cached_llm_report(
+                params["cache_key"], "jurisdictional", JURISDICTIONAL_ANALYSIS_SYSTEM_MESSAGE,
+                prompt, JURISDICTIONAL_ANALYSIS_PROMPT_VERSION, "compliance"
+            )
+        except Exception as e:
+            logger.warning(f"Jurisdictional analysis failed, using template report: {getattr(e, 'detail', e)}")
+        else:
+            return await _save_jurisdictional_report(params, report_id, response, MODE_LLM)
+    
+    response, mode = await _render_jurisdictional_report(
+        params["jurisdiction_code"], params["jurisdiction"], params["risk_score"],
+        params["asset_data"], params["tokenization_intent"], mode
+    )
+    return await _save_jurisdictional_report(params, report_id, response, mode)
+
+@api_router.post("/ai/jurisdictional-analysis/stream")
+async def jurisdictional_analysis_stream(request: Request):
+    """
+    Same report as /ai/jurisdictional-analysis, streamed as server-sent events.
+    The report is stored once the stream completes.
+    """
+    params = await _jurisdictional_analysis_input(request)
+    report_id = str(uuid.uuid4())
+    
+    async def finalize(analysis: str) -> Dict[str, Any]:
+        result = await _save_jurisdictional_report(params, report_id, analysis, MODE_LLM)
+        return {"report_id": report_id, "generated_at": result["generated_at"]}
+    
+    return _sse_report_response(
+        {"report_id": report_id, "jurisdiction": _jurisdiction_header(params)},
+        "jurisdictional", JURISDICTIONAL_ANALYSIS_SYSTEM_MESSAGE,
+        _jurisdictional_analysis_prompt(params["jurisdiction"], params["asset_data"], params["tokenization_intent"]),
+        JURISDICTIONAL_ANALYSIS_PROMPT_VERSION, "compliance", finalize, cache_key=params["cache_key"]
+    )
+
+@api_router.get("/ai/cache/stats")
+async def get_llm_cache_stats(request: Request):
+    """LLM analysis cache counters (admin only)"""
     user = await get_current_user(request)
-    if not user:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    reports = await db.jurisdictional_reports.find(
-        {"user_id": user.id},
-        {"_id": 0}
-    ).sort("generated_at", -1).to_list(100)
+    return {**llm_cache.stats(), "single_flight": llm_flights.stats()}
+
+@api_router.get("/ai/dispatcher/stats")
+async def get_llm_dispatcher_stats(request: Request):
+    """LLM concurrency, queue depth and shedding counters (admin only)"""
+    user = await get_current_user(request)
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    return reports
+    return llm_dispatcher.stats()
 
-@api_router.post("/reports/generate")
-async def generate_iso_report(request: Request):
+@api_router.get("/ai/reports")
+async def get_user_reports(request: Request, response: Response,
+                           limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Get user's jurisdictional analysis reports"""
     user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    body = await request.json()
-    report_type = body.get("report_type", "transaction_summary")
-    
-    # Get user transactions
-    transactions = await db.transactions.find(
-        {"$or": [{"buyer_id": user.id}, {"seller_id": user.id}]},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    # Initialize AI for ISO 20022 formatting
-    chat = LlmChat(
-        api_key=os.environ["EMERGENT_LLM_KEY"],
-        session_id=f"report_{uuid.uuid4()}",
-        system_message="You are an expert in ISO 20022 financial messaging standards. Generate compliant reports."
+    reports = await paginate(
+        response, db.jurisdictional_reports, {"user_id": user.id},
+        "generated_at", limit, cursor, default_limit=100, tiebreak="report_id"
     )
-    chat.with_model("openai", "gpt-4o")
     
-    prompt = f"""Generate an ISO 20022 compliant {report_type} report for these transactions:
+    return reports
+
+ISO_REPORT_SYSTEM_MESSAGE = "You are an expert in ISO 20022 financial messaging standards. Generate compliant reports."
+
+def _iso_report_prompt(report_type: str, transactions: List[Dict[str, Any]]) -> str:
+    return f"""Generate an ISO 20022 compliant {report_type} report for these transactions:
 
-{transactions}
+{json.dumps(transactions, default=_json_default, ensure_ascii=False)}
 
 Include:
 1. Transaction summary
@@ -1118,40 +1667,203 @@ Include:
 4. Compliance status
 5. Formatted according to ISO 20022 standards
 """
+
+async def _iso_report_input(request: Request):
+    user = await get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    body = await request.json()
+    return user, body.get("report_type", "transaction_summary")
+
+async def _user_transactions(user_id: str) -> List[Dict[str, Any]]:
+    return await db.transactions.find(
+        {"$or": [{"buyer_id": user_id}, {"seller_id": user_id}]},
+        {"_id": 0}
+    ).to_list(1000)
+
+async def _save_iso_report(report: ISOReport) -> None:
+    await db.iso_reports.insert_one(report.model_dump())
+
+@api_router.post("/reports/generate")
+async def generate_iso_report(request: Request):
+    user, report_type = await _iso_report_input(request)
+    return await _run_iso_report(user.id, report_type, str(uuid.uuid4()))
+
+async def _run_iso_report(user_id: str, report_type: str, report_id: str) -> Dict[str, Any]:
+    # Get user transactions
+    transactions = await _user_transactions(user_id)
     
-    message = UserMessage(text=prompt)
-    response = await chat.send_message(message)
+    # Initialize AI for ISO 20022 formatting
+    chat = _llm_chat("report", ISO_REPORT_SYSTEM_MESSAGE)
+    prompt = _iso_report_prompt(report_type, transactions)
+    
+    response = await _ask_llm(chat, prompt, "iso-report", "reports")
     
     # Save report
     report = ISOReport(
-        user_id=user.id,
+        id=report_id,
+        user_id=user_id,
         report_type=report_type,
         data={"content": response, "transactions_count": len(transactions)}
     )
     
-    report_dict = report.model_dump()
-    report_dict['generated_at'] = report_dict['generated_at'].isoformat()
-    await db.iso_reports.insert_one(report_dict)
+    await _save_iso_report(report)
     
     return {"report": response, "report_id": report.id}
 
+@api_router.post("/reports/generate/stream")
+async def generate_iso_report_stream(request: Request):
+    """Same report as /reports/generate, streamed as server-sent events"""
+    user, report_type = await _iso_report_input(request)
+    transactions = await _user_transactions(user.id)
+    report_id = str(uuid.uuid4())
+    
+    async def finalize(content: str) -> Dict[str, Any]:
+        await _save_iso_report(ISOReport(
+            id=report_id,
+            user_id=user.id,
+            report_type=report_type,
+            data={"content": content, "transactions_count": len(transactions)}
+        ))
+        return {"report_id": report_id}
+    
+    return _sse_report_response(
+        {"report_id": report_id, "report_type": report_type, "transactions_count": len(transactions)},
+        "report", ISO_REPORT_SYSTEM_MESSAGE, _iso_report_prompt(report_type, transactions),
+        "iso-report", "reports", finalize
+    )
+
 @api_router.get("/reports", response_model=List[ISOReport])
-async def get_reports(request: Request):
+async def get_reports(request: Request, response: Response,
+                      limit: Optional[int] = None, cursor: Optional[str] = None):
     user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    reports = await db.iso_reports.find(
-        {"user_id": user.id},
-        {"_id": 0}
-    ).sort("generated_at", -1).to_list(100)
-    
-    for report in reports:
-        if isinstance(report.get('generated_at'), str):
-            report['generated_at'] = datetime.fromisoformat(report['generated_at'])
+    reports = await paginate(
+        response, db.iso_reports, {"user_id": user.id},
+        "generated_at", limit, cursor, default_limit=100,
+        projection=model_projection(ISOReport)
+    )
+    if FAST_JSON_RESPONSES:
+        return trusted_response(response, reports)
     
     return reports
 
+# ============ REPORT JOBS ============
+async def _existing_job_report(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Report already stored by an earlier attempt of this job, if any"""
+    if job["type"] == "iso_report":
+        report = await db.iso_reports.find_one({"user_id": job["user_id"], "id": job["report_id"]}, {"_id": 0})
+        return report and {"report": report["data"]["content"], "report_id": report["id"]}
+    return await db.jurisdictional_reports.find_one({"_id": job["report_id"]}, {"_id": 0, "user_id": 0})
+
+async def _notify_report_job(job_id: str, callback_url: str) -> None:
+    job = await db.report_jobs.find_one({"_id": job_id})
+    delivered = await deliver_callback(callback_url, job_view(job))
+    await db.report_jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"callback_status": "delivered" if delivered else "failed"}}
+    )
+
+async def process_report_job(job: Dict[str, Any]):
+    """Queue handler: generate the report, store it on the job, then call back"""
+    result = await _existing_job_report(job)
+    if result is None:
+        if job["type"] == "iso_report":
+            result = await _run_iso_report(job["user_id"], job["params"]["report_type"], job["report_id"])
+        else:
+            params = _jurisdictional_params(job["user_id"], job["params"])
+            result = await _run_jurisdictional_analysis(params, job["report_id"])
+    await db.report_jobs.update_one({"_id": job["job_id"]}, {"$set": {"result": result}})
+    
+    if job.get("callback_url"):
+        await _notify_report_job(job["job_id"], job["callback_url"])
+
+async def report_job_failed(job: Dict[str, Any]):
+    callback_url = job["payload"].get("callback_url")
+    if callback_url:
+        await _notify_report_job(job["_id"], callback_url)
+
+# Report generation runs here instead of on the request workers
+report_jobs = WorkQueue(
+    db.report_jobs,
+    process_report_job,
+    workers=int(os.environ.get("REPORT_JOB_WORKERS", "4")),
+    max_attempts=3,
+    # LLM calls can take minutes under load; the lease must outlive them
+    lease_seconds=float(os.environ.get("REPORT_JOB_LEASE_SECONDS", "600")),
+    on_failure=report_job_failed
+)
+
+async def _submit_report_job(user_id: str, job_type: str, params: Dict[str, Any],
+                             callback_url: Optional[str]) -> JSONResponse:
+    try:
+        callback_url = await validate_callback_url(callback_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job_id = str(uuid.uuid4())
+    report_id = str(uuid.uuid4())
+    await report_jobs.enqueue(job_id, {
+        "job_id": job_id,
+        "type": job_type,
+        "user_id": user_id,
+        "report_id": report_id,
+        "params": params,
+        "callback_url": callback_url
+    })
+    status_url = f"/api/jobs/{job_id}"
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "report_id": report_id, "status": "queued", "status_url": status_url},
+        headers={"Location": status_url}
+    )
+
+@api_router.post("/reports/generate/jobs")
+async def submit_iso_report_job(request: Request):
+    """Queue an ISO 20022 report; returns 202 with a job id to poll"""
+    user, report_type = await _iso_report_input(request)
+    body = await request.json()
+    return await _submit_report_job(user.id, "iso_report", {"report_type": report_type},
+                                    body.get("callback_url"))
+
+@api_router.post("/ai/jurisdictional-analysis/jobs")
+async def submit_jurisdictional_analysis_job(request: Request):
+    """Queue a jurisdictional analysis; returns 202 with a job id to poll"""
+    user = await get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    body = await request.json()
+    # Reject bad input now rather than in the worker
+    _jurisdictional_params(user.id, body)
+    params = {k: body[k] for k in ("asset", "jurisdiction_code", "tokenization_intent", "mode") if k in body}
+    return await _submit_report_job(user.id, "jurisdictional_analysis", params, body.get("callback_url"))
+
+@api_router.get("/reports/job-queue/stats")
+async def get_report_job_queue_stats(request: Request):
+    """Report job backlog and worker counters (admin only)"""
+    user = await get_current_user(request)
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return await report_jobs.stats()
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """Status of a background report job, with the report once it is done"""
+    user = await get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    job = await db.report_jobs.find_one({"_id": job_id, "payload.user_id": user.id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job_view(job)
+
 # ============ DASHBOARD STATS ============
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats(request: Request):
@@ -1241,22 +1953,33 @@ async def get_portfolio(request: Request):
     return portfolio
 
 @api_router.get("/earnings/dividends")
-async def get_my_dividends(request: Request):
+async def get_my_dividends(request: Request, response: Response,
+                           limit: Optional[int] = None, cursor: Optional[str] = None):
     """Get user's dividend history"""
     user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    dividends = await db.dividend_distributions.find(
+    dividends = await paginate(
+        response, db.dividend_distributions, {"user_id": user.id},
+        "distribution_date", limit, cursor, default_limit=1000
+    )
+    
+    return dividends
+
+@api_router.get("/earnings/dividends/export")
+async def export_my_dividends(request: Request):
+    """Stream the user's full dividend history as NDJSON (oldest first)"""
+    user = await get_current_user(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    cursor = db.dividend_distributions.find(
         {"user_id": user.id},
         {"_id": 0}
-    ).sort("distribution_date", -1).to_list(1000)
-    
-    for div in dividends:
-        if isinstance(div.get('distribution_date'), str):
-            div['distribution_date'] = datetime.fromisoformat(div['distribution_date'])
+    ).sort([("distribution_date", 1), ("id", 1)]).batch_size(500)
     
-    return dividends
+    return ndjson_response(cursor, "dividends.ndjson")
 
 @api_router.get("/earnings/platform-stats")
 async def get_platform_stats(request: Request):
@@ -1281,9 +2004,14 @@ async def complete_purchase(request: Request):
     token_id = body.get("token_id")
     quantity = body.get("quantity")
     
-    # Get token
-    token = await db.tokens.find_one({"id": token_id})
-    if not token or token["available_supply"] < quantity:
+    if not token_id:
+        raise HTTPException(status_code=400, detail="token_id required")
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        raise HTTPException(status_code=400, detail="quantity must be a positive integer")
+    
+    # Take the supply atomically; concurrent buyers can't oversell
+    token = await supply_reservations.take_supply(token_id, quantity)
+    if not token:
         raise HTTPException(status_code=400, detail="Insufficient tokens available")
     
     # Calculate price with platform fee
@@ -1301,24 +2029,25 @@ async def complete_purchase(request: Request):
         status="completed"
     )
     
-    trans_dict = transaction.model_dump()
-    trans_dict['created_at'] = trans_dict['created_at'].isoformat()
-    await db.transactions.insert_one(trans_dict)
-    
-    # Update token supply
-    await db.tokens.update_one(
-        {"id": token_id},
-        {"$inc": {"available_supply": -quantity}}
-    )
-    
-    # Update/create portfolio holding
-    holding = await earnings_service.create_or_update_holding(
-        user_id=user.id,
-        token_id=token_id,
-        asset_id=token["asset_id"],
-        quantity=quantity,
-        price_per_token=token["price_per_token"]
-    )
+    recorded = False
+    try:
+        await db.transactions.insert_one(transaction.model_dump())
+        recorded = True
+        
+        # Update/create portfolio holding
+        holding = await earnings_service.create_or_update_holding(
+            user_id=user.id,
+            token_id=token_id,
+            asset_id=token["asset_id"],
+            quantity=quantity,
+            price_per_token=token["price_per_token"]
+        )
+    except BaseException:
+        # Nothing was credited: undo the sale so the supply isn't lost
+        if recorded:
+            await db.transactions.delete_one({"id": transaction.id})
+        await supply_reservations.restore_supply(token_id, quantity)
+        raise
     
     return {
         "success": True,
@@ -1441,7 +2170,10 @@ class TransactionAnalysisRequest(BaseModel):
 async def check_sanctions(req: SanctionsCheckRequest):
     """Verifica si una persona/entidad está en listas de sanciones"""
     kyc = get_kyc_aml_service()
-    return await kyc.check_sanctions(req.name, req.country_code, req.date_of_birth)
+    try:
+        return await kyc.check_sanctions(req.name, req.country_code, req.date_of_birth)
+    except SanctionsIndexUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Sanctions screening unavailable: {e}")
 
 @api_router.post("/kyc/verify-identity")
 async def verify_identity(req: KYCVerifyRequest):
@@ -1454,7 +2186,10 @@ async def verify_identity(req: KYCVerifyRequest):
         "document_number": req.document_number,
         "date_of_birth": req.date_of_birth
     }
-    return await kyc.verify_identity(user_data)
+    try:
+        return await kyc.verify_identity(user_data)
+    except SanctionsIndexUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Sanctions screening unavailable: {e}")
 
 @api_router.post("/aml/analyze-transaction")
 async def analyze_transaction(req: TransactionAnalysisRequest):
@@ -1499,6 +2234,7 @@ app.add_middleware(
     allow_origins=cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 logging.basicConfig(
@@ -1507,6 +2243,74 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def provision_indexes():
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Index provisioning failed: {e}")
+
+@app.on_event("startup")
+async def reconcile_asset_performance():
+    # Counters are maintained incrementally; legacy records need one full recount first
+    try:
+        await earnings_service.rebuild_legacy_asset_performance()
+    except Exception as e:
+        logger.error(f"Asset performance reconcile failed: {e}")
+
+@app.on_event("startup")
+async def build_sanctions_index():
+    # Seconds of CPU for a full list: keep it off the event loop and off request paths
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, load_sanctions_index)
+    except Exception as e:
+        logger.error(f"Sanctions index unavailable, sanctions screening will answer 503: {e}")
+
+@app.on_event("startup")
+async def start_reservation_sweeper():
+    app.state.reservation_sweeper = asyncio.create_task(supply_reservations.run_sweeper())
+
+@app.on_event("startup")
+async def start_jurisdiction_watcher():
+    if JURISDICTIONS_HOT_RELOAD:
+        app.state.jurisdiction_watcher = asyncio.create_task(watch_jurisdictions())
+
+@app.on_event("startup")
+async def report_streaming_mode():
+    log_streaming_mode()
+
+@app.on_event("startup")
+async def start_webhook_workers():
+    webhook_queue.start()
+
+@app.on_event("startup")
+async def start_report_job_workers():
+    report_jobs.start()
+
+@app.on_event("shutdown")
+async def stop_webhook_workers():
+    await webhook_queue.stop()
+
+@app.on_event("shutdown")
+async def stop_report_job_workers():
+    await report_jobs.stop()
+
+@app.on_event("shutdown")
+async def stop_reservation_sweeper():
+    sweeper = getattr(app.state, "reservation_sweeper", None)
+    if sweeper:
+        sweeper.cancel()
+
+@app.on_event("shutdown")
+async def stop_jurisdiction_watcher():
+    watcher = getattr(app.state, "jurisdiction_watcher", None)
+    if watcher:
+        watcher.cancel()
+
+@app.on_event("shutdown")
+async def close_payments_client():
+    await payments_client.aclose()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
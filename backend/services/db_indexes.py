@@ -0,0 +1,333 @@
+"""
+MongoDB Index Bootstrap
+=======================
+
+Declares every index the API relies on, next to the route queries each one
+serves. ``ensure_indexes`` is idempotent and runs on app startup; it can also
+be run on its own:
+
+    python -m services.db_indexes            # create/verify indexes
+    python -m services.db_indexes --report   # show query -> index coverage
+
+Notes:
+- ``user_sessions.expires_at`` carries a TTL index (expireAfterSeconds=0), so
+  MongoDB purges sessions once they expire. TTL only applies to BSON date
+  values; run ``python -m services.migrate_dates`` to convert sessions stored
+  with an ISO string before native dates.
+- Unique indexes fail to build if the collection already holds duplicates.
+  That is logged and the remaining indexes are still created.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One index plus the route queries it is meant to cover"""
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    name: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    covers: Tuple[str, ...] = ()
+
+    def model(self) -> IndexModel:
+        return IndexModel(list(self.keys), name=self.name, **self.options)
+
+
+# =============================================================================
+# INDEX CATALOG
+# =============================================================================
+
+INDEX_SPECS: List[IndexSpec] = [
+    # ---- Auth ----
+    IndexSpec(
+        "user_sessions", (("session_token", ASCENDING),), "session_token_unique",
+        {"unique": True},
+        covers=("get_current_user: user_sessions {session_token}",
+                "POST /api/auth/logout: delete {session_token}")
+    ),
+    IndexSpec(
+        "user_sessions", (("expires_at", ASCENDING),), "expires_at_ttl",
+        {"expireAfterSeconds": 0},
+        covers=("TTL purge of expired sessions",)
+    ),
+    IndexSpec(
+        "users", (("id", ASCENDING),), "id_unique", {"unique": True},
+        covers=("get_current_user: users {id} / $lookup foreignField id",)
+    ),
+    IndexSpec(
+        "users", (("email", ASCENDING),), "email_unique", {"unique": True},
+        covers=("POST /api/auth/session: users {email}",)
+    ),
+
+    # ---- Assets ----
+    IndexSpec(
+        "rwa_assets", (("id", ASCENDING),), "id_unique", {"unique": True},
+        covers=("GET /api/assets/{asset_id}",
+                "POST /api/tokens, POST /api/earnings/*: rwa_assets {id, owner_id}",
+                "EarningsService.get_user_portfolio: rwa_assets {id}")
+    ),
+    IndexSpec(
+        "rwa_assets", (("owner_id", ASCENDING),), "owner_id",
+        covers=("GET /api/dashboard/stats: count rwa_assets {owner_id}",)
+    ),
+    IndexSpec(
+        "rwa_assets", (("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+        "status_created_at_id",
+        covers=("GET /api/assets: rwa_assets {status} keyset on (created_at, id)",)
+    ),
+
+    # ---- Tokens ----
+    IndexSpec(
+        "tokens", (("id", ASCENDING),), "id_unique", {"unique": True},
+        covers=("GET /api/tokens/{token_id}",
+                "SupplyReservationService.take_supply: conditional $inc {id, available_supply >= qty}",
+                "POST /api/payments/checkout, POST /api/transactions/complete-purchase: tokens {id}",
+                "EarningsService.calculate_roi / get_user_portfolio: tokens {id}")
+    ),
+    IndexSpec(
+        "tokens", (("asset_id", ASCENDING),), "asset_id",
+        covers=("EarningsService.calculate_dividends: tokens {asset_id}",)
+    ),
+    IndexSpec(
+        "tokens", (("available_supply", ASCENDING),), "available_supply",
+        covers=("GET /api/tokens: tokens {available_supply > 0}",
+                "GET /api/dashboard/stats: count tokens {available_supply > 0}")
+    ),
+    IndexSpec(
+        "tokens", (("created_at", DESCENDING), ("id", DESCENDING)), "created_at_id",
+        covers=("GET /api/tokens: keyset on (created_at, id)",)
+    ),
+
+    # ---- Transactions & payments ----
+    IndexSpec(
+        "transactions", (("buyer_id", ASCENDING), ("status", ASCENDING)), "buyer_id_status",
+        covers=("GET /api/transactions, POST /api/reports/generate: $or branch {buyer_id}",
+                "GET /api/dashboard/stats: transactions {buyer_id, status}")
+    ),
+    IndexSpec(
+        "transactions", (("buyer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+        "buyer_id_created_at_id",
+        covers=("GET /api/transactions: $or branch {buyer_id} keyset on (created_at, id)",
+                "GET /api/transactions/export: $or branch {buyer_id} sort (created_at, id)")
+    ),
+    IndexSpec(
+        "transactions", (("seller_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)),
+        "seller_id_created_at_id",
+        covers=("GET /api/transactions: $or branch {seller_id} keyset on (created_at, id)",
+                "GET /api/transactions/export: $or branch {seller_id} sort (created_at, id)",
+                "POST /api/reports/generate: $or branch {seller_id}")
+    ),
+    IndexSpec(
+        "payment_transactions", (("session_id", ASCENDING),), "session_id_unique",
+        {"unique": True},
+        covers=("GET /api/payments/status/{session_id}: payment_transactions {session_id}",)
+    ),
+    IndexSpec(
+        "transactions", (("payment_session_id", ASCENDING),), "payment_session_id_unique",
+        {"unique": True, "partialFilterExpression": {"payment_session_id": {"$type": "string"}}},
+        covers=("fulfill_payment: one transaction per checkout session (upsert {payment_session_id})",)
+    ),
+    IndexSpec(
+        "webhook_events", (("status", ASCENDING), ("available_at", ASCENDING)), "status_available_at",
+        covers=("WorkQueue._claim: {status: queued, available_at <= now}",)
+    ),
+    IndexSpec(
+        "webhook_events", (("status", ASCENDING), ("lease_until", ASCENDING)), "status_lease_until",
+        covers=("WorkQueue._claim: {status: running, lease_until <= now}",)
+    ),
+    IndexSpec(
+        "webhook_events", (("purge_at", ASCENDING),), "purge_at_ttl",
+        {"expireAfterSeconds": 0},
+        covers=("TTL purge of processed webhook events",)
+    ),
+    IndexSpec(
+        "report_jobs", (("status", ASCENDING), ("available_at", ASCENDING)), "status_available_at",
+        covers=("WorkQueue._claim: {status: queued, available_at <= now}",)
+    ),
+    IndexSpec(
+        "report_jobs", (("status", ASCENDING), ("lease_until", ASCENDING)), "status_lease_until",
+        covers=("WorkQueue._claim: {status: running, lease_until <= now}",)
+    ),
+    IndexSpec(
+        "report_jobs", (("purge_at", ASCENDING),), "purge_at_ttl",
+        {"expireAfterSeconds": 0},
+        covers=("TTL purge of finished report jobs",)
+    ),
+    IndexSpec(
+        "token_reservations", (("id", ASCENDING),), "id_unique", {"unique": True},
+        covers=("SupplyReservationService.confirm / release / attach_session: {id}",)
+    ),
+    IndexSpec(
+        "token_reservations", (("session_id", ASCENDING),), "session_id_unique",
+        {"unique": True, "partialFilterExpression": {"session_id": {"$type": "string"}}},
+        covers=("SupplyReservationService.confirm / release: {session_id}",)
+    ),
+    IndexSpec(
+        "token_reservations", (("status", ASCENDING), ("expires_at", ASCENDING)), "status_expires_at",
+        covers=("SupplyReservationService.release_expired: {status: pending, expires_at <= now}",
+                "SupplyReservationService.recover_reclaims: {status: reclaiming} (prefix)")
+    ),
+    IndexSpec(
+        "token_reservations", (("purge_at", ASCENDING),), "purge_at_ttl",
+        {"expireAfterSeconds": 0},
+        covers=("TTL purge of settled reservations",)
+    ),
+
+    # ---- Earnings ----
+    IndexSpec(
+        "portfolio_holdings", (("user_id", ASCENDING), ("token_id", ASCENDING)), "user_id_token_id_unique",
+        {"unique": True},
+        covers=("EarningsService.create_or_update_holding / calculate_roi: {user_id, token_id}",
+                "EarningsService.get_user_portfolio: {user_id} (prefix)",
+                "EarningsService.distribute_dividends: holding $inc {user_id, token_id}")
+    ),
+    IndexSpec(
+        "portfolio_holdings", (("asset_id", ASCENDING),), "asset_id",
+        covers=("EarningsService.calculate_dividends / rebuild_asset_performance: {asset_id}",)
+    ),
+    IndexSpec(
+        "asset_revenues", (("asset_id", ASCENDING),), "asset_id",
+        covers=("EarningsService.get_asset_total_revenue: asset_revenues {asset_id}",)
+    ),
+    IndexSpec(
+        "dividend_distributions", (("asset_id", ASCENDING), ("status", ASCENDING)), "asset_id_status",
+        covers=("EarningsService.rebuild_asset_performance: {asset_id, status}",)
+    ),
+    IndexSpec(
+        "dividend_distributions", (("asset_id", ASCENDING), ("period", ASCENDING), ("user_id", ASCENDING)),
+        "asset_id_period_user_id_unique", {"unique": True},
+        covers=("EarningsService.distribute_dividends: resume distinct user_id {asset_id, period}",
+                "EarningsService.distribute_dividends: one payout per holder per period")
+    ),
+    IndexSpec(
+        "dividend_distributions", (("user_id", ASCENDING), ("distribution_date", DESCENDING), ("id", DESCENDING)),
+        "user_id_distribution_date_id",
+        covers=("GET /api/earnings/dividends: {user_id} keyset on (distribution_date, id)",
+                "GET /api/earnings/dividends/export: {user_id} sort (distribution_date, id)")
+    ),
+    IndexSpec(
+        "asset_performance", (("asset_id", ASCENDING),), "asset_id_unique", {"unique": True},
+        covers=("EarningsService.get_asset_performance: single read {asset_id}",
+                "EarningsService._inc_asset_performance: $inc upsert {asset_id}")
+    ),
+
+    # ---- AI ----
+    IndexSpec(
+        "llm_cache", (("expires_at", ASCENDING),), "expires_at_ttl",
+        {"expireAfterSeconds": 0},
+        covers=("TTL purge of cached LLM analyses (lookups use _id)",)
+    ),
+
+    # ---- Reports ----
+    IndexSpec(
+        "iso_reports", (("user_id", ASCENDING), ("generated_at", DESCENDING), ("id", DESCENDING)),
+        "user_id_generated_at_id",
+        covers=("GET /api/reports: iso_reports {user_id} keyset on (generated_at, id)",)
+    ),
+    IndexSpec(
+        "jurisdictional_reports", (("user_id", ASCENDING), ("generated_at", DESCENDING), ("report_id", DESCENDING)),
+        "user_id_generated_at_report_id",
+        covers=("GET /api/ai/reports: jurisdictional_reports {user_id} keyset on (generated_at, report_id)",)
+    ),
+]
+
+
+# =============================================================================
+# PROVISIONING
+# =============================================================================
+
+async def ensure_indexes(db, specs: List[IndexSpec] = None) -> Dict[str, List[str]]:
+    """
+    Create any missing indexes. Safe to run repeatedly: existing indexes with
+    the same definition are a no-op, conflicting ones are logged and skipped.
+    """
+    specs = INDEX_SPECS if specs is None else specs
+
+    # One create_indexes call per spec so a single conflict (e.g. duplicates
+    # blocking a unique index) doesn't prevent the others from being built
+    result = {"ensured": [], "failed": []}
+    for spec in specs:
+        label = f"{spec.collection}.{spec.name}"
+        try:
+            await db[spec.collection].create_indexes([spec.model()])
+            result["ensured"].append(label)
+        except OperationFailure as e:
+            logger.warning(f"Index {label} not created: {e}")
+            result["failed"].append(label)
+
+    logger.info(f"Indexes ensured: {len(result['ensured'])}, failed: {len(result['failed'])}")
+    return result
+
+
+def coverage_report(specs: List[IndexSpec] = None) -> List[Dict[str, Any]]:
+    """Route query -> index mapping, one row per covered query"""
+    specs = INDEX_SPECS if specs is None else specs
+    rows = []
+    for spec in specs:
+        keys = ", ".join(f"{k}:{'1' if d == ASCENDING else '-1'}" for k, d in spec.keys)
+        for query in spec.covers:
+            rows.append({
+                "query": query,
+                "collection": spec.collection,
+                "index": spec.name,
+                "keys": keys,
+                "options": spec.options
+            })
+    return rows
+
+
+def format_coverage_report(specs: List[IndexSpec] = None) -> str:
+    rows = coverage_report(specs)
+    width = max(len(r["query"]) for r in rows)
+    lines = [f"{'QUERY'.ljust(width)}  INDEX"]
+    for r in sorted(rows, key=lambda r: (r["collection"], r["query"])):
+        options = f" {r['options']}" if r["options"] else ""
+        lines.append(f"{r['query'].ljust(width)}  {r['collection']}.{r['index']} ({r['keys']}){options}")
+    return "\n".join(lines)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+async def _main(argv: List[str] = None) -> int:
+    import argparse
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Provision QuantPayChain MongoDB indexes")
+    parser.add_argument("--report", action="store_true", help="print route query coverage and exit")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        print(format_coverage_report())
+        return 0
+
+    load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    try:
+        result = await ensure_indexes(client[os.environ["DB_NAME"]])
+    finally:
+        client.close()
+
+    for label in result["ensured"]:
+        print(f"ok      {label}")
+    for label in result["failed"]:
+        print(f"FAILED  {label}")
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    raise SystemExit(asyncio.run(_main()))
@@ -0,0 +1,65 @@
+"""
+Fast-path JSON Responses
+========================
+
+High-throughput response mode for list endpoints that return documents
+straight from MongoDB. Instead of letting FastAPI re-validate every element
+against ``response_model`` and encode it with the stdlib encoder, trusted
+documents are serialized once with orjson.
+
+"Trusted" means the documents were written through the API models and are
+read back with ``model_projection``, so they already have the model's
+shape. BSON dates are encoded by orjson in RFC 3339 format; legacy ISO
+string dates (see ``services.migrate_dates``) are emitted as-is.
+
+Enabled with ``FAST_JSON_RESPONSES=1``. orjson is optional: without it the
+mode still skips re-validation but encodes with the stdlib ``json``.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+FAST_JSON_RESPONSES = os.environ.get("FAST_JSON_RESPONSES", "0").lower() in ("1", "true", "yes")
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class TrustedJSONResponse(Response):
+    """JSON response that serializes content as-is, without validation"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Mongo projection returning exactly the model's fields"""
+    projection = {name: 1 for name in model.model_fields}
+    projection["_id"] = 0
+    return projection
+
+
+def trusted_response(response: Response, content: Any) -> TrustedJSONResponse:
+    """Build the fast-path response, carrying over headers set on the injected Response"""
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    return TrustedJSONResponse(content, headers=headers)
@@ -0,0 +1,197 @@
+"""
+Jurisdiction Comparison Engine
+==============================
+
+Ranks every jurisdiction profile for one asset in a single call, instead of
+one ``/api/jurisdictions/{code}`` or AI analysis request per candidate.
+
+The profiles are turned into column arrays once per data version; filtering
+and scoring are then NumPy expressions over all profiles at once, so the cost
+of a comparison barely depends on how many jurisdictions are compared.
+
+Score (0-100) = weighted sum of:
+
+- ``regulatory``  100 - jurisdiction risk score
+- ``maturity``    regulatory maturity of the framework
+- ``cost``        typical legal cost relative to the asset value
+                  (0 at ``COST_RATIO_CEILING`` of the value or more); relative
+                  to the cheapest candidate when no value is given
+- ``speed``       estimated timeline (0 at a year or more)
+- ``sandbox``     regulatory sandbox available
+
+Constraints exclude candidates and report why:
+
+- ``max_cost_usd``       typical cost above the budget
+- ``max_timeline_days``  estimated timeline above the limit
+- ``retail_allowed``     offering restricted to accredited investors
+- ``sandbox_required``   no sandbox
+- ``regions`` / ``codes`` restrict the candidate set
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from services.jurisdictions import JurisdictionIndex, RegulatoryMaturity, get_jurisdiction_index
+
+SCORE_WEIGHTS = {
+    "regulatory": 0.35,
+    "maturity": 0.20,
+    "cost": 0.25,
+    "speed": 0.15,
+    "sandbox": 0.05,
+}
+COST_RATIO_CEILING = 0.10
+TIMELINE_CEILING_DAYS = 365.0
+
+_MATURITY_SCORES = {
+    RegulatoryMaturity.NASCENT.value: 0.0,
+    RegulatoryMaturity.EMERGING.value: 0.4,
+    RegulatoryMaturity.PARTIAL.value: 0.6,
+    RegulatoryMaturity.ADVANCED.value: 1.0,
+    RegulatoryMaturity.RESTRICTIVE.value: 0.2,
+}
+
+# accredited_investor_only -> retail access
+RETAIL_ALLOWED = "allowed"
+RETAIL_CONDITIONAL = "conditional"
+RETAIL_ACCREDITED_ONLY = "accredited_only"
+
+
+def _retail_access(accredited_only: Any) -> str:
+    if accredited_only is False:
+        return RETAIL_ALLOWED
+    if accredited_only is True:
+        return RETAIL_ACCREDITED_ONLY
+    # "recommended", "depends_on_exemption", unknown...
+    return RETAIL_CONDITIONAL
+
+
+class _Matrix:
+    """Column arrays over all profiles, in index order"""
+
+    def __init__(self, index: JurisdictionIndex):
+        self.data_version = index.data_version
+        self.codes = np.array([entry["code"] for entry in index.listing])
+        profiles = [index.profiles[code] for code in self.codes]
+        self.regions = np.array([j.region for j in profiles])
+        self.risk_score = np.array([index.risk_scores[code] for code in self.codes], dtype=float)
+        self.maturity = np.array([_MATURITY_SCORES.get(j.regulatory_profile.get("maturity"), 0.0) for j in profiles])
+        self.sandbox = np.array([bool(j.regulatory_profile.get("sandbox_available")) for j in profiles])
+        self.cost_typical = np.array([j.estimated_legal_cost_usd.get("typical", np.nan) for j in profiles], dtype=float)
+        self.timeline = np.array([j.estimated_timeline_days for j in profiles], dtype=float)
+        self.retail = np.array([_retail_access(j.requirements.get("accredited_investor_only")) for j in profiles])
+        self.prospectus_threshold = np.array(
+            [j.requirements.get("prospectus_threshold_usd") or np.nan for j in profiles], dtype=float
+        )
+
+
+_matrix: Optional[_Matrix] = None
+
+
+def _get_matrix(index: JurisdictionIndex) -> _Matrix:
+    global _matrix
+    if _matrix is None or _matrix.data_version != index.data_version:
+        _matrix = _Matrix(index)
+    return _matrix
+
+
+def _upper_list(values: Optional[Iterable[str]]) -> Optional[List[str]]:
+    return [v.upper() for v in values] if values else None
+
+
+def compare_jurisdictions(asset: Dict[str, Any],
+                          constraints: Dict[str, Any],
+                          codes: Optional[List[str]] = None,
+                          limit: Optional[int] = None) -> Dict[str, Any]:
+    """Filter and rank every jurisdiction for ``asset`` under ``constraints``"""
+    # One snapshot for the whole call: a hot reload may swap the index meanwhile
+    index = get_jurisdiction_index()
+    m = _get_matrix(index)
+    value_usd = float(asset.get("value_usd") or 0)
+
+    # ---- Filters ----
+    reasons = {
+        "not_requested": np.zeros(len(m.codes), dtype=bool),
+        "region": np.zeros(len(m.codes), dtype=bool),
+        "cost_above_budget": np.zeros(len(m.codes), dtype=bool),
+        "timeline_too_long": np.zeros(len(m.codes), dtype=bool),
+        "accredited_investors_only": np.zeros(len(m.codes), dtype=bool),
+        "no_sandbox": np.zeros(len(m.codes), dtype=bool),
+    }
+    wanted_codes = _upper_list(codes)
+    if wanted_codes:
+        reasons["not_requested"] = ~np.isin(m.codes, wanted_codes)
+    regions = _upper_list(constraints.get("regions"))
+    if regions:
+        reasons["region"] = ~np.isin(m.regions, regions)
+    if constraints.get("max_cost_usd") is not None:
+        reasons["cost_above_budget"] = m.cost_typical > float(constraints["max_cost_usd"])
+    if constraints.get("max_timeline_days") is not None:
+        reasons["timeline_too_long"] = m.timeline > float(constraints["max_timeline_days"])
+    if constraints.get("retail_allowed"):
+        reasons["accredited_investors_only"] = m.retail == RETAIL_ACCREDITED_ONLY
+    if constraints.get("sandbox_required"):
+        reasons["no_sandbox"] = ~m.sandbox
+
+    excluded = np.logical_or.reduce(list(reasons.values()))
+    eligible = ~excluded
+
+    # ---- Scores ----
+    if value_usd > 0:
+        cost = 1.0 - np.clip(m.cost_typical / value_usd / COST_RATIO_CEILING, 0.0, 1.0)
+    else:
+        cheapest = np.nanmin(m.cost_typical[eligible]) if eligible.any() else np.nan
+        cost = np.clip(cheapest / m.cost_typical, 0.0, 1.0)
+    components = {
+        "regulatory": (100.0 - m.risk_score) / 100.0,
+        "maturity": m.maturity,
+        "cost": np.nan_to_num(cost),
+        "speed": 1.0 - np.clip(m.timeline / TIMELINE_CEILING_DAYS, 0.0, 1.0),
+        "sandbox": m.sandbox.astype(float),
+    }
+    score = 100.0 * sum(SCORE_WEIGHTS[name] * values for name, values in components.items())
+
+    order = np.flatnonzero(eligible)
+    # Highest score first; ties go to the lower risk score, then the code
+    order = order[np.lexsort((m.codes[order], m.risk_score[order], -score[order]))]
+    if limit:
+        order = order[:limit]
+
+    prospectus_flags = value_usd > 0 and (asset.get("offering_type") or "").lower() == "public"
+    ranked = []
+    for rank, i in enumerate(order, start=1):
+        code = str(m.codes[i])
+        summary = index.summaries[code]
+        entry = {
+            "rank": rank,
+            "code": code,
+            "name": summary["name"],
+            "region": summary["region"],
+            "score": round(float(score[i]), 1),
+            "components": {name: round(float(values[i]) * 100, 1) for name, values in components.items()},
+            "risk_score": int(m.risk_score[i]),
+            "regulatory_maturity": summary["regulatory_maturity"],
+            "estimated_cost_usd": summary["estimated_cost_usd"],
+            "estimated_timeline_days": summary["estimated_timeline_days"],
+            "sandbox_available": bool(m.sandbox[i]),
+            "retail_access": str(m.retail[i]),
+            # Profiles without a typical cost have no ratio (NaN isn't valid JSON)
+            "cost_to_value_pct": (round(float(m.cost_typical[i]) / value_usd * 100, 2)
+                                  if value_usd > 0 and not math.isnan(m.cost_typical[i]) else None)
+        }
+        if prospectus_flags and not math.isnan(m.prospectus_threshold[i]):
+            entry["prospectus_likely"] = bool(value_usd > m.prospectus_threshold[i])
+        ranked.append(entry)
+
+    return {
+        "data_version": m.data_version,
+        "weights": SCORE_WEIGHTS,
+        "candidates": int(len(m.codes) - reasons["not_requested"].sum()),
+        "ranked": ranked,
+        "excluded": [
+            {"code": str(m.codes[i]), "reasons": [name for name, mask in reasons.items() if mask[i]]}
+            for i in np.flatnonzero(excluded & ~reasons["not_requested"])
+        ]
+    }
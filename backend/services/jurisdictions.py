@@ -11,12 +11,39 @@ Each profile includes:
 - Token classification rules
 - Risk factors
 - Estimated costs and timelines
+
+Profiles live in ``data/jurisdictions.json`` (``JURISDICTIONS_DATA_PATH``),
+so they can be updated without a deploy. The file is validated and compiled
+into a marshal snapshot next to it (``JURISDICTIONS_SNAPSHOT_PATH``), which
+later startups load instead of parsing the JSON again; the snapshot is
+rebuilt whenever the data file's size or mtime changes.
+
+Derived views (summaries, risk scores, region map and the pre-serialized
+API responses) are computed once into an immutable ``JurisdictionIndex``.
+When the data file changes, ``watch_jurisdictions`` builds a new index and
+swaps it in with a single assignment; an invalid file is logged and the
+current index kept.
 """
 
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+import asyncio
+import hashlib
+import json
+import logging
+import marshal
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+from dataclasses import asdict, dataclass, fields
 from enum import Enum
 
+try:
+    from watchfiles import awatch
+except ImportError:  # pragma: no cover - optional dependency
+    awatch = None
+
+logger = logging.getLogger(__name__)
+
 
 class RegulatoryMaturity(Enum):
     """Level of regulatory development for digital assets"""
@@ -51,439 +78,282 @@ class JurisdictionalProfile:
 
 
 # =============================================================================
-# JURISDICTIONAL PROFILES DATABASE
+# PRECOMPUTED INDEX
 # =============================================================================
 
-JURISDICTIONS: Dict[str, JurisdictionalProfile] = {
-    
-    # =========================================================================
-    # LATIN AMERICA
-    # =========================================================================
-    
-    "CL": JurisdictionalProfile(
-        code="CL",
-        name="Chile",
-        region="LATAM",
-        regulatory_profile={
-            "maturity": RegulatoryMaturity.EMERGING.value,
-            "digital_securities_recognized": True,
-            "tokenization_framework": "partial",
-            "sandbox_available": True,
-            "regulator": "CMF (Comisión para el Mercado Financiero)",
-            "key_legislation": "Ley Fintech (2023)",
-            "crypto_legal_status": "legal_regulated"
-        },
-        requirements={
-            "kyc_required": True,
-            "aml_required": True,
-            "accredited_investor_only": False,
-            "max_retail_investment_usd": None,
-            "prospectus_required": "depends_on_amount",
-            "prospectus_threshold_usd": 1000000,
-            "tax_treatment": "capital_gains_taxable",
-            "capital_gains_rate": "10-40%",
-            "reporting_requirements": ["CMF registration", "AML reporting"],
-            "custody_requirements": "licensed_custodian_recommended"
-        },
-        risk_factors={
-            "regulatory_risk": RiskLevel.MEDIUM.value,
-            "legal_clarity": RiskLevel.MEDIUM.value,
-            "enforcement_risk": RiskLevel.LOW.value,
-            "political_stability": RiskLevel.LOW.value,
-            "currency_risk": RiskLevel.MEDIUM.value
-        },
-        typical_structures=[
-            "SPV (Sociedad por Acciones)",
-            "Fideicomiso",
-            "Tokenización directa con contrato"
-        ],
-        estimated_timeline_days=90,
-        estimated_legal_cost_usd={
-            "min": 15000,
-            "max": 50000,
-            "typical": 25000
-        },
-        notes="Chile has a progressive Fintech Law (2023) that provides a sandbox for tokenization. The CMF is relatively crypto-friendly. Real estate tokenization is gaining traction."
-    ),
-    
-    "MX": JurisdictionalProfile(
-        code="MX",
-        name="México",
-        region="LATAM",
-        regulatory_profile={
-            "maturity": RegulatoryMaturity.PARTIAL.value,
-            "digital_securities_recognized": True,
-            "tokenization_framework": "partial",
-            "sandbox_available": True,
-            "regulator": "CNBV (Comisión Nacional Bancaria y de Valores)",
-            "key_legislation": "Ley Fintech (2018)",
-            "crypto_legal_status": "legal_regulated"
-        },
-        requirements={
-            "kyc_required": True,
-            "aml_required": True,
-            "accredited_investor_only": False,
-            "max_retail_investment_usd": 160000,  # ~3M MXN
-            "prospectus_required": True,
-            "tax_treatment": "capital_gains_taxable",
-            "capital_gains_rate": "10%",
-            "reporting_requirements": ["CNBV registration", "SAT reporting"]
-        },
-        risk_factors={
-            "regulatory_risk": RiskLevel.MEDIUM.value,
-            "legal_clarity": RiskLevel.MEDIUM.value,
-            "enforcement_risk": RiskLevel.MEDIUM.value,
-            "political_stability": RiskLevel.MEDIUM.value
-        },
-        typical_structures=[
-            "SAPI (Sociedad Anónima Promotora de Inversión)",
-            "Fideicomiso",
-            "CKD (Certificado de Capital de Desarrollo)"
-        ],
-        estimated_timeline_days=120,
-        estimated_legal_cost_usd={
-            "min": 20000,
-            "max": 80000,
-            "typical": 40000
-        },
-        notes="Mexico's Fintech Law requires all crypto activities to go through licensed ITFs. Tokenization must comply with securities laws."
-    ),
-    
-    "AR": JurisdictionalProfile(
-        code="AR",
-        name="Argentina",
-        region="LATAM",
-        regulatory_profile={
-            "maturity": RegulatoryMaturity.NASCENT.value,
-            "digital_securities_recognized": False,
-            "tokenization_framework": "none",
-            "sandbox_available": False,
-            "regulator": "CNV (Comisión Nacional de Valores)",
-            "crypto_legal_status": "legal_unregulated"
-        },
-        requirements={
-            "kyc_required": True,
-            "aml_required": True,
-            "accredited_investor_only": "recommended",
-            "prospectus_required": "depends_on_structure",
-            "capital_controls": True,
-            "tax_treatment": "uncertain"
-        },
-        risk_factors={
-            "regulatory_risk": RiskLevel.HIGH.value,
-            "legal_clarity": RiskLevel.LOW.value,
-            "enforcement_risk": RiskLevel.LOW.value,
-            "political_stability": RiskLevel.HIGH.value,
-            "currency_risk": RiskLevel.CRITICAL.value
-        },
-        typical_structures=[
-            "Contrato privado",
-            "SPV offshore",
-            "Estructura híbrida"
-        ],
-        estimated_timeline_days=60,
-        estimated_legal_cost_usd={
-            "min": 10000,
-            "max": 40000,
-            "typical": 20000
-        },
-        notes="Argentina has no specific tokenization framework. High economic volatility. Consider offshore structures or targeting accredited investors only."
-    ),
-    
-    # =========================================================================
-    # NORTH AMERICA
-    # =========================================================================
-    
-    "US": JurisdictionalProfile(
-        code="US",
-        name="United States",
-        region="NORTH_AMERICA",
-        regulatory_profile={
-            "maturity": RegulatoryMaturity.ADVANCED.value,
-            "digital_securities_recognized": True,
-            "tokenization_framework": "full",
-            "sandbox_available": False,
-            "regulator": "SEC / FINRA / State regulators",
-            "key_legislation": "Securities Act 1933, Howey Test",
-            "crypto_legal_status": "legal_heavily_regulated"
-        },
-        requirements={
-            "kyc_required": True,
-            "aml_required": True,
-            "accredited_investor_only": "depends_on_exemption",
-            "exemptions_available": [
-                "Reg D 506(b) - Accredited only, no advertising",
-                "Reg D 506(c) - Accredited only, advertising allowed",
-                "Reg A+ Tier 1 - Up to $20M, limited disclosure",
-                "Reg A+ Tier 2 - Up to $75M, full disclosure",
-                "Reg CF - Up to $5M, retail allowed"
-            ],
-            "prospectus_required": "depends_on_exemption",
-            "broker_dealer_required": "usually",
-            "transfer_agent_required": True,
-            "tax_treatment": "capital_gains_taxable",
-            "capital_gains_rate": "0-20%",
-            "state_blue_sky_compliance": True
-        },
-        risk_factors={
-            "regulatory_risk": RiskLevel.HIGH.value,
-            "legal_clarity": RiskLevel.HIGH.value,
-            "enforcement_risk": RiskLevel.CRITICAL.value,
-            "litigation_risk": RiskLevel.HIGH.value
-        },
-        typical_structures=[
-            "LLC with Reg D 506(c)",
-            "Delaware Series LLC",
-            "REIT tokenization",
-            "SPV with broker-dealer"
-        ],
-        estimated_timeline_days=180,
-        estimated_legal_cost_usd={
-            "min": 50000,
-            "max": 300000,
-            "typical": 100000
-        },
-        notes="US has the most complex regulatory environment. Most tokens are securities under Howey Test. Use exemptions carefully. SEC enforcement is aggressive."
-    ),
-    
-    # =========================================================================
-    # EUROPE
-    # =========================================================================
-    
-    "ES": JurisdictionalProfile(
-        code="ES",
-        name="España",
-        region="EU",
-        regulatory_profile={
-            "maturity": RegulatoryMaturity.ADVANCED.value,
-            "digital_securities_recognized": True,
-            "tokenization_framework": "MiCA + National",
-            "sandbox_available": True,
-            "regulator": "CNMV (Comisión Nacional del Mercado de Valores)",
-            "key_legislation": "MiCA (2024), Ley del Mercado de Valores",
-            "crypto_legal_status": "legal_regulated"
-        },
-        requirements={
-            "kyc_required": True,
-            "aml_required": True,
-            "accredited_investor_only": False,
-            "prospectus_required": "depends_on_amount",
-            "prospectus_threshold_eur": 8000000,
-            "mica_compliance": True,
-            "tax_treatment": "capital_gains_taxable",
-            "capital_gains_rate": "19-26%"
-        },
-        risk_factors={
-            "regulatory_risk": RiskLevel.LOW.value,
-            "legal_clarity": RiskLevel.HIGH.value,
-            "enforcement_risk": RiskLevel.MEDIUM.value
-        },
-        typical_structures=[
-            "SL (Sociedad Limitada)",
-            "SA con tokenización",
-            "SOCIMI (REIT español)",
-            "Sandbox CNMV"
-        ],
-        estimated_timeline_days=120,
-        estimated_legal_cost_usd={
-            "min": 30000,
-            "max": 100000,
-            "typical": 50000
-        },
-        notes="Spain has a regulatory sandbox and is MiCA-compliant. Good environment for tokenization. SOCIMI structure is ideal for real estate."
-    ),
-    
-    "CH": JurisdictionalProfile(
-        code="CH",
-        name="Suiza",
-        region="EUROPE",
-        regulatory_profile={
-            "maturity": RegulatoryMaturity.ADVANCED.value,
-            "digital_securities_recognized": True,
-            "tokenization_framework": "full",
-            "sandbox_available": True,
-            "regulator": "FINMA",
-            "key_legislation": "DLT Act (2021)",
-            "crypto_legal_status": "legal_crypto_friendly"
-        },
-        requirements={
-            "kyc_required": True,
-            "aml_required": True,
-            "accredited_investor_only": False,
-            "prospectus_required": "depends_on_amount",
-            "finma_registration": "depends_on_classification"
-        },
-        risk_factors={
-            "regulatory_risk": RiskLevel.LOW.value,
-            "legal_clarity": RiskLevel.HIGH.value,
-            "enforcement_risk": RiskLevel.LOW.value
-        },
-        typical_structures=[
-            "AG (Aktiengesellschaft)",
-            "Tokenized shares",
-            "Zug Crypto Valley structures"
-        ],
-        estimated_timeline_days=90,
-        estimated_legal_cost_usd={
-            "min": 40000,
-            "max": 150000,
-            "typical": 70000
-        },
-        notes="Switzerland (Crypto Valley) is the most crypto-friendly jurisdiction in Europe. DLT Act provides clear framework for tokenization."
-    ),
-    
-    # =========================================================================
-    # ASIA
-    # =========================================================================
-    
-    "SG": JurisdictionalProfile(
-        code="SG",
-        name="Singapur",
-        region="ASIA",
-        regulatory_profile={
-            "maturity": RegulatoryMaturity.ADVANCED.value,
-            "digital_securities_recognized": True,
-            "tokenization_framework": "full",
-            "sandbox_available": True,
-            "regulator": "MAS (Monetary Authority of Singapore)",
-            "key_legislation": "Securities and Futures Act, Payment Services Act",
-            "crypto_legal_status": "legal_regulated"
-        },
-        requirements={
-            "kyc_required": True,
-            "aml_required": True,
-            "accredited_investor_only": "depends_on_offering",
-            "mas_license_required": "depends_on_activity"
-        },
-        risk_factors={
-            "regulatory_risk": RiskLevel.LOW.value,
-            "legal_clarity": RiskLevel.HIGH.value,
-            "enforcement_risk": RiskLevel.MEDIUM.value
-        },
-        typical_structures=[
-            "Private Limited Company",
-            "VCC (Variable Capital Company)",
-            "Exempt offering"
-        ],
-        estimated_timeline_days=120,
-        estimated_legal_cost_usd={
-            "min": 50000,
-            "max": 200000,
-            "typical": 80000
-        },
-        notes="Singapore is Asia's leading hub for tokenization. MAS is progressive but requires proper licensing. VCC structure is ideal for funds."
-    ),
-    
-    "AE": JurisdictionalProfile(
-        code="AE",
-        name="Emiratos Árabes Unidos",
-        region="MIDDLE_EAST",
-        regulatory_profile={
-            "maturity": RegulatoryMaturity.ADVANCED.value,
-            "digital_securities_recognized": True,
-            "tokenization_framework": "full",
-            "sandbox_available": True,
-            "regulator": "VARA (Dubai), ADGM, DIFC",
-            "crypto_legal_status": "legal_regulated"
-        },
-        requirements={
-            "kyc_required": True,
-            "aml_required": True,
-            "vara_license": "required_in_dubai",
-            "free_zone_options": True
-        },
-        risk_factors={
-            "regulatory_risk": RiskLevel.LOW.value,
-            "legal_clarity": RiskLevel.HIGH.value,
-            "enforcement_risk": RiskLevel.LOW.value
-        },
-        typical_structures=[
-            "DIFC Company",
-            "ADGM Company",
-            "Dubai Free Zone"
-        ],
-        estimated_timeline_days=90,
-        estimated_legal_cost_usd={
-            "min": 30000,
-            "max": 120000,
-            "typical": 60000
-        },
-        notes="UAE is aggressively pursuing crypto/tokenization. VARA provides clear framework. Tax-free environment is attractive."
-    )
+_RISK_WEIGHTS = {
+    RiskLevel.LOW.value: 20,
+    RiskLevel.MEDIUM.value: 50,
+    RiskLevel.HIGH.value: 75,
+    RiskLevel.CRITICAL.value: 95
 }
 
 
+def _compute_risk_score(j: JurisdictionalProfile) -> int:
+    scores = [
+        _RISK_WEIGHTS.get(j.risk_factors.get("regulatory_risk"), 50),
+        _RISK_WEIGHTS.get(j.risk_factors.get("legal_clarity"), 50),
+        _RISK_WEIGHTS.get(j.risk_factors.get("enforcement_risk"), 50)
+    ]
+    return int(sum(scores) / len(scores))
+
+
+def _list_entry(j: JurisdictionalProfile) -> Dict:
+    return {
+        "code": j.code,
+        "name": j.name,
+        "region": j.region,
+        "maturity": j.regulatory_profile["maturity"],
+        "risk_level": j.risk_factors.get("regulatory_risk", "medium")
+    }
+
+
+def _summary(j: JurisdictionalProfile, risk_score: int) -> Dict:
+    return {
+        "code": j.code,
+        "name": j.name,
+        "region": j.region,
+        "regulatory_maturity": j.regulatory_profile["maturity"],
+        "tokenization_framework": j.regulatory_profile.get("tokenization_framework"),
+        "regulator": j.regulatory_profile.get("regulator"),
+        "kyc_required": j.requirements.get("kyc_required"),
+        "accredited_only": j.requirements.get("accredited_investor_only"),
+        "estimated_timeline_days": j.estimated_timeline_days,
+        "estimated_cost_usd": j.estimated_legal_cost_usd,
+        "risk_score": risk_score,
+        "typical_structures": j.typical_structures,
+        "notes": j.notes
+    }
+
+
+def _to_json(value) -> bytes:
+    # Same bytes Starlette's JSONResponse would produce for this value
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+@dataclass(frozen=True)
+class JurisdictionIndex:
+    """Read-only views of the profiles, computed once instead of per request"""
+    data_version: str
+    profiles: Mapping[str, JurisdictionalProfile]
+    risk_scores: Mapping[str, int]
+    listing: Tuple[Dict, ...]
+    summaries: Mapping[str, Dict]
+    region_codes: Mapping[str, Tuple[str, ...]]
+    # Pre-serialized API bodies and their strong ETags
+    list_json: bytes
+    list_etag: str
+    summary_json: Mapping[str, bytes]
+    summary_etags: Mapping[str, str]
+
+
+def _data_version(profiles: Dict[str, JurisdictionalProfile]) -> str:
+    payload = json.dumps(
+        {code: asdict(j) for code, j in profiles.items()},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _build_index(profiles: Dict[str, JurisdictionalProfile],
+                 data_version: Optional[str] = None) -> JurisdictionIndex:
+    risk_scores = {code: _compute_risk_score(j) for code, j in profiles.items()}
+    listing = tuple(_list_entry(j) for j in profiles.values())
+    summaries = {code: _summary(j, risk_scores[code]) for code, j in profiles.items()}
+
+    region_codes: Dict[str, List[str]] = {}
+    for code, j in profiles.items():
+        region_codes.setdefault(j.region, []).append(code)
+
+    list_json = _to_json(list(listing))
+    summary_json = {code: _to_json(summary) for code, summary in summaries.items()}
+
+    return JurisdictionIndex(
+        data_version=data_version or _data_version(profiles),
+        profiles=MappingProxyType(dict(profiles)),
+        risk_scores=MappingProxyType(risk_scores),
+        listing=listing,
+        summaries=MappingProxyType(summaries),
+        region_codes=MappingProxyType({r: tuple(c) for r, c in region_codes.items()}),
+        list_json=list_json,
+        list_etag=_etag(list_json),
+        summary_json=MappingProxyType(summary_json),
+        summary_etags=MappingProxyType({code: _etag(body) for code, body in summary_json.items()})
+    )
+
+
+# =============================================================================
+# PROFILE DATA
+# =============================================================================
+
+DATA_PATH = Path(os.environ.get("JURISDICTIONS_DATA_PATH", Path(__file__).parent / "data" / "jurisdictions.json"))
+SNAPSHOT_PATH = Path(os.environ.get("JURISDICTIONS_SNAPSHOT_PATH", DATA_PATH.with_suffix(".snapshot")))
+JURISDICTIONS_HOT_RELOAD = os.environ.get("JURISDICTIONS_HOT_RELOAD", "1").lower() in ("1", "true", "yes")
+RELOAD_POLL_SECONDS = float(os.environ.get("JURISDICTIONS_RELOAD_SECONDS", "5"))
+
+_PROFILE_FIELDS = tuple(f.name for f in fields(JurisdictionalProfile))
+_MATURITIES = {m.value for m in RegulatoryMaturity}
+# Bump when the snapshot layout changes
+_SNAPSHOT_FORMAT = 1
+
+
+class JurisdictionDataError(ValueError):
+    """The jurisdiction data file is malformed"""
+
+
+def _parse_profiles(records) -> Dict[str, JurisdictionalProfile]:
+    if not isinstance(records, list):
+        raise JurisdictionDataError("expected a list of jurisdiction profiles")
+    profiles: Dict[str, JurisdictionalProfile] = {}
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise JurisdictionDataError(f"profile #{i} is not an object")
+        code = record.get("code")
+        missing = [name for name in _PROFILE_FIELDS if name not in record]
+        unknown = sorted(set(record) - set(_PROFILE_FIELDS))
+        if missing or unknown:
+            raise JurisdictionDataError(
+                f"profile {code or '#' + str(i)}: missing {missing or 'nothing'}, unknown {unknown or 'nothing'}"
+            )
+        if not isinstance(code, str) or code != code.upper() or code in profiles:
+            raise JurisdictionDataError(f"profile #{i}: code must be a unique upper-case string")
+        for name in ("regulatory_profile", "requirements", "risk_factors", "estimated_legal_cost_usd"):
+            if not isinstance(record[name], dict):
+                raise JurisdictionDataError(f"profile {code}: {name} must be an object")
+        if record["regulatory_profile"].get("maturity") not in _MATURITIES:
+            raise JurisdictionDataError(f"profile {code}: unknown regulatory maturity")
+        profiles[code] = JurisdictionalProfile(**record)
+    return profiles
+
+
+def _snapshot_header(stat: os.stat_result) -> Tuple:
+    return (_SNAPSHOT_FORMAT, marshal.version, _PROFILE_FIELDS, stat.st_size, stat.st_mtime_ns)
+
+
+def _read_snapshot(stat: os.stat_result) -> Optional[Tuple[str, Tuple]]:
+    """(data_version, rows) if the snapshot was compiled from this exact file"""
+    try:
+        header, data_version, rows = marshal.loads(SNAPSHOT_PATH.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return (data_version, rows) if header == _snapshot_header(stat) else None
+
+
+def _write_snapshot(stat: os.stat_result, data_version: str,
+                    profiles: Dict[str, JurisdictionalProfile]) -> None:
+    rows = tuple(tuple(getattr(j, name) for name in _PROFILE_FIELDS) for j in profiles.values())
+    tmp = SNAPSHOT_PATH.with_name(f"{SNAPSHOT_PATH.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(marshal.dumps((_snapshot_header(stat), data_version, rows)))
+        os.replace(tmp, SNAPSHOT_PATH)
+    except OSError as e:
+        # A read-only deploy still works, it just parses the JSON on every start
+        logger.warning(f"Could not write jurisdiction snapshot {SNAPSHOT_PATH}: {e}")
+        tmp.unlink(missing_ok=True)
+
+
+def _load_index(use_snapshot: bool = True) -> Tuple[JurisdictionIndex, Tuple[int, int]]:
+    """Index of the current data file, and the (size, mtime) it was built from"""
+    stat = DATA_PATH.stat()
+    snapshot = _read_snapshot(stat) if use_snapshot else None
+    if snapshot is not None:
+        data_version, rows = snapshot
+        profiles = {row[0]: JurisdictionalProfile(*row) for row in rows}
+    else:
+        profiles = _parse_profiles(json.loads(DATA_PATH.read_bytes()))
+        data_version = _data_version(profiles)
+        _write_snapshot(stat, data_version, profiles)
+    return _build_index(profiles, data_version), (stat.st_size, stat.st_mtime_ns)
+
+
+_index, _source_key = _load_index()
+
+
+def get_jurisdiction_index() -> JurisdictionIndex:
+    return _index
+
+
+def reload_jurisdictions(force: bool = False) -> bool:
+    """
+    Rebuild the index if the data file changed (always, with ``force``) and
+    swap it in. Returns True if a new index was installed; raises
+    ``JurisdictionDataError``/``OSError`` and keeps the current index if the
+    file can't be loaded.
+    """
+    global _index, _source_key
+    stat = DATA_PATH.stat()
+    if not force and (stat.st_size, stat.st_mtime_ns) == _source_key:
+        return False
+    index, source_key = _load_index(use_snapshot=not force)
+    # Readers hold on to whole indexes, so one assignment is an atomic swap
+    _index, _source_key = index, source_key
+    logger.info(f"Loaded {len(index.profiles)} jurisdiction profiles (data version {index.data_version})")
+    return True
+
+
+async def watch_jurisdictions(poll_seconds: float = None) -> None:
+    """Background loop reloading the profiles whenever the data file changes"""
+    interval = poll_seconds if poll_seconds is not None else RELOAD_POLL_SECONDS
+
+    async def changes():
+        if awatch is not None:
+            # Watch the directory: editors and deploys often replace the file
+            async for _ in awatch(DATA_PATH.parent, watch_filter=lambda _, path: Path(path).name == DATA_PATH.name):
+                yield
+        else:
+            while True:
+                await asyncio.sleep(interval)
+                yield
+
+    async for _ in changes():
+        try:
+            await asyncio.to_thread(reload_jurisdictions)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Jurisdiction reload failed, keeping data version {_index.data_version}: {e}")
+
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
 def get_jurisdiction(code: str) -> Optional[JurisdictionalProfile]:
     """Get jurisdiction profile by country code"""
-    return JURISDICTIONS.get(code.upper())
+    return _index.profiles.get(code.upper())
 
 
 def get_all_jurisdictions() -> List[Dict]:
     """Get all available jurisdictions"""
-    return [
-        {
-            "code": j.code,
-            "name": j.name,
-            "region": j.region,
-            "maturity": j.regulatory_profile["maturity"],
-            "risk_level": j.risk_factors.get("regulatory_risk", "medium")
-        }
-        for j in JURISDICTIONS.values()
-    ]
+    return [dict(entry) for entry in _index.listing]
 
 
 def get_jurisdictions_by_region(region: str) -> List[JurisdictionalProfile]:
     """Get all jurisdictions in a region"""
-    return [j for j in JURISDICTIONS.values() if j.region == region]
+    index = _index
+    return [index.profiles[code] for code in index.region_codes.get(region, ())]
 
 
 def get_jurisdiction_risk_score(code: str) -> int:
-    """Calculate overall risk score for a jurisdiction (0-100)"""
-    j = get_jurisdiction(code)
-    if not j:
-        return 50  # Default medium risk
-    
-    risk_weights = {
-        RiskLevel.LOW.value: 20,
-        RiskLevel.MEDIUM.value: 50,
-        RiskLevel.HIGH.value: 75,
-        RiskLevel.CRITICAL.value: 95
-    }
-    
-    scores = [
-        risk_weights.get(j.risk_factors.get("regulatory_risk"), 50),
-        risk_weights.get(j.risk_factors.get("legal_clarity"), 50),
-        risk_weights.get(j.risk_factors.get("enforcement_risk"), 50)
-    ]
-    
-    return int(sum(scores) / len(scores))
+    """Overall risk score for a jurisdiction (0-100)"""
+    return _index.risk_scores.get(code.upper(), 50)  # Default medium risk
+
+
+def get_jurisdictions_data_version() -> str:
+    """Content hash of the profiles; changes whenever any profile changes"""
+    return _index.data_version
 
 
 def get_jurisdiction_summary(code: str) -> Dict:
     """Get a summary for display"""
-    j = get_jurisdiction(code)
-    if not j:
+    summary = _index.summaries.get(code.upper())
+    if summary is None:
         return {"error": "Jurisdiction not found"}
-    
-    return {
-        "code": j.code,
-        "name": j.name,
-        "region": j.region,
-        "regulatory_maturity": j.regulatory_profile["maturity"],
-        "tokenization_framework": j.regulatory_profile.get("tokenization_framework"),
-        "regulator": j.regulatory_profile.get("regulator"),
-        "kyc_required": j.requirements.get("kyc_required"),
-        "accredited_only": j.requirements.get("accredited_investor_only"),
-        "estimated_timeline_days": j.estimated_timeline_days,
-        "estimated_cost_usd": j.estimated_legal_cost_usd,
-        "risk_score": get_jurisdiction_risk_score(code),
-        "typical_structures": j.typical_structures,
-        "notes": j.notes
-    }
+    return dict(summary)
 
 
 # =============================================================================
@@ -19,6 +19,8 @@ from enum import Enum
 import logging
 import re
 
+from services.sanctions_index import get_sanctions_index, normalize_name
+
 logger = logging.getLogger(__name__)
 
 
@@ -142,43 +144,15 @@ class KYCAMLRealService:
         }
     
     def _normalize_name(self, name: str) -> str:
-        """Normaliza nombre para búsqueda"""
-        # Remover caracteres especiales, convertir a minúsculas
-        normalized = re.sub(r'[^\w\s]', '', name.lower())
-        # Remover múltiples espacios
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        return normalized
+        """Normaliza nombre para búsqueda (transliteración, sin acentos ni puntuación)"""
+        return normalize_name(name)
     
     def _check_local_sanctions(self, normalized_name: str) -> List[Dict]:
         """
-        Verificación contra base de datos local de sanciones
-        En producción, esto se conectaría a una base de datos actualizada
+        Verificación contra la lista local de sanciones (SANCTIONS_LIST_PATH),
+        indexada una sola vez en memoria; ver services.sanctions_index
         """
-        # Lista simplificada de ejemplos (en producción sería una DB completa)
-        known_sanctioned = [
-            {"name": "kim jong un", "list": "OFAC SDN", "country": "KP"},
-            {"name": "vladimir putin", "list": "EU/UK Sanctions", "country": "RU"},
-            {"name": "bashar al assad", "list": "OFAC SDN", "country": "SY"},
-            {"name": "ali khamenei", "list": "OFAC SDN", "country": "IR"},
-            {"name": "alexander lukashenko", "list": "EU Sanctions", "country": "BY"},
-        ]
-        
-        matches = []
-        name_parts = set(normalized_name.split())
-        
-        for sanctioned in known_sanctioned:
-            sanctioned_parts = set(sanctioned["name"].split())
-            # Match si hay suficiente overlap en los nombres
-            overlap = len(name_parts & sanctioned_parts)
-            if overlap >= 2 or (overlap >= 1 and len(name_parts) <= 2):
-                matches.append({
-                    "matched_name": sanctioned["name"],
-                    "source_list": sanctioned["list"],
-                    "country": sanctioned["country"],
-                    "match_score": overlap / max(len(name_parts), len(sanctioned_parts)) * 100
-                })
-        
-        return matches
+        return get_sanctions_index().screen(normalized_name)
     
     async def _check_opensanctions(self, name: str) -> List[Dict]:
         """
@@ -0,0 +1,125 @@
+"""
+LLM Response Cache
+==================
+
+Content-addressed cache for LLM analyses, stored in MongoDB. The key is a
+SHA-256 over the normalized prompt inputs, the prompt template version and
+the jurisdiction data version, so:
+
+- requests that differ only in casing, spacing or chain order share an entry;
+- editing a prompt template (bump its version) or any jurisdiction profile
+  produces new keys, and the stale entries simply age out.
+
+Entries expire through a TTL index on ``expires_at`` (``LLM_CACHE_TTL_SECONDS``,
+default 7 days). ``LLM_CACHE_TTL_SECONDS=0`` disables the cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from services.jurisdictions import get_jurisdictions_data_version
+
+logger = logging.getLogger(__name__)
+
+
+def _norm_text(value: Any) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+
+def _norm_list(values: Optional[Iterable[Any]]) -> list:
+    return sorted({_norm_text(v) for v in (values or []) if _norm_text(v)})
+
+
+def normalize_analysis_inputs(jurisdiction_code: str,
+                              asset: Dict[str, Any],
+                              tokenization_intent: Dict[str, Any]) -> Dict[str, Any]:
+    """Canonical form of the inputs rendered into a jurisdictional analysis prompt.
+
+    The asset value is kept to the cent because the prompt quotes it.
+    """
+    try:
+        value_usd = round(float(asset.get("value_usd") or 0), 2)
+    except (TypeError, ValueError):
+        value_usd = _norm_text(asset.get("value_usd"))
+    return {
+        "jurisdiction": jurisdiction_code.upper(),
+        "asset_type": _norm_text(asset.get("type")),
+        "value_usd": value_usd,
+        "location": _norm_text(asset.get("location")),
+        "description": _norm_text(asset.get("description")),
+        "offering_type": _norm_text(tokenization_intent.get("offering_type")),
+        "target_investors": _norm_text(tokenization_intent.get("target_investors")),
+        "target_chains": _norm_list(tokenization_intent.get("target_chains"))
+    }
+
+
+class LLMCache:
+    """Mongo-backed cache of LLM responses keyed by prompt-input hash"""
+
+    def __init__(self, collection, ttl_seconds: float = None):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else \
+            float(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def key(self, prompt_version: str, inputs: Dict[str, Any]) -> str:
+        payload = json.dumps({
+            "prompt": prompt_version,
+            "data": get_jurisdictions_data_version(),
+            "inputs": inputs
+        }, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        doc = await self.collection.find_one(
+            # expires_at is checked here too: the TTL monitor only runs once a minute
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"response": 1}
+        )
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return doc["response"]
+
+    async def put(self, key: str, response: str, prompt_version: str) -> None:
+        if not self.enabled:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {"$set": {
+                    "response": response,
+                    "prompt_version": prompt_version,
+                    "data_version": get_jurisdictions_data_version(),
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            # A failed cache write must not fail the request that paid for the LLM call
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "data_version": get_jurisdictions_data_version(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
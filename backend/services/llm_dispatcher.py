@@ -0,0 +1,177 @@
+"""
+LLM Call Dispatcher
+===================
+
+Process-wide admission control for outbound LLM calls. At most
+``LLM_MAX_CONCURRENCY`` calls run at once; the rest wait in a priority queue
+ordered by use case (KYC first, marketing-style asset analysis last) and
+then by arrival.
+
+Deadline-aware shedding: every call has a deadline (``LLM_DEADLINE_SECONDS``
+unless the caller passes one). When a call would have to queue, its
+completion time is estimated from the callers ahead of it and a moving
+average of recent call latencies. If that lands past the deadline, or the
+queue already holds ``LLM_MAX_QUEUE`` calls, ``LLMOverloaded`` is raised
+at once so the caller can answer with its fallback instead of timing out
+later. A queued call is also shed as soon as its remaining time drops below
+the expected latency. Calls that have started are never cancelled.
+
+``LLM_EXPECTED_LATENCY_SECONDS`` seeds the latency estimate before any call
+has completed.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict
+
+# Lower runs first
+USE_CASE_PRIORITIES: Dict[str, int] = {
+    "kyc": 0,
+    "risk": 1,
+    "compliance": 2,
+    "reports": 3,
+    "analysis": 4,
+}
+DEFAULT_PRIORITY = max(USE_CASE_PRIORITIES.values())
+
+_LATENCY_SMOOTHING = 0.2
+
+
+class LLMOverloaded(Exception):
+    """An LLM call was shed instead of being queued past its deadline"""
+
+    def __init__(self, use_case: str, reason: str, retry_after: float):
+        super().__init__(f"LLM capacity exhausted for {use_case} ({reason})")
+        self.use_case = use_case
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class LLMDispatcher:
+    """Bounded, prioritized execution of LLM calls"""
+
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 max_queue: int = 200,
+                 deadline_seconds: float = 60.0,
+                 expected_latency: float = 20.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self.latency = expected_latency
+        self._active = 0
+        self._queue = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._depth: Counter = Counter()
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+
+    def _estimated_wait(self, priority: int) -> float:
+        ahead = sum(n for p, n in self._depth.items() if p <= priority)
+        # Every slot turns over roughly once per average call
+        return (ahead // self.max_concurrency + 1) * self.latency
+
+    def _shed(self, use_case: str, reason: str) -> LLMOverloaded:
+        self._counters[use_case][f"shed_{reason}"] += 1
+        return LLMOverloaded(use_case, reason, retry_after=round(self.latency, 1))
+
+    def _release(self) -> None:
+        while self._queue:
+            priority, _, waiter = heapq.heappop(self._queue)
+            if waiter.done():
+                continue  # shed or cancelled while waiting
+            self._depth[priority] -= 1
+            waiter.set_result(None)  # hand the slot over
+            return
+        self._active -= 1
+
+    async def _acquire(self, use_case: str, priority: int, deadline: float) -> None:
+        if self._active < self.max_concurrency and not self._queued():
+            self._active += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        if self._queued() >= self.max_queue:
+            raise self._shed(use_case, "queue_full")
+        if loop.time() + self._estimated_wait(priority) + self.latency > deadline:
+            raise self._shed(use_case, "deadline")
+
+        waiter = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+        self._depth[priority] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter),
+                                   timeout=max(deadline - loop.time() - self.latency, 0))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                if isinstance(e, asyncio.TimeoutError):
+                    return  # the slot arrived together with the timeout
+                self._release()
+                raise
+            waiter.cancel()
+            self._depth[priority] -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._shed(use_case, "deadline") from None
+
+    def _queued(self) -> int:
+        return sum(self._depth.values())
+
+    @asynccontextmanager
+    async def slot(self, use_case: str, deadline_seconds: float = None):
+        """Hold one concurrency slot for the body (e.g. a streamed completion)"""
+        loop = asyncio.get_running_loop()
+        priority = USE_CASE_PRIORITIES.get(use_case, DEFAULT_PRIORITY)
+        counters = self._counters[use_case]
+        counters["submitted"] += 1
+        await self._acquire(use_case, priority, loop.time() + (deadline_seconds or self.deadline_seconds))
+
+        started = loop.time()
+        try:
+            yield
+        except Exception:
+            counters["failed"] += 1
+            raise
+        else:
+            counters["completed"] += 1
+            elapsed = loop.time() - started
+            self.latency += _LATENCY_SMOOTHING * (elapsed - self.latency)
+        finally:
+            self._release()
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], use_case: str,
+                  deadline_seconds: float = None) -> Any:
+        """Await ``fn()`` inside a slot; raises LLMOverloaded if shed"""
+        async with self.slot(use_case, deadline_seconds):
+            return await fn()
+
+    def stats(self) -> Dict[str, Any]:
+        names = {p: name for name, p in USE_CASE_PRIORITIES.items()}
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queued": self._queued(),
+            "queued_by_use_case": {names.get(p, str(p)): n for p, n in sorted(self._depth.items()) if n},
+            "expected_latency_seconds": round(self.latency, 2),
+            "deadline_seconds": self.deadline_seconds,
+            "use_cases": {name: dict(c) for name, c in self._counters.items()}
+        }
+
+
+# Singleton instance
+_llm_dispatcher = None
+
+def get_llm_dispatcher() -> LLMDispatcher:
+    """Obtiene instancia singleton del despachador de llamadas LLM"""
+    global _llm_dispatcher
+    if _llm_dispatcher is None:
+        _llm_dispatcher = LLMDispatcher(
+            max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.environ.get("LLM_MAX_QUEUE", "200")),
+            deadline_seconds=float(os.environ.get("LLM_DEADLINE_SECONDS", "60")),
+            expected_latency=float(os.environ.get("LLM_EXPECTED_LATENCY_SECONDS", "20"))
+        )
+    return _llm_dispatcher
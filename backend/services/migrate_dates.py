@@ -0,0 +1,167 @@
+"""
+ISO String -> BSON Date Migration
+=================================
+
+Timestamps used to be written with ``.isoformat()``, so older documents hold
+strings where the API now writes native datetimes. String dates sort and
+compare lexically, miss the TTL index on ``user_sessions.expires_at`` and
+force every read to parse them again. This one-time migration rewrites them
+in place:
+
+    python -m services.migrate_dates --dry-run   # count string dates per field
+    python -m services.migrate_dates             # convert them
+
+Each field is converted server-side with ``$dateFromString`` in a pipeline
+update. Values the server cannot parse are left untouched by that pass and
+then converted client-side with ``datetime.fromisoformat``; anything still
+unparseable is reported and kept as-is. Re-running is a no-op once no string
+dates remain.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# (collection, field) pairs written as ISO strings before native dates
+DATE_FIELDS: List[Tuple[str, str]] = [
+    ("users", "created_at"),
+    ("user_sessions", "created_at"),
+    ("user_sessions", "expires_at"),
+    ("rwa_assets", "created_at"),
+    ("tokens", "created_at"),
+    ("transactions", "created_at"),
+    ("payment_transactions", "created_at"),
+    ("iso_reports", "generated_at"),
+    ("jurisdictional_reports", "generated_at"),
+    ("asset_revenues", "date"),
+    ("dividend_distributions", "distribution_date"),
+    ("portfolio_holdings", "acquisition_date"),
+    ("portfolio_holdings", "last_updated"),
+    ("asset_performance", "last_dividend_date"),
+    ("asset_performance", "metadata.last_updated"),
+    ("asset_performance", "metadata.last_rebuilt"),
+]
+
+
+def parse_iso(value: str) -> Optional[datetime]:
+    """ISO 8601 string -> UTC datetime, or None if it isn't one"""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+async def count_string_dates(db, fields: List[Tuple[str, str]] = None) -> Dict[str, int]:
+    """Documents still holding a string in each date field"""
+    fields = DATE_FIELDS if fields is None else fields
+    counts = {}
+    for collection, field in fields:
+        counts[f"{collection}.{field}"] = await db[collection].count_documents({field: {"$type": "string"}})
+    return counts
+
+
+async def _convert_server_side(coll, field: str) -> int:
+    result = await coll.update_many(
+        {field: {"$type": "string"}},
+        [{"$set": {field: {"$dateFromString": {"dateString": f"${field}", "onError": f"${field}"}}}}]
+    )
+    return result.modified_count
+
+
+async def _convert_client_side(coll, field: str) -> Tuple[int, int]:
+    converted = invalid = 0
+    ops = []
+    async for doc in coll.find({field: {"$type": "string"}}, {field: 1}):
+        value = parse_iso(_get_path(doc, field))
+        if value is None:
+            invalid += 1
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"], field: {"$type": "string"}}, {"$set": {field: value}}))
+        if len(ops) >= BATCH_SIZE:
+            converted += (await coll.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        converted += (await coll.bulk_write(ops, ordered=False)).modified_count
+    return converted, invalid
+
+
+async def migrate_dates(db, fields: List[Tuple[str, str]] = None) -> Dict[str, Dict[str, int]]:
+    """Convert string dates to BSON dates; returns per-field counts"""
+    fields = DATE_FIELDS if fields is None else fields
+    result = {}
+    for collection, field in fields:
+        label = f"{collection}.{field}"
+        coll = db[collection]
+
+        server = 0
+        try:
+            server = await _convert_server_side(coll, field)
+        except OperationFailure as e:
+            # Pipeline updates need MongoDB 4.2+; the client-side pass covers older servers
+            logger.warning(f"Server-side conversion unavailable for {label}: {e}")
+
+        client, invalid = await _convert_client_side(coll, field)
+        result[label] = {"server": server, "client": client, "invalid": invalid}
+        if server or client or invalid:
+            logger.info(f"{label}: {server + client} converted, {invalid} unparseable")
+    return result
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+async def _main(argv: List[str] = None) -> int:
+    import argparse
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Convert ISO string timestamps to BSON dates")
+    parser.add_argument("--dry-run", action="store_true", help="only count string dates per field")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+    db = client[os.environ["DB_NAME"]]
+    try:
+        if args.dry_run:
+            counts = await count_string_dates(db)
+            for label, count in counts.items():
+                print(f"{count:>8}  {label}")
+            return 0
+        result = await migrate_dates(db)
+    finally:
+        client.close()
+
+    invalid = 0
+    for label, counts in result.items():
+        converted = counts["server"] + counts["client"]
+        invalid += counts["invalid"]
+        print(f"{converted:>8}  {label}" + (f"  ({counts['invalid']} unparseable)" if counts["invalid"] else ""))
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    raise SystemExit(asyncio.run(_main()))
@@ -0,0 +1,103 @@
+"""
+Keyset Pagination
+=================
+
+Cursor-based paging for list endpoints. Pages are ordered by a sort field
+plus a unique tiebreak field, and each page resumes strictly after the last
+document of the previous one, so walking a large collection costs one
+indexed range scan per page instead of growing skip/limit offsets.
+
+Continuation tokens are opaque to clients: base64url-encoded JSON holding
+the last (sort value, tiebreak value) pair.
+"""
+
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_PAGE_SIZE = int(os.environ.get("PAGE_SIZE_MAX", "1000"))
+
+
+class InvalidCursor(ValueError):
+    """Raised when a continuation token cannot be decoded or doesn't match the listing"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _decode_value(value: Any) -> Any:
+    # Values are spliced into the query, so anything but a scalar or our own
+    # date wrapper (e.g. {"$ne": ...}) would smuggle in an operator
+    if isinstance(value, dict) and value.keys() == {"$date"} and isinstance(value["$date"], str):
+        return datetime.fromisoformat(value["$date"])
+    if not isinstance(value, _SCALAR_TYPES):
+        raise InvalidCursor("cursor values must be scalars or dates")
+    return value
+
+
+def encode_cursor(sort_field: str, sort_value: Any, tiebreak_value: Any) -> str:
+    payload = {"s": sort_field, "k": _encode_value(sort_value), "t": _encode_value(tiebreak_value)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> Tuple[Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort_field:
+            raise InvalidCursor("cursor belongs to a different listing")
+        return _decode_value(payload["k"]), _decode_value(payload["t"])
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"malformed cursor: {e}")
+
+
+def clamp_page_size(limit: Optional[int], default: int) -> int:
+    if limit is None:
+        limit = default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+async def fetch_page(collection,
+                     query: Dict[str, Any],
+                     sort_field: str,
+                     limit: int,
+                     cursor: Optional[str] = None,
+                     projection: Optional[Dict[str, Any]] = None,
+                     tiebreak: str = "id",
+                     direction: int = -1) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page ordered by (sort_field, tiebreak) in ``direction``.
+    Returns the documents and the continuation token for the next page,
+    or None when this is the last page.
+    """
+    if cursor:
+        last_value, last_tiebreak = decode_cursor(cursor, sort_field)
+        op = "$lt" if direction < 0 else "$gt"
+        after = {"$or": [
+            {sort_field: {op: last_value}},
+            {sort_field: last_value, tiebreak: {op: last_tiebreak}}
+        ]}
+        query = {"$and": [query, after]} if query else after
+
+    docs = await collection.find(query, projection) \
+        .sort([(sort_field, direction), (tiebreak, direction)]) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(sort_field, last.get(sort_field), last.get(tiebreak))
+    return docs, next_cursor
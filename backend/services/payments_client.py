@@ -0,0 +1,239 @@
+"""
+Payments Client
+===============
+
+Application-lifetime access to Stripe checkout. Routes used to build a new
+``StripeCheckout`` for every request; this module keeps one instance per
+webhook URL and installs a single pooled, keep-alive HTTP client in the
+Stripe SDK, so connections (and their TLS sessions) are reused across
+requests.
+
+Configuration (environment):
+
+- ``STRIPE_API_KEY``                  secret key
+- ``STRIPE_API_BASE``                 override the API host (e.g. a local fake Stripe)
+- ``STRIPE_CONNECT_TIMEOUT_SECONDS``  TCP/TLS connect timeout (default 5)
+- ``STRIPE_TIMEOUT_SECONDS``          read timeout (default 30)
+- ``STRIPE_MAX_RETRIES``              SDK network retries (default 2)
+- ``STRIPE_POOL_SIZE``                keep-alive connections per host (default 20)
+- ``PAYMENTS_STUB``                   ``1`` to use an in-memory checkout for local runs/tests;
+                                      refused with an ``sk_live_`` key or ``APP_ENV=production``
+- ``APP_ENV``                         deployment environment (``production`` disables the stub)
+
+Checkout sessions created through ``create_checkout_session`` expire
+``CHECKOUT_HOLD_GRACE_SECONDS`` before the supply reservation backing them,
+so a buyer can never pay for a hold that has already been released.
+``checkout_hold_seconds`` clamps the reservation TTL to what Stripe accepts
+for a session expiry (30 minutes to 24 hours).
+"""
+
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from emergentintegrations.payments.stripe.checkout import (
+    StripeCheckout, CheckoutSessionRequest, CheckoutSessionResponse, CheckoutStatusResponse
+)
+
+logger = logging.getLogger(__name__)
+
+# Stripe accepts session expiries between 30 minutes and 24 hours after creation
+STRIPE_SESSION_MIN_SECONDS = 30 * 60
+STRIPE_SESSION_MAX_SECONDS = 24 * 3600
+# The supply hold outlives the session by this much (late webhooks/polls)
+CHECKOUT_HOLD_GRACE_SECONDS = 300
+
+
+def checkout_hold_seconds(ttl_seconds: float) -> float:
+    """Reservation TTL clamped so that TTL minus the grace is a valid session expiry"""
+    # A minute of slack for the time between reserving and creating the session
+    low = STRIPE_SESSION_MIN_SECONDS + CHECKOUT_HOLD_GRACE_SECONDS + 60
+    high = STRIPE_SESSION_MAX_SECONDS + CHECKOUT_HOLD_GRACE_SECONDS
+    return min(max(ttl_seconds, low), high)
+
+
+@dataclass
+class StubWebhookEvent:
+    """Same attributes the routes read from a verified Stripe webhook"""
+    event_type: str
+    event_id: str
+    session_id: Optional[str]
+    payment_status: Optional[str]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class StubCheckout:
+    """In-memory stand-in for StripeCheckout; every session is paid immediately"""
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+
+    async def create_checkout_session(self, request: CheckoutSessionRequest) -> CheckoutSessionResponse:
+        session_id = f"cs_stub_{uuid.uuid4().hex}"
+        self.sessions[session_id] = {
+            "amount_total": int(round(request.amount * 100)),
+            "currency": request.currency,
+            "metadata": dict(request.metadata or {})
+        }
+        url = request.success_url.replace("{CHECKOUT_SESSION_ID}", session_id)
+        return CheckoutSessionResponse(url=url, session_id=session_id)
+
+    async def get_checkout_status(self, session_id: str) -> CheckoutStatusResponse:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ValueError(f"No such checkout session: {session_id}")
+        return CheckoutStatusResponse(status="complete", payment_status="paid", **session)
+
+    async def handle_webhook(self, body: bytes, signature: Optional[str]) -> StubWebhookEvent:
+        """Accepts unsigned Stripe-shaped events ({id, type, data.object})"""
+        event = json.loads(body)
+        obj = event.get("data", {}).get("object", {})
+        return StubWebhookEvent(
+            event_type=event["type"],
+            event_id=event["id"],
+            session_id=obj.get("id"),
+            payment_status=obj.get("payment_status"),
+            metadata=obj.get("metadata") or {}
+        )
+
+
+class PaymentsClient:
+    """Shared StripeCheckout instances over one pooled HTTP client"""
+
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 api_base: Optional[str] = None,
+                 connect_timeout: float = 5.0,
+                 timeout: float = 30.0,
+                 max_retries: int = 2,
+                 pool_size: int = 20,
+                 stub: bool = False,
+                 max_checkouts: int = 64):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.stub = stub
+        self.max_checkouts = max_checkouts
+        if stub:
+            if (api_key or "").startswith("sk_live_") or os.environ.get("APP_ENV", "").lower() == "production":
+                raise RuntimeError("PAYMENTS_STUB cannot be enabled with a live Stripe key or in production")
+            logger.warning("PAYMENTS_STUB is enabled: checkouts are simulated and every session is reported paid")
+        self._checkouts: "OrderedDict[str, Any]" = OrderedDict()
+        self._stub_checkout = StubCheckout() if stub else None
+        self._session = None
+        self._async_client = None
+        self._http_client = None
+
+    def _install_http_client(self) -> None:
+        """Point the Stripe SDK at a pooled keep-alive client (once per process)"""
+        if self._http_client is not None:
+            return
+
+        import requests
+        import stripe
+        from requests.adapters import HTTPAdapter
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        # Async SDK calls go through one shared httpx.AsyncClient pool
+        self._async_client = stripe.HTTPXClient(timeout=self.timeout)
+        self._http_client = stripe.RequestsClient(
+            timeout=(self.connect_timeout, self.timeout),
+            session=self._session,
+            async_fallback_client=self._async_client
+        )
+        stripe.default_http_client = self._http_client
+        stripe.max_network_retries = self.max_retries
+        if self.api_base:
+            stripe.api_base = self.api_base
+
+    def checkout(self, webhook_url: str = ""):
+        """StripeCheckout for ``webhook_url``, created once and reused"""
+        if self.stub:
+            return self._stub_checkout
+
+        checkout = self._checkouts.get(webhook_url)
+        if checkout is None:
+            if not self.api_key:
+                raise RuntimeError("STRIPE_API_KEY is not configured")
+            self._install_http_client()
+            checkout = StripeCheckout(api_key=self.api_key, webhook_url=webhook_url)
+            self._checkouts[webhook_url] = checkout
+            while len(self._checkouts) > self.max_checkouts:
+                self._checkouts.popitem(last=False)
+        else:
+            self._checkouts.move_to_end(webhook_url)
+        return checkout
+
+    async def create_checkout_session(self, webhook_url: str, request: CheckoutSessionRequest,
+                                      expires_at: Optional[datetime] = None) -> CheckoutSessionResponse:
+        """
+        Create a checkout session; with ``expires_at`` Stripe closes it at that
+        time. ``StripeCheckout`` has no expiry option, so that case calls the
+        SDK directly with the same one-off price line item.
+        """
+        checkout = self.checkout(webhook_url)
+        if self.stub or expires_at is None:
+            return await checkout.create_checkout_session(request)
+
+        import stripe
+
+        session = await stripe.checkout.Session.create_async(
+            api_key=self.api_key,
+            mode="payment",
+            line_items=[{
+                "price_data": {
+                    "currency": request.currency,
+                    "unit_amount": int(round(request.amount * 100)),
+                    "product_data": {"name": "Token purchase"}
+                },
+                "quantity": 1
+            }],
+            payment_method_types=getattr(request, "payment_methods", None) or ["card"],
+            success_url=request.success_url,
+            cancel_url=request.cancel_url,
+            metadata=dict(request.metadata or {}),
+            expires_at=int(expires_at.timestamp())
+        )
+        return CheckoutSessionResponse(url=session.url, session_id=session.id)
+
+    async def aclose(self) -> None:
+        """Release pooled connections (app shutdown)"""
+        if self._http_client is not None:
+            try:
+                await self._async_client.close_async()
+            except Exception as e:
+                logger.warning(f"Closing Stripe async HTTP client failed: {e}")
+            self._session.close()
+            self._http_client = self._async_client = self._session = None
+        self._checkouts.clear()
+
+
+# Singleton instance
+_payments_client = None
+
+def get_payments_client() -> PaymentsClient:
+    """Obtiene instancia singleton del cliente de pagos"""
+    global _payments_client
+    if _payments_client is None:
+        _payments_client = PaymentsClient(
+            api_key=os.environ.get("STRIPE_API_KEY"),
+            api_base=os.environ.get("STRIPE_API_BASE"),
+            connect_timeout=float(os.environ.get("STRIPE_CONNECT_TIMEOUT_SECONDS", "5")),
+            timeout=float(os.environ.get("STRIPE_TIMEOUT_SECONDS", "30")),
+            max_retries=int(os.environ.get("STRIPE_MAX_RETRIES", "2")),
+            pool_size=int(os.environ.get("STRIPE_POOL_SIZE", "20")),
+            stub=os.environ.get("PAYMENTS_STUB", "0").lower() in ("1", "true", "yes")
+        )
+    return _payments_client
@@ -0,0 +1,144 @@
+"""
+Background Report Jobs
+======================
+
+Job mode for the AI report endpoints. A submission (``POST .../jobs``) only
+validates the request and stores a job in ``report_jobs``, a ``WorkQueue``
+collection, then answers 202 with the job id; the report queue's workers
+run the LLM call off the request path.
+
+Clients either poll ``GET /api/jobs/{job_id}`` or pass a ``callback_url``,
+which receives a POST with the same JSON once the job is done or has failed
+for good. With ``REPORT_CALLBACK_SECRET`` set, callbacks are signed:
+
+    X-QPC-Signature: sha256=<hex HMAC-SHA256 of the raw body>
+
+Callback hosts must resolve only to public addresses; loopback, private,
+link-local, multicast and reserved ranges are refused. The check runs at
+submission and again before every delivery attempt, since DNS can change
+in between, and redirects are never followed. ``REPORT_CALLBACK_ALLOWED_HOSTS``
+(comma-separated; ``.example.com`` also matches subdomains) additionally
+restricts callbacks to the listed hosts.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import socket
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from services.work_queue import DONE
+
+logger = logging.getLogger(__name__)
+
+REPORT_CALLBACK_SECRET = os.environ.get("REPORT_CALLBACK_SECRET")
+CALLBACK_TIMEOUT_SECONDS = float(os.environ.get("REPORT_CALLBACK_TIMEOUT_SECONDS", "10"))
+CALLBACK_ATTEMPTS = 3
+CALLBACK_ALLOWED_HOSTS: List[str] = [
+    h.strip().lower() for h in os.environ.get("REPORT_CALLBACK_ALLOWED_HOSTS", "").split(",") if h.strip()
+]
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _host_allowed(host: str) -> bool:
+    if not CALLBACK_ALLOWED_HOSTS:
+        return True
+    return any(
+        host == entry or (entry.startswith(".") and host.endswith(entry))
+        for entry in CALLBACK_ALLOWED_HOSTS
+    )
+
+
+def _public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def validate_callback_url(url: Optional[str]) -> Optional[str]:
+    """Return the callback URL if usable; raises ValueError otherwise"""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http(s) URL")
+    host = parsed.hostname.lower()
+    if not _host_allowed(host):
+        raise ValueError("callback_url host is not allowed")
+    
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, ValueError):
+        raise ValueError("callback_url host does not resolve")
+    if not infos or not all(_public_address(info[4][0]) for info in infos):
+        raise ValueError("callback_url must resolve to a public address")
+    return url
+
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Client-facing representation of a report job document"""
+    payload = job.get("payload", {})
+    # The result is stored by the handler just before the queue marks the
+    # job done, so a stored result already means the report is available
+    status = DONE if job.get("result") is not None else job["status"]
+    view = {
+        "job_id": job["_id"],
+        "type": payload.get("type"),
+        "report_id": payload.get("report_id"),
+        "status": status,
+        "attempts": job.get("attempts", 0),
+        "created_at": job.get("created_at"),
+        "finished_at": job.get("finished_at"),
+        "result": job.get("result")
+    }
+    if job["status"] == "failed":
+        view["error"] = job.get("last_error")
+    if job.get("callback_status"):
+        view["callback_status"] = job["callback_status"]
+    return view
+
+
+async def deliver_callback(url: str, body: Dict[str, Any]) -> bool:
+    """POST ``body`` to ``url``, retrying transient failures; True if accepted"""
+    data = json.dumps(body, default=_default, ensure_ascii=False).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if REPORT_CALLBACK_SECRET:
+        digest = hmac.new(REPORT_CALLBACK_SECRET.encode(), data, hashlib.sha256).hexdigest()
+        headers["X-QPC-Signature"] = f"sha256={digest}"
+
+    async with httpx.AsyncClient(timeout=CALLBACK_TIMEOUT_SECONDS, follow_redirects=False) as client:
+        for attempt in range(1, CALLBACK_ATTEMPTS + 1):
+            try:
+                # Re-resolved per attempt: the host may point elsewhere by now
+                await validate_callback_url(url)
+            except ValueError as e:
+                logger.warning(f"Report callback to {url} refused: {e}")
+                return False
+            try:
+                response = await client.post(url, content=data, headers=headers)
+                if response.status_code < 500:
+                    if response.status_code >= 300:
+                        logger.warning(f"Report callback to {url} rejected: HTTP {response.status_code}")
+                    return response.status_code < 300
+                error = f"HTTP {response.status_code}"
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+            if attempt < CALLBACK_ATTEMPTS:
+                await asyncio.sleep(2 ** attempt)
+    logger.warning(f"Report callback to {url} failed after {CALLBACK_ATTEMPTS} attempts: {error}")
+    return False
@@ -0,0 +1,358 @@
+"""
+Template Jurisdictional Report Renderer
+=======================================
+
+Builds the nine-section jurisdictional analysis report straight from the
+structured ``JurisdictionalProfile`` fields and the asset inputs, without an
+LLM. Rendering takes well under a millisecond.
+
+Report modes (``JURISDICTIONAL_REPORT_MODE`` or the request's ``mode``):
+
+- ``template``  every section rendered locally (default)
+- ``hybrid``    template report; only the narrative sections (1-3) are
+                rewritten by the LLM, grounded on the rendered facts
+- ``llm``       the full report is written by the LLM
+
+If the LLM fails in ``hybrid`` or ``llm`` mode the template report is
+returned instead, so the endpoints degrade rather than fail.
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.jurisdictions import JurisdictionalProfile, RiskLevel
+
+MODE_TEMPLATE = "template"
+MODE_HYBRID = "hybrid"
+MODE_LLM = "llm"
+REPORT_MODES = (MODE_TEMPLATE, MODE_HYBRID, MODE_LLM)
+
+DEFAULT_REPORT_MODE = os.environ.get("JURISDICTIONAL_REPORT_MODE", MODE_TEMPLATE)
+
+# (key, heading) in report order
+SECTIONS: List[Tuple[str, str]] = [
+    ("executive_summary", "RESUMEN EJECUTIVO"),
+    ("regulatory_context", "CONTEXTO REGULATORIO JURISDICCIONAL"),
+    ("asset_classification", "CLASIFICACIÓN CONCEPTUAL DEL ACTIVO"),
+    ("compliance", "CONSIDERACIONES DE COMPLIANCE"),
+    ("structures", "OPCIONES DE ESTRUCTURA"),
+    ("roadmap", "ROADMAP DE SIGUIENTE PASOS"),
+    ("costs", "ESTIMACIÓN DE COSTOS (RANGO INDICATIVO)"),
+    ("risk_matrix", "MATRIZ DE RIESGOS Y CONSIDERACIONES"),
+    ("scope", "ALCANCE Y LIMITACIONES"),
+]
+NARRATIVE_SECTIONS = ("executive_summary", "regulatory_context", "asset_classification")
+
+_LEVEL_LABELS = {
+    RiskLevel.LOW.value: "Bajo",
+    RiskLevel.MEDIUM.value: "Medio",
+    RiskLevel.HIGH.value: "Alto",
+    RiskLevel.CRITICAL.value: "Crítico",
+}
+_FACTOR_LABELS = {
+    "regulatory_risk": "Riesgo regulatorio",
+    "legal_clarity": "Claridad del marco legal",
+    "enforcement_risk": "Riesgo de enforcement",
+    "political_stability": "Estabilidad política",
+    "currency_risk": "Riesgo cambiario",
+    "litigation_risk": "Riesgo de litigio",
+}
+_MITIGATIONS = {
+    "regulatory_risk": "Consulta previa con el regulador; uso del sandbox si está disponible",
+    "legal_clarity": "Opinión legal local sobre la clasificación del token",
+    "enforcement_risk": "Programa de compliance documentado y auditorías periódicas",
+    "political_stability": "Cláusulas de salida y jurisdicción de respaldo para el vehículo",
+    "currency_risk": "Denominación en USD o stablecoins y coberturas cambiarias",
+    "litigation_risk": "Documentación de oferta exhaustiva y seguros D&O",
+}
+_MATURITY_LABELS = {
+    "nascent": "incipiente (sin marco específico)",
+    "emerging": "emergente (marco en desarrollo)",
+    "partial": "parcial (regulación existente pero incompleta)",
+    "advanced": "avanzada (marco integral)",
+    "restrictive": "restrictiva (fuertemente regulado)",
+}
+_HEADING = re.compile(r"^#{2,4}\s*(\d+)\.", re.MULTILINE)
+
+SCOPE_TEXT = """**IMPORTANTE - LEER CUIDADOSAMENTE:**
+
+Este documento constituye un ANÁLISIS PRE-LEGAL de inteligencia regulatoria y riesgo.
+
+- NO constituye asesoría legal, fiscal, financiera o de inversión
+- NO reemplaza la consulta con abogados especializados en la jurisdicción
+- Las clasificaciones y recomendaciones son INDICATIVAS y basadas en información pública disponible
+- Se recomienda VALIDAR todas las conclusiones con asesoría legal especializada antes de tomar decisiones
+
+QuantPayChain opera como motor de inteligencia y decisión, NO como asesor legal."""
+
+
+def normalize_mode(mode: Optional[str]) -> str:
+    mode = str(mode or DEFAULT_REPORT_MODE).lower()
+    if mode not in REPORT_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(REPORT_MODES)}")
+    return mode
+
+
+def _number(value: Any) -> Optional[float]:
+    """Finite float from user/profile data, or None when missing or malformed"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _usd(value: Any) -> str:
+    number = _number(value)
+    return f"${number:,.0f}" if number is not None else "N/D"
+
+
+def _yes_no(value: Any) -> str:
+    if value is True:
+        return "Sí"
+    if value is False:
+        return "No"
+    return str(value).replace("_", " ") if value is not None else "No especificado"
+
+
+def _level(value: Optional[str]) -> str:
+    return _LEVEL_LABELS.get(value, value or "N/D")
+
+
+def viability(risk_score: int) -> str:
+    if risk_score < 40:
+        return "FAVORABLE"
+    if risk_score < 70:
+        return "VIABLE CON CONSIDERACIONES"
+    return "REQUIERE ANÁLISIS ADICIONAL"
+
+
+def _executive_summary(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    cost = j.estimated_legal_cost_usd
+    maturity = _MATURITY_LABELS.get(j.regulatory_profile.get("maturity"), j.regulatory_profile.get("maturity"))
+    return "\n".join([
+        f"- Clasificación de viabilidad: **{viability(risk_score)}**",
+        f"- Indicador de riesgo agregado: **{risk_score}/100**",
+        "",
+        f"La tokenización de un activo de tipo {asset.get('type') or 'no especificado'} "
+        f"valorado en {_usd(asset.get('value_usd'))} USD en {j.name} se enmarca en una madurez regulatoria "
+        f"{maturity}, bajo la supervisión de {j.regulatory_profile.get('regulator') or 'el regulador local'}. "
+        f"El proceso típico toma alrededor de {j.estimated_timeline_days} días con costos de compliance "
+        f"entre {_usd(cost.get('min'))} y {_usd(cost.get('max'))} USD.",
+    ])
+
+
+def _regulatory_context(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    rp = j.regulatory_profile
+    lines = [
+        f"- Región: {j.region}",
+        f"- Madurez regulatoria: {_MATURITY_LABELS.get(rp.get('maturity'), rp.get('maturity'))}",
+        f"- Marco de tokenización: {_yes_no(rp.get('tokenization_framework'))}",
+        f"- Regulador principal: {rp.get('regulator') or 'No especificado'}",
+    ]
+    if rp.get("key_legislation"):
+        lines.append(f"- Legislación de referencia: {rp['key_legislation']}")
+    if "digital_securities_recognized" in rp:
+        lines.append(f"- Valores digitales reconocidos: {_yes_no(rp['digital_securities_recognized'])}")
+    if rp.get("crypto_legal_status"):
+        lines.append(f"- Estatus legal cripto: {_yes_no(rp['crypto_legal_status'])}")
+
+    favorable = []
+    if rp.get("sandbox_available"):
+        favorable.append("Sandbox regulatorio disponible")
+    if rp.get("digital_securities_recognized"):
+        favorable.append("Reconocimiento legal de valores digitales")
+    if rp.get("maturity") == "advanced":
+        favorable.append("Marco regulatorio integral")
+    attention = [
+        f"{_FACTOR_LABELS.get(name, name)}: {_level(level)}"
+        for name, level in j.risk_factors.items()
+        if level in (RiskLevel.HIGH.value, RiskLevel.CRITICAL.value)
+    ]
+    lines += ["", "**Indicadores favorables:**"]
+    lines += [f"- {item}" for item in favorable] or ["- Ninguno destacado"]
+    lines += ["", "**Factores de atención:**"]
+    lines += [f"- {item}" for item in attention] or ["- Sin factores de riesgo alto identificados"]
+    if j.notes:
+        lines += ["", j.notes]
+    return "\n".join(lines)
+
+
+def _asset_classification(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    offering = str(intent.get("offering_type") or "privada").lower()
+    investors = str(intent.get("target_investors") or "acreditados").lower()
+    indicators = ["Derechos económicos sobre un activo real subyacente"]
+    if offering in ("public", "pública", "publica"):
+        indicators.append("Oferta pública")
+    if investors in ("retail", "minoristas"):
+        indicators.append("Inversores minoristas")
+    if j.regulatory_profile.get("digital_securities_recognized"):
+        indicators.append(f"{j.name} reconoce los valores digitales")
+    return "\n".join(
+        ["- Categorización preliminar: **security token** (valor digital respaldado por el activo)",
+         "- Indicadores relevantes:"]
+        + [f"  - {item}" for item in indicators]
+        + ["- NOTA: Esta categorización es orientativa y requiere validación legal"]
+    )
+
+
+def _compliance(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    req = j.requirements
+    lines = [
+        f"- KYC requerido: {_yes_no(req.get('kyc_required'))}",
+        f"- AML requerido: {_yes_no(req.get('aml_required'))}",
+        f"- Solo inversores acreditados: {_yes_no(req.get('accredited_investor_only'))}",
+        f"- Prospecto requerido: {_yes_no(req.get('prospectus_required'))}",
+    ]
+    threshold = _number(req.get("prospectus_threshold_usd"))
+    if threshold:
+        value = _number(asset.get("value_usd"))
+        if value is None:
+            position = "valor del activo no disponible"
+        elif value > threshold:
+            position = "el valor del activo lo supera"
+        else:
+            position = "el valor del activo está por debajo"
+        lines.append(f"- Umbral de prospecto: {_usd(threshold)} USD ({position})")
+    if req.get("max_retail_investment_usd"):
+        lines.append(f"- Inversión máxima por inversor minorista: {_usd(req['max_retail_investment_usd'])} USD")
+    if req.get("custody_requirements"):
+        lines.append(f"- Custodia: {_yes_no(req['custody_requirements'])}")
+    if req.get("tax_treatment"):
+        rate = f" ({req['capital_gains_rate']})" if req.get("capital_gains_rate") else ""
+        lines.append(f"- Tratamiento fiscal: {_yes_no(req['tax_treatment'])}{rate}")
+    reporting = req.get("reporting_requirements") or []
+    if reporting:
+        lines.append("- Documentación y reportes esperados:")
+        lines += [f"  - {item}" for item in reporting]
+    return "\n".join(lines)
+
+
+def _structures(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    lines = [f"Alternativas de estructura habituales en {j.name}:"]
+    lines += [f"{i}. {s}" + (" (referencia de mercado)" if i == 1 else "")
+              for i, s in enumerate(j.typical_structures, start=1)]
+    lines.append("- NOTA: Requiere validación con asesoría legal especializada")
+    return "\n".join(lines)
+
+
+def _roadmap(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    total = j.estimated_timeline_days
+    phases = [
+        ("Diagnóstico y selección de estructura", 0.15),
+        ("Estructuración legal y constitución del vehículo", 0.35),
+        ("Compliance, KYC/AML y documentación de oferta", 0.30),
+        ("Emisión técnica y lanzamiento", 0.20),
+    ]
+    lines, start = [], 0
+    for i, (name, share) in enumerate(phases, start=1):
+        end = total if i == len(phases) else start + round(total * share)
+        lines.append(f"{i}. {name}: días {start + 1}-{end}")
+        start = end
+    lines += [
+        "",
+        "Hitos de decisión clave:",
+        "- Validación legal de la clasificación del token",
+        "- Aprobación de la estructura y del presupuesto",
+        f"- Confirmación de requisitos con {j.regulatory_profile.get('regulator') or 'el regulador'}",
+    ]
+    if j.regulatory_profile.get("sandbox_available"):
+        lines.append("- Evaluar la postulación al sandbox regulatorio antes de la emisión")
+    return "\n".join(lines)
+
+
+def _costs(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    cost = j.estimated_legal_cost_usd
+    low, high = _number(cost.get("min")) or 0.0, _number(cost.get("max")) or 0.0
+    # Technical build-out as a share of the legal budget (market reference)
+    tech_low, tech_high = low * 0.15, high * 0.25
+    lines = [
+        "| Concepto | Rango estimado (USD) |",
+        "|----------|----------------------|",
+        f"| Compliance y asesoría legal | {_usd(low)} - {_usd(high)} (típico {_usd(cost.get('typical'))}) |",
+        f"| Implementación técnica (referencia) | {_usd(tech_low)} - {_usd(tech_high)} |",
+        f"| **Total indicativo** | **{_usd(low + tech_low)} - {_usd(high + tech_high)}** |",
+    ]
+    value, typical = _number(asset.get("value_usd")), _number(cost.get("typical"))
+    if value and value > 0 and typical is not None:
+        lines += ["", f"El costo típico equivale al {typical / value * 100:.1f}% del valor del activo."]
+    return "\n".join(lines)
+
+
+def _risk_matrix(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    lines = ["| Factor | Nivel | Consideración de mitigación |", "|--------|-------|-----------------------------|"]
+    for name, level in j.risk_factors.items():
+        lines.append(f"| {_FACTOR_LABELS.get(name, name)} | {_level(level)} | {_MITIGATIONS.get(name, 'Evaluar con asesoría local')} |")
+    lines += ["", f"Indicador agregado: {risk_score}/100 ({viability(risk_score)})"]
+    return "\n".join(lines)
+
+
+def _scope(j: JurisdictionalProfile, risk_score: int, asset: Dict, intent: Dict) -> str:
+    return SCOPE_TEXT
+
+
+_RENDERERS = {
+    "executive_summary": _executive_summary,
+    "regulatory_context": _regulatory_context,
+    "asset_classification": _asset_classification,
+    "compliance": _compliance,
+    "structures": _structures,
+    "roadmap": _roadmap,
+    "costs": _costs,
+    "risk_matrix": _risk_matrix,
+    "scope": _scope,
+}
+
+
+def render_sections(jurisdiction: JurisdictionalProfile, risk_score: int,
+                    asset: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, str]:
+    """Body of every report section, keyed as in ``SECTIONS``"""
+    return {key: _RENDERERS[key](jurisdiction, risk_score, asset or {}, intent or {}) for key, _ in SECTIONS}
+
+
+def render_report(sections: Dict[str, str]) -> str:
+    """Assemble section bodies into the markdown report"""
+    return "\n\n".join(
+        f"### {number}. {title}\n{sections[key]}"
+        for number, (key, title) in enumerate(SECTIONS, start=1)
+    ) + "\n"
+
+
+def narrative_prompt(jurisdiction: JurisdictionalProfile, sections: Dict[str, str]) -> str:
+    """Ask the LLM to rewrite only the narrative sections, grounded on the rendered report"""
+    targets = "\n".join(
+        f"### {number}. {title}"
+        for number, (key, title) in enumerate(SECTIONS, start=1) if key in NARRATIVE_SECTIONS
+    )
+    return f"""
+Este es un informe de inteligencia regulatoria para tokenizar un activo en {jurisdiction.name}, generado a partir de datos estructurados:
+
+{render_report(sections)}
+---
+
+Reescribe ÚNICAMENTE las siguientes secciones con redacción ejecutiva y analítica, usando solo los datos del informe (no inventes cifras ni normas):
+
+{targets}
+
+Responde solo con esas secciones, cada una con su encabezado exacto. No incluyas asesoría legal.
+"""
+
+
+def merge_narrative(sections: Dict[str, str], llm_text: str) -> Tuple[Dict[str, str], List[str]]:
+    """Replace narrative sections with the LLM's versions; returns (sections, keys replaced)"""
+    matches = list(_HEADING.finditer(llm_text or ""))
+    merged, replaced = dict(sections), []
+    for m, nxt in zip(matches, matches[1:] + [None]):
+        number = int(m.group(1))
+        if not 1 <= number <= len(SECTIONS):
+            continue
+        key = SECTIONS[number - 1][0]
+        body = llm_text[m.end():nxt.start() if nxt else len(llm_text)]
+        # Drop the rest of the heading line
+        body = body.split("\n", 1)[1].strip() if "\n" in body else ""
+        if key in NARRATIVE_SECTIONS and body:
+            merged[key] = body
+            replaced.append(key)
+    return merged, replaced
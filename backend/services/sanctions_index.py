@@ -0,0 +1,321 @@
+"""
+Sanctions Screening Index
+=========================
+
+In-memory fuzzy index over a sanctions list (OFAC SDN, EU, UN...), built once
+from ``SANCTIONS_LIST_PATH`` (default ``data/sanctions.json``).
+
+Building takes seconds for a full list, so ``load_sanctions_index`` runs it
+off the event loop at app startup; request paths only read the prebuilt
+index and get ``SanctionsIndexUnavailable`` if it could not be built.
+
+List file: a JSON array, or a CSV with a header row, of entries
+
+    {"name": "...", "aliases": ["...", ...], "list": "OFAC SDN", "country": "KP"}
+
+(CSV aliases are separated by ``|``). The name and every alias are indexed as
+separate variants.
+
+Screening a name:
+
+1. Normalization: lower case, Cyrillic transliterated to Latin, diacritics
+   and apostrophes stripped, any other punctuation turned into spaces
+   ("José al-Assad" -> "jose al assad").
+2. Candidates: the character trigrams of the name are looked up in an
+   inverted index (CSR arrays); ``np.bincount`` over the posting lists gives
+   the shared-trigram count of every variant at once, and every variant whose
+   Dice coefficient reaches ``CANDIDATE_MIN_DICE`` is kept. There is no cap:
+   a list can hold many entries with the same name and all must be reported.
+3. Rescoring: each candidate gets the better of a token score (average
+   Jaro-Winkler of each token to its best counterpart, so word order, typos
+   and missing middle names or patronymics are tolerated) and the Levenshtein
+   ratio of the token-sorted names. Entries scoring
+   ``SANCTIONS_MATCH_THRESHOLD`` (default 0.85) or more are returned, best
+   variant per entry.
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SANCTIONS_LIST_PATH = Path(os.environ.get(
+    "SANCTIONS_LIST_PATH", Path(__file__).parent / "data" / "sanctions.json"
+))
+MATCH_THRESHOLD = float(os.environ.get("SANCTIONS_MATCH_THRESHOLD", "0.85"))
+CANDIDATE_MIN_DICE = 0.5
+# Applied to the token score when one name has extra tokens (middle names)
+TOKEN_SUBSET_PENALTY = 0.95
+
+_CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya", "і": "i", "ї": "yi", "є": "ye", "ґ": "g", "ў": "u",
+}
+_TRANSLITERATION = str.maketrans({
+    **_CYRILLIC,
+    # Latin letters without a decomposition
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "đ": "d", "ł": "l", "ı": "i", "þ": "th",
+})
+_APOSTROPHES = re.compile(r"['’‘`´]")
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_name(name: str) -> str:
+    """Canonical form used on both sides of the comparison"""
+    text = (name or "").lower().translate(_TRANSLITERATION)
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _SEPARATORS.sub(" ", _APOSTROPHES.sub("", text)).strip()
+
+
+def _trigrams(normalized: str) -> set:
+    padded = f" {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def jaro_winkler(a: str, b: str, prefix_weight: float = 0.1) -> float:
+    if a == b:
+        return 1.0
+    la, lb = len(a), len(b)
+    if not la or not lb:
+        return 0.0
+    window = max(max(la, lb) // 2 - 1, 0)
+    b_used = [False] * lb
+    a_matched = []
+    for i, ch in enumerate(a):
+        lo, hi = max(0, i - window), min(i + window + 1, lb)
+        j = b.find(ch, lo, hi)
+        while j != -1 and b_used[j]:
+            j = b.find(ch, j + 1, hi)
+        if j != -1:
+            b_used[j] = True
+            a_matched.append(ch)
+    m = len(a_matched)
+    if not m:
+        return 0.0
+    b_matched = [b[j] for j in range(lb) if b_used[j]]
+    transpositions = sum(x != y for x, y in zip(a_matched, b_matched)) // 2
+    jaro = (m / la + m / lb + (m - transpositions) / m) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_weight * (1 - jaro)
+
+
+def levenshtein_ratio(a: str, b: str, min_ratio: float = 0.0) -> float:
+    """
+    1 - edit distance / length of the longer string. Gives up and returns 0.0
+    as soon as the ratio is known to be below ``min_ratio``.
+    """
+    if a == b:
+        return 1.0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return 0.0
+    la, lb = len(a), len(b)
+    max_distance = int((1.0 - min_ratio) * la)
+    if la - lb > max_distance:
+        return 0.0
+    # Only cells within max_distance of the diagonal can stay under the limit
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        current = [over] * (lb + 1)
+        current[0] = row_min = i if i <= max_distance else over
+        for j in range(max(1, i - max_distance), min(lb, i + max_distance) + 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != b[j - 1]))
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > max_distance:
+            return 0.0
+        previous = current
+    distance = previous[lb]
+    return 0.0 if distance > max_distance else 1.0 - distance / la
+
+
+def _token_score(query_tokens: List[str], variant_tokens: List[str], threshold: float = 0.0) -> float:
+    """
+    Average best Jaro-Winkler per token of the shorter name, each token used
+    once. A single token only scores against a single token: a lone first name
+    or surname is not a match. Returns 0.0 as soon as ``threshold`` is out of reach.
+    """
+    short, long_ = sorted((query_tokens, variant_tokens), key=len)
+    if len(short) <= 1:
+        return jaro_winkler(short[0], long_[0]) if len(short) == len(long_) == 1 else 0.0
+    penalty = 1.0 if len(short) == len(long_) else TOKEN_SUBSET_PENALTY
+
+    remaining = list(long_)
+    pending = []
+    for token in short:
+        if token in remaining:
+            remaining.remove(token)
+        else:
+            pending.append(token)
+    total = float(len(short) - len(pending))
+    for n, token in enumerate(pending, start=1):
+        scores = [jaro_winkler(token, other) for other in remaining]
+        best = max(range(len(scores)), key=scores.__getitem__)
+        total += scores[best]
+        remaining.pop(best)
+        # Even if every token left matched exactly
+        if (total + len(pending) - n) / len(short) * penalty < threshold:
+            return 0.0
+    return total / len(short) * penalty
+
+
+def similarity(query: str, variant: str, threshold: float = 0.0) -> float:
+    """
+    Similarity (0-1) of two normalized names: the token score or the edit
+    ratio of the token-sorted names, whichever is higher. Scores below
+    ``threshold`` are reported as 0.0.
+    """
+    query_tokens, variant_tokens = query.split(), variant.split()
+    score = _token_score(query_tokens, variant_tokens, threshold)
+    edit_score = levenshtein_ratio(
+        " ".join(sorted(query_tokens)), " ".join(sorted(variant_tokens)), min_ratio=max(score, threshold)
+    )
+    score = max(score, edit_score)
+    return score if score >= threshold else 0.0
+
+
+def load_sanctions_list(path: Path) -> List[Dict]:
+    """Entries from a JSON or CSV list file"""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            return [
+                {**row, "aliases": [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]}
+                for row in csv.DictReader(f)
+            ]
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SanctionsIndex:
+    """Trigram candidate retrieval + string-similarity rescoring over a sanctions list"""
+
+    def __init__(self, entries: Sequence[Dict]):
+        self.entries = [
+            {"name": e["name"], "list": e.get("list"), "country": e.get("country")}
+            for e in entries
+        ]
+        variants: List[str] = []
+        variant_entry: List[int] = []
+        variant_alias: List[Optional[str]] = []
+        for i, entry in enumerate(entries):
+            seen = set()
+            for raw in [entry["name"], *(entry.get("aliases") or [])]:
+                normalized = normalize_name(raw)
+                if normalized and normalized not in seen:
+                    seen.add(normalized)
+                    variants.append(normalized)
+                    variant_entry.append(i)
+                    variant_alias.append(None if raw == entry["name"] else raw)
+        self.variants = variants
+        self.variant_alias = variant_alias
+        self.variant_entry = np.asarray(variant_entry, dtype=np.int32)
+
+        # Inverted index trigram -> variant ids, as CSR arrays
+        self.gram_ids: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        gram_counts = np.zeros(len(variants), dtype=np.int32)
+        for v, normalized in enumerate(variants):
+            grams = _trigrams(normalized)
+            gram_counts[v] = len(grams)
+            for gram in grams:
+                cols.append(self.gram_ids.setdefault(gram, len(self.gram_ids)))
+                rows.append(v)
+        cols_arr = np.asarray(cols, dtype=np.int32)
+        order = np.argsort(cols_arr, kind="stable")
+        self.postings = np.asarray(rows, dtype=np.int32)[order]
+        self.offsets = np.zeros(len(self.gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols_arr, minlength=len(self.gram_ids)), out=self.offsets[1:])
+        self.gram_counts = gram_counts
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "SanctionsIndex":
+        index = cls(load_sanctions_list(path))
+        logger.info(f"Sanctions index built: {len(index)} entries, {len(index.variants)} names from {path}")
+        return index
+
+    def _candidates(self, query: str) -> np.ndarray:
+        grams = _trigrams(query)
+        ids = [self.gram_ids[g] for g in grams if g in self.gram_ids]
+        if not ids:
+            return np.empty(0, dtype=np.int64)
+        shared = np.bincount(
+            np.concatenate([self.postings[self.offsets[g]:self.offsets[g + 1]] for g in ids]),
+            minlength=len(self.variants)
+        )
+        # dice >= t needs at least t * len(query grams) / 2 shared trigrams
+        candidates = np.flatnonzero(shared >= max(1, int(CANDIDATE_MIN_DICE * len(grams) / 2)))
+        dice = 2.0 * shared[candidates] / (len(grams) + self.gram_counts[candidates])
+        return candidates[dice >= CANDIDATE_MIN_DICE]
+
+    def screen(self, name: str, threshold: float = None) -> List[Dict]:
+        """Entries matching ``name``, best first, in the KYC match format"""
+        query = normalize_name(name)
+        if not query:
+            return []
+        threshold = MATCH_THRESHOLD if threshold is None else threshold
+
+        best: Dict[int, tuple] = {}
+        for v in self._candidates(query):
+            score = similarity(query, self.variants[v], threshold)
+            entry = int(self.variant_entry[v])
+            if score >= threshold and score > best.get(entry, (0.0,))[0]:
+                best[entry] = (score, int(v))
+
+        matches = []
+        for entry, (score, v) in sorted(best.items(), key=lambda item: -item[1][0]):
+            match = {
+                "matched_name": self.entries[entry]["name"],
+                "source_list": self.entries[entry]["list"],
+                "country": self.entries[entry]["country"],
+                "match_score": round(score * 100, 1)
+            }
+            if self.variant_alias[v]:
+                match["matched_alias"] = self.variant_alias[v]
+            matches.append(match)
+        return matches
+
+
+class SanctionsIndexUnavailable(RuntimeError):
+    """Raised when screening is requested but the index was never built"""
+
+
+# Singleton instance
+_sanctions_index: Optional[SanctionsIndex] = None
+
+def load_sanctions_index(path: Optional[Path] = None) -> SanctionsIndex:
+    """Build the index from the list file and install it (blocking)"""
+    global _sanctions_index
+    _sanctions_index = SanctionsIndex.from_file(path or SANCTIONS_LIST_PATH)
+    return _sanctions_index
+
+
+def get_sanctions_index() -> SanctionsIndex:
+    """Obtiene instancia singleton del índice de sanciones"""
+    if _sanctions_index is None:
+        raise SanctionsIndexUnavailable("sanctions list is not loaded")
+    return _sanctions_index
@@ -0,0 +1,123 @@
+"""
+In-process Session Cache
+========================
+
+Bounded, TTL-based cache that maps a session token to the resolved ``User``
+model, so authenticated routes can skip the ``user_sessions`` and
+``users`` lookups on repeated requests.
+
+Entries expire at whichever comes first: the cache TTL or the session's own
+``expires_at``. Logout must call ``invalidate`` so a revoked token stops
+resolving immediately on this worker.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+
+class SessionCache:
+    """LRU cache of session_token -> user with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, session_token: str) -> Optional[Any]:
+        """Return the cached user, or None on miss/expiry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_token)
+            if entry is None:
+                self.misses += 1
+                return None
+            deadline, user = entry
+            if deadline <= now:
+                del self._entries[session_token]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_token)
+            self.hits += 1
+            return user
+
+    def put(self, session_token: str, user: Any,
+            session_expires_at: Optional[datetime] = None) -> None:
+        """Cache a user until the TTL or the session expiry, whichever is sooner"""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+
+        ttl = self.ttl_seconds
+        if session_expires_at is not None:
+            remaining = (session_expires_at - datetime.now(timezone.utc)).total_seconds()
+            ttl = min(ttl, remaining)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[session_token] = (time.monotonic() + ttl, user)
+            self._entries.move_to_end(session_token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, session_token: str) -> bool:
+        """Drop a session from the cache (logout, revocation)"""
+        with self._lock:
+            removed = self._entries.pop(session_token, None) is not None
+            if removed:
+                self.invalidations += 1
+            return removed
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every cached session belonging to a user"""
+        with self._lock:
+            tokens = [t for t, (_, user) in self._entries.items() if getattr(user, "id", None) == user_id]
+            for token in tokens:
+                del self._entries[token]
+            self.invalidations += len(tokens)
+            return len(tokens)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for tuning size and TTL"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+# Singleton instance
+_session_cache = None
+
+def get_session_cache() -> SessionCache:
+    """Obtiene instancia singleton del cache de sesiones"""
+    global _session_cache
+    if _session_cache is None:
+        _session_cache = SessionCache(
+            max_entries=int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.environ.get("SESSION_CACHE_TTL_SECONDS", "60"))
+        )
+    return _session_cache
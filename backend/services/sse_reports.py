@@ -0,0 +1,191 @@
+"""
+Streaming LLM Reports (SSE)
+===========================
+
+Server-sent event streams for the long AI report endpoints. The client gets
+a ``metadata`` event as soon as the request is validated, followed by the
+report body as it becomes available, and a final ``done`` event once the
+report has been persisted:
+
+    event: metadata   {"report_id": ..., "jurisdiction": ..., ...}
+    event: token      {"text": "..."}                 (token mode)
+    event: section    {"index": 0, "text": "..."}     (section mode)
+    event: done       {"report_id": ..., ...}
+    event: error      {"status": 503, "detail": "..."}
+
+Concatenating the ``text`` of all token/section events reproduces the full
+report exactly. While waiting on the model a ``: keepalive`` comment is sent
+every ``SSE_HEARTBEAT_SECONDS`` (default 10) so proxies keep the connection
+open.
+
+Two modes:
+
+- **Token mode** (``LLM_STREAM_API_KEY`` set): the prompt is sent straight to
+  the provider through litellm with ``stream=True`` and deltas are forwarded
+  as they arrive. ``LLM_STREAM_MODEL`` selects the model (default gpt-4o) and
+  ``LLM_STREAM_API_BASE`` optionally points litellm at a gateway. This is an
+  extra provider key: token-mode calls bypass ``LlmChat`` and
+  ``EMERGENT_LLM_KEY`` (and whatever usage accounting sits behind them).
+- **Section mode** (default): ``LlmChat`` only returns whole messages, so the
+  report is generated through the regular cached/coalesced path and pushed
+  one markdown section at a time. This does NOT shorten time to first
+  content: apart from ``metadata`` and keepalives nothing arrives until the
+  whole generation has finished. Only cache hits stream immediately. Set
+  ``LLM_STREAM_API_KEY`` when incremental output is required.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "10"))
+LLM_STREAM_API_KEY = os.environ.get("LLM_STREAM_API_KEY")
+LLM_STREAM_MODEL = os.environ.get("LLM_STREAM_MODEL", "gpt-4o")
+LLM_STREAM_API_BASE = os.environ.get("LLM_STREAM_API_BASE")
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # nginx buffers proxied responses by default, which would hold every event
+    "X-Accel-Buffering": "no"
+}
+
+_HEADING = re.compile(r"^#{1,6}\s", re.MULTILINE)
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one SSE event; ``data`` is sent as a single JSON line"""
+    payload = json.dumps(data, default=_default, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_comment(text: str = "keepalive") -> str:
+    return f": {text}\n\n"
+
+
+def split_sections(text: str) -> List[str]:
+    """
+    Split a markdown report before each heading (or, without headings, after
+    each paragraph). The pieces concatenate back to ``text``.
+    """
+    cuts = [m.start() for m in _HEADING.finditer(text) if m.start() > 0]
+    if not cuts:
+        cuts = [m.end() for m in _PARAGRAPH_BREAK.finditer(text) if m.end() < len(text)]
+    bounds = [0] + cuts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def token_streaming_enabled() -> bool:
+    return bool(LLM_STREAM_API_KEY)
+
+
+def log_streaming_mode() -> None:
+    """Say at startup which SSE mode the report streams will use"""
+    if token_streaming_enabled():
+        logger.info(f"SSE reports stream tokens via {LLM_STREAM_MODEL} (LLM_STREAM_API_KEY, bypasses LlmChat)")
+    else:
+        logger.warning("SSE reports run in section mode: no report text is sent until generation "
+                       "finishes; set LLM_STREAM_API_KEY to stream tokens")
+
+
+async def stream_completion(system_message: str, prompt: str,
+                            model: str = None) -> AsyncIterator[str]:
+    """Yield completion deltas from the provider as they are generated"""
+    import litellm
+
+    response = await litellm.acompletion(
+        model=model or LLM_STREAM_MODEL,
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        api_key=LLM_STREAM_API_KEY,
+        api_base=LLM_STREAM_API_BASE,
+        stream=True
+    )
+    async for chunk in response:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
+
+
+async def _forward_tokens(tokens: AsyncIterator[str], parts: List[str],
+                          heartbeat: float) -> AsyncIterator[str]:
+    iterator = tokens.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=heartbeat)
+            if not done:
+                yield sse_comment()
+                continue
+            step, pending = pending, None
+            try:
+                delta = step.result()
+            except StopAsyncIteration:
+                return
+            parts.append(delta)
+            yield sse_event("token", {"text": delta})
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def stream_report(metadata: Dict[str, Any],
+                        generate: Callable[[], Awaitable[str]],
+                        finalize: Callable[[str], Awaitable[Dict[str, Any]]],
+                        tokens: Optional[AsyncIterator[str]] = None,
+                        heartbeat_seconds: float = None) -> AsyncIterator[str]:
+    """
+    Event stream for one report. ``generate`` returns the whole text (section
+    mode); ``tokens`` yields it incrementally (token mode) and takes
+    precedence. ``finalize`` persists the finished text and returns the
+    payload of the ``done`` event.
+    """
+    heartbeat = heartbeat_seconds or SSE_HEARTBEAT_SECONDS
+    yield sse_event("metadata", metadata)
+
+    try:
+        if tokens is not None:
+            parts: List[str] = []
+            async for event in _forward_tokens(tokens, parts, heartbeat):
+                yield event
+            text = "".join(parts)
+        else:
+            # Not cancelled if the client disconnects: the generation still
+            # completes and lands in the LLM cache for the retry
+            task = asyncio.ensure_future(generate())
+            while not task.done():
+                done, _ = await asyncio.wait({task}, timeout=heartbeat)
+                if not done:
+                    yield sse_comment()
+            text = task.result()
+            for index, section in enumerate(split_sections(text)):
+                yield sse_event("section", {"index": index, "text": section})
+
+        yield sse_event("done", await finalize(text))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # HTTPException-style errors (e.g. 503 when the LLM is at capacity) keep their status
+        status = getattr(e, "status_code", 500)
+        if status >= 500:
+            logger.error(f"Report stream failed: {e}")
+        yield sse_event("error", {
+            "status": status,
+            "detail": getattr(e, "detail", None) or "Report generation failed"
+        })
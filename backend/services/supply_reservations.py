@@ -0,0 +1,266 @@
+"""
+Token Supply Reservations
+=========================
+
+Contention-safe allocation of ``tokens.available_supply``. Every decrement
+is a single conditional ``find_one_and_update`` guarded by
+``available_supply >= quantity``, so MongoDB's per-document atomicity
+serializes concurrent buyers and supply can never go negative. No locks are
+held in Python and there is no read-then-write window.
+
+Checkout flow:
+
+1. ``reserve`` takes the quantity off ``available_supply`` (moving it to
+   ``reserved_supply``) and records a pending ``token_reservations`` document
+   that expires after ``RESERVATION_TTL_SECONDS``.
+2. ``confirm`` settles the reservation once Stripe reports the session as
+   paid. It is idempotent: only the first caller gets ``True``.
+3. ``release`` (cancelled/expired checkout) or the background sweeper
+   (``release_expired``) returns unpaid quantities to ``available_supply``.
+
+A payment that arrives after its hold was released re-takes the supply
+(``reclaiming``). The take is marked on the token with the reservation id,
+so it happens at most once; if the process dies mid-reclaim the sweeper
+(``recover_reclaims``) finishes it after ``RECLAIM_STALE_SECONDS``.
+
+Pending reservations are never removed by MongoDB itself; the sweeper
+releases them first. Settled ones get a ``purge_at`` date and are purged by
+a TTL index after ``RESERVATION_RETENTION_DAYS``.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+CONFIRMED = "confirmed"
+RELEASED = "released"
+# Transient state while a late payment tries to re-take released supply
+RECLAIMING = "reclaiming"
+# Paid after the reservation lapsed and the supply had been sold meanwhile
+UNFULFILLED = "unfulfilled"
+
+RECLAIM_STALE_SECONDS = float(os.environ.get("RECLAIM_STALE_SECONDS", "300"))
+# Reclaim markers kept per token; one only has to outlive a stale reclaim
+RECLAIM_MARKERS = 100
+
+
+class SupplyReservationService:
+    """Atomic token supply reservations backed by MongoDB"""
+
+    def __init__(self, db, ttl_seconds: float = None, retention_days: float = None):
+        self.db = db
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else \
+            float(os.environ.get("RESERVATION_TTL_SECONDS", "1800"))
+        self.retention_days = retention_days if retention_days is not None else \
+            float(os.environ.get("RESERVATION_RETENTION_DAYS", "30"))
+
+    # ------------------------------------------------------------------
+    # Supply counters
+    # ------------------------------------------------------------------
+
+    async def take_supply(self, token_id: str, quantity: int,
+                          reserve: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Atomically remove ``quantity`` from a token's available supply.
+        Returns the updated token, or None if it doesn't exist or has too
+        little supply left. With ``reserve`` the quantity is moved to
+        ``reserved_supply`` instead of leaving the pool directly.
+        """
+        if quantity <= 0:
+            return None
+        inc = {"available_supply": -quantity}
+        if reserve:
+            inc["reserved_supply"] = quantity
+        return await self.db.tokens.find_one_and_update(
+            {"id": token_id, "available_supply": {"$gte": quantity}},
+            {"$inc": inc},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def restore_supply(self, token_id: str, quantity: int) -> None:
+        """Give back supply taken with ``take_supply`` for a purchase that failed"""
+        await self.db.tokens.update_one({"id": token_id}, {"$inc": {"available_supply": quantity}})
+
+    async def _settle_supply(self, token_id: str, quantity: int, restore: bool) -> None:
+        inc = {"reserved_supply": -quantity}
+        if restore:
+            inc["available_supply"] = quantity
+        await self.db.tokens.update_one({"id": token_id}, {"$inc": inc})
+
+    # ------------------------------------------------------------------
+    # Reservations
+    # ------------------------------------------------------------------
+
+    async def reserve(self, token_id: str, quantity: int, user_id: str,
+                      ttl_seconds: float = None):
+        """
+        Hold ``quantity`` tokens for a pending checkout.
+        Returns ``(reservation, token)``, or ``(None, None)`` when sold out.
+        """
+        token = await self.take_supply(token_id, quantity, reserve=True)
+        if token is None:
+            return None, None
+
+        now = datetime.now(timezone.utc)
+        reservation = {
+            "id": str(uuid.uuid4()),
+            "token_id": token_id,
+            "user_id": user_id,
+            "quantity": quantity,
+            "status": PENDING,
+            "session_id": None,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=ttl_seconds or self.ttl_seconds)
+        }
+        try:
+            await self.db.token_reservations.insert_one(reservation)
+        except Exception:
+            # Don't leak the held supply if the reservation can't be recorded
+            await self._settle_supply(token_id, quantity, restore=True)
+            raise
+        reservation.pop("_id", None)
+        return reservation, token
+
+    async def attach_session(self, reservation_id: str, session_id: str) -> None:
+        """Link a reservation to its Stripe checkout session"""
+        await self.db.token_reservations.update_one(
+            {"id": reservation_id},
+            {"$set": {"session_id": session_id}}
+        )
+
+    def _lookup(self, reservation_id: str = None, session_id: str = None) -> Dict[str, Any]:
+        if reservation_id:
+            return {"id": reservation_id}
+        if session_id:
+            return {"session_id": session_id}
+        raise ValueError("reservation_id or session_id required")
+
+    async def get(self, reservation_id: str = None, session_id: str = None) -> Optional[Dict[str, Any]]:
+        return await self.db.token_reservations.find_one(self._lookup(reservation_id, session_id), {"_id": 0})
+
+    def _settled(self, status: str, now: datetime) -> Dict[str, Any]:
+        return {
+            "status": status,
+            "settled_at": now,
+            "purge_at": now + timedelta(days=self.retention_days)
+        }
+
+    async def confirm(self, reservation_id: str = None, session_id: str = None) -> bool:
+        """
+        Settle a paid reservation. Returns True exactly once per reservation;
+        repeated calls (status polling, webhook retries) return False.
+        """
+        query = self._lookup(reservation_id, session_id)
+        now = datetime.now(timezone.utc)
+
+        reservation = await self.db.token_reservations.find_one_and_update(
+            {**query, "status": PENDING},
+            {"$set": self._settled(CONFIRMED, now)},
+            projection={"_id": 0}
+        )
+        if reservation:
+            await self._settle_supply(reservation["token_id"], reservation["quantity"], restore=False)
+            return True
+
+        # Paid after the hold lapsed: try to take the supply again
+        reservation = await self.db.token_reservations.find_one_and_update(
+            {**query, "status": RELEASED},
+            {"$set": {"status": RECLAIMING, "reclaim_started_at": now}},
+            projection={"_id": 0}
+        )
+        if not reservation:
+            return False
+        return await self._finish_reclaim(reservation)
+
+    async def _finish_reclaim(self, reservation: Dict[str, Any]) -> bool:
+        """Take the supply for a ``reclaiming`` reservation (at most once) and settle it"""
+        reservation_id, token_id = reservation["id"], reservation["token_id"]
+        token = await self.db.tokens.find_one_and_update(
+            {"id": token_id, "available_supply": {"$gte": reservation["quantity"]},
+             "reclaimed_reservations": {"$ne": reservation_id}},
+            {"$inc": {"available_supply": -reservation["quantity"]},
+             "$push": {"reclaimed_reservations": {"$each": [reservation_id], "$slice": -RECLAIM_MARKERS}}},
+            projection={"_id": 1}
+        )
+        if token is None:
+            # An interrupted earlier attempt may already have taken it
+            token = await self.db.tokens.find_one({"id": token_id, "reclaimed_reservations": reservation_id},
+                                                  {"_id": 1})
+        status = CONFIRMED if token else UNFULFILLED
+        result = await self.db.token_reservations.update_one(
+            {"id": reservation_id, "status": RECLAIMING},
+            {"$set": self._settled(status, datetime.now(timezone.utc)), "$unset": {"reclaim_started_at": ""}}
+        )
+        if not token and result.modified_count:
+            logger.error(
+                f"Reservation {reservation_id} paid after expiry but token "
+                f"{token_id} is sold out; needs a refund"
+            )
+        return token is not None and bool(result.modified_count)
+
+    async def recover_reclaims(self, limit: int = 100) -> int:
+        """Finish reclaims whose process died between claiming and settling"""
+        recovered = 0
+        while recovered < limit:
+            now = datetime.now(timezone.utc)
+            reservation = await self.db.token_reservations.find_one_and_update(
+                {"status": RECLAIMING, "reclaim_started_at": {"$lte": now - timedelta(seconds=RECLAIM_STALE_SECONDS)}},
+                {"$set": {"reclaim_started_at": now}},
+                projection={"_id": 0}
+            )
+            if not reservation:
+                break
+            await self._finish_reclaim(reservation)
+            recovered += 1
+        return recovered
+
+    async def release(self, reservation_id: str = None, session_id: str = None) -> bool:
+        """Return a pending reservation's quantity to the token's available supply"""
+        query = self._lookup(reservation_id, session_id)
+        return await self._release_one({**query, "status": PENDING})
+
+    async def _release_one(self, query: Dict[str, Any]) -> bool:
+        reservation = await self.db.token_reservations.find_one_and_update(
+            query,
+            {"$set": self._settled(RELEASED, datetime.now(timezone.utc))},
+            projection={"_id": 0}
+        )
+        if not reservation:
+            return False
+        await self._settle_supply(reservation["token_id"], reservation["quantity"], restore=True)
+        return True
+
+    async def release_expired(self, limit: int = 1000) -> int:
+        """Release up to ``limit`` pending reservations whose hold has lapsed"""
+        released = 0
+        query = {"status": PENDING, "expires_at": {"$lte": datetime.now(timezone.utc)}}
+        while released < limit and await self._release_one(query):
+            released += 1
+        return released
+
+    async def run_sweeper(self, interval_seconds: float = None) -> None:
+        """Background loop releasing expired reservations"""
+        interval = interval_seconds if interval_seconds is not None else \
+            float(os.environ.get("RESERVATION_SWEEP_SECONDS", "30"))
+        while True:
+            try:
+                released = await self.release_expired()
+                if released:
+                    logger.info(f"Released {released} expired token reservations")
+                recovered = await self.recover_reclaims()
+                if recovered:
+                    logger.warning(f"Recovered {recovered} interrupted reservation reclaims")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reservation sweep failed: {e}")
+            await asyncio.sleep(interval)
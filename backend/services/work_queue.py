@@ -0,0 +1,216 @@
+"""
+Persistent Work Queue
+=====================
+
+MongoDB-backed job queue with an in-process asyncio worker pool. Jobs
+survive restarts and are processed by whichever worker claims them first.
+
+- ``enqueue`` uses the caller's key as ``_id``, so re-delivering the same
+  job (e.g. a retried Stripe webhook) is a no-op.
+- Workers claim jobs with ``find_one_and_update`` and hold a lease that is
+  extended every third of ``lease_seconds`` while the handler runs; a job
+  whose worker died is picked up again once the lease runs out.
+- ``stop`` puts jobs interrupted by the shutdown back in the queue right
+  away, without counting the interrupted attempt.
+- Failed jobs are retried with exponential backoff up to ``max_attempts``,
+  then parked with status ``failed`` for inspection (``on_failure`` is
+  called with the parked job).
+- Finished jobs get a ``purge_at`` date for a TTL index.
+
+Handlers must be idempotent: a job can run more than once if a worker
+crashes after doing the work but before marking it done.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue:
+    """Persistent queue of jobs processed by a pool of asyncio workers"""
+
+    def __init__(self,
+                 collection,
+                 handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 workers: int = 4,
+                 max_attempts: int = 5,
+                 lease_seconds: float = 60.0,
+                 poll_seconds: float = 5.0,
+                 retention_days: float = 7.0,
+                 on_failure: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None):
+        self.collection = collection
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.retention_days = retention_days
+        self.on_failure = on_failure
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._interrupted: List[Dict[str, Any]] = []
+        self.processed = 0
+        self.failed = 0
+
+    @property
+    def name(self) -> str:
+        return self.collection.name
+
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> bool:
+        """Persist a job; returns False if a job with this id already exists"""
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.insert_one({
+                "_id": job_id,
+                "payload": payload,
+                "status": QUEUED,
+                "attempts": 0,
+                "available_at": now,
+                "created_at": now
+            })
+        except DuplicateKeyError:
+            return False
+        self._wakeup.set()
+        return True
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "available_at": {"$lte": now}},
+                # Lease expired: the worker holding it crashed or hung
+                {"status": RUNNING, "lease_until": {"$lte": now}}
+            ]},
+            {
+                "$set": {"status": RUNNING, "lease_until": now + timedelta(seconds=self.lease_seconds)},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _heartbeat(self, job: Dict[str, Any]) -> None:
+        """Keep extending the lease on ``job`` while its handler runs"""
+        interval = self.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                result = await self.collection.update_one(
+                    # attempts fences off a worker that reclaimed an expired lease
+                    {"_id": job["_id"], "status": RUNNING, "attempts": job["attempts"]},
+                    {"$set": {"lease_until": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                logger.warning(f"{self.name} lease extension for job {job['_id']} failed: {e}")
+                continue
+            if not result.matched_count:
+                logger.warning(f"{self.name} job {job['_id']} lost its lease")
+                return
+
+    async def _finish(self, job: Dict[str, Any], error: Optional[Exception]) -> None:
+        now = datetime.now(timezone.utc)
+        if error is None:
+            update = {"status": DONE, "finished_at": now,
+                      "purge_at": now + timedelta(days=self.retention_days)}
+            self.processed += 1
+        elif job["attempts"] >= self.max_attempts:
+            update = {"status": FAILED, "finished_at": now, "last_error": str(error)}
+            self.failed += 1
+            logger.error(f"{self.name} job {job['_id']} failed after {job['attempts']} attempts: {error}")
+        else:
+            backoff = min(2 ** job["attempts"], 300)
+            update = {"status": QUEUED, "available_at": now + timedelta(seconds=backoff),
+                      "last_error": str(error)}
+            logger.warning(f"{self.name} job {job['_id']} attempt {job['attempts']} failed, retrying in {backoff}s: {error}")
+        result = await self.collection.update_one(
+            {"_id": job["_id"], "status": RUNNING},
+            {"$set": update, "$unset": {"lease_until": ""}}
+        )
+        if update["status"] == FAILED and result.modified_count and self.on_failure:
+            try:
+                await self.on_failure({**job, **update})
+            except Exception as e:
+                logger.error(f"{self.name} on_failure hook for job {job['_id']} failed: {e}")
+
+    async def run_once(self) -> bool:
+        """Claim and process a single job; False when nothing is ready"""
+        job = await self._claim()
+        if job is None:
+            return False
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await self.handler(job["payload"])
+        except asyncio.CancelledError:
+            self._interrupted.append(job)
+            raise
+        except Exception as e:
+            error = e
+        else:
+            error = None
+        finally:
+            heartbeat.cancel()
+        await self._finish(job, error)
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            # Cleared before claiming so an enqueue racing with an empty
+            # claim still wakes this worker
+            self._wakeup.clear()
+            try:
+                if await self.run_once():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.name} worker error: {e}")
+            # Idle: sleep until a local enqueue or the next poll (jobs from
+            # other processes, retries whose backoff has elapsed)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        interrupted, self._interrupted = self._interrupted, []
+        for job in interrupted:
+            try:
+                await self.collection.update_one(
+                    {"_id": job["_id"], "status": RUNNING, "attempts": job["attempts"]},
+                    {"$set": {"status": QUEUED, "available_at": datetime.now(timezone.utc)},
+                     "$unset": {"lease_until": ""}, "$inc": {"attempts": -1}}
+                )
+            except Exception as e:
+                logger.warning(f"{self.name} could not requeue interrupted job {job['_id']}: {e}")
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = {s: 0 for s in (QUEUED, RUNNING, DONE, FAILED)}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "n": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["n"]
+        return {
+            "queue": self.name,
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+            **counts
+        }
@@ -1,9 +1,15 @@
 """Earnings and Dividends Service - Core Business Logic"""
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional
+import asyncio
 import logging
+import math
+import os
+import numpy as np
 from models_earnings import (
     DividendDistribution,
     AssetRevenue,
@@ -14,6 +20,51 @@ from models_earnings import (
 
 logger = logging.getLogger(__name__)
 
+MIN_DIVIDEND_USD = 0.01
+# Credited periods remembered per holding; replays only ever target the latest
+DIVIDEND_PERIOD_HISTORY = 24
+# Purchase ids remembered per holding; payment retries only replay recent ones
+PURCHASE_ID_HISTORY = 50
+
+
+def allocate_dividends(quantities: np.ndarray,
+                       dividend_per_token: float,
+                       reconcile: bool = False):
+    """Vectorized per-holder dividend amounts.
+    
+    Returns ``(eligible, amounts)``: a boolean mask of holders at or above the
+    $0.01 minimum and their amounts rounded to cents (0.0 where not eligible).
+    
+    With ``reconcile=False`` each amount equals ``round(dividend_per_token * qty, 2)``
+    exactly as the per-holder loop computed it. With ``reconcile=True`` amounts
+    are allocated by the largest-remainder method so they sum to the rounded
+    total; ties go to the earlier holder, so the result is deterministic.
+    """
+    raw = dividend_per_token * quantities.astype(np.float64)
+    eligible = raw >= MIN_DIVIDEND_USD
+    cents = raw * 100.0
+    
+    if reconcile:
+        floor_cents = np.floor(cents)
+        floor_cents[~eligible] = 0.0
+        target_cents = round(math.fsum(raw[eligible].tolist()) * 100)
+        residue = int(target_cents - floor_cents.sum())
+        if residue > 0:
+            remainder = np.where(eligible, cents - floor_cents, -1.0)
+            order = np.lexsort((np.arange(len(raw)), -remainder))
+            floor_cents[order[:residue]] += 1.0
+        return eligible, floor_cents / 100.0
+    
+    amounts = np.rint(cents) / 100.0
+    # rint on the scaled value can disagree with Python's correctly-rounded
+    # round() only when it lands within an ulp of a half cent; redo those
+    ambiguous = np.abs(cents - np.floor(cents) - 0.5) <= np.spacing(np.abs(cents))
+    for i in np.flatnonzero(ambiguous & eligible).tolist():
+        amounts[i] = round(float(raw[i]), 2)
+    amounts[~eligible] = 0.0
+    return eligible, amounts
+
+
 class EarningsService:
     """Service for managing dividends, ROI, and asset performance"""
     
@@ -21,6 +72,18 @@ class EarningsService:
         self.db = db
         self.platform_fee = 0.05  # 5% platform fee on transactions
         self.dividend_split = 0.80  # 80% to investors, 20% to platform
+        self.dividend_batch_size = int(os.environ.get("DIVIDEND_BATCH_SIZE", "500"))
+        # "auto" uses multi-document transactions when the deployment supports them
+        self.dividend_transactions = os.environ.get("DIVIDEND_TRANSACTIONS", "auto").lower()
+        self._transactions_supported: Optional[bool] = None
+        # "per_holder" rounds each payout independently (historic behaviour);
+        # "largest_remainder" makes payouts add up to the rounded total
+        self.reconcile_dividend_rounding = os.environ.get("DIVIDEND_ROUNDING", "per_holder") == "largest_remainder"
+    
+    async def _aggregate_one(self, collection, pipeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run a pipeline that reduces to a single document ({} if nothing matched)"""
+        docs = await collection.aggregate(pipeline).to_list(1)
+        return docs[0] if docs else {}
     
     # ========== REVENUE TRACKING ==========
     
@@ -37,24 +100,21 @@ class EarningsService:
             description=description
         )
         
-        revenue_dict = revenue.model_dump()
-        revenue_dict['date'] = revenue_dict['date'].isoformat()
-        await self.db.asset_revenues.insert_one(revenue_dict)
+        await self.db.asset_revenues.insert_one(revenue.model_dump())
         
         # Update asset performance
-        await self._update_asset_performance(asset_id)
+        await self._inc_asset_performance(asset_id, {"total_revenue": amount})
         
         logger.info(f"Revenue recorded: ${amount} for asset {asset_id}")
         return revenue
     
     async def get_asset_total_revenue(self, asset_id: str) -> float:
         """Get total revenue for an asset"""
-        revenues = await self.db.asset_revenues.find(
-            {"asset_id": asset_id},
-            {"_id": 0}
-        ).to_list(10000)
-        
-        return sum(r["amount"] for r in revenues)
+        result = await self._aggregate_one(self.db.asset_revenues, [
+            {"$match": {"asset_id": asset_id}},
+            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
+        ])
+        return result.get("total", 0.0)
     
     # ========== DIVIDEND DISTRIBUTION ==========
     
@@ -90,29 +150,37 @@ class EarningsService:
         # Get all holders
         holdings = await self.db.portfolio_holdings.find(
             {"asset_id": asset_id},
-            {"_id": 0}
-        ).to_list(10000)
+            {"_id": 0, "user_id": 1, "quantity": 1}
+        ).to_list(None)
         
-        dividends = []
-        for holding in holdings:
-            dividend_amount = dividend_per_token * holding["quantity"]
-            
-            if dividend_amount >= 0.01:  # Min $0.01
-                dividend = {
-                    "token_id": token["id"],
-                    "asset_id": asset_id,
-                    "user_id": holding["user_id"],
-                    "amount": round(dividend_amount, 2),
-                    "tokens_held": holding["quantity"],
-                    "period": period
-                }
-                dividends.append(dividend)
-        
-        logger.info(f"Calculated {len(dividends)} dividends totaling ${sum(d['amount'] for d in dividends):.2f}")
+        quantities = np.fromiter((h["quantity"] for h in holdings), dtype=np.int64, count=len(holdings))
+        eligible, amounts = allocate_dividends(
+            quantities, dividend_per_token, reconcile=self.reconcile_dividend_rounding
+        )
+        
+        dividends = [
+            {
+                "token_id": token["id"],
+                "asset_id": asset_id,
+                "user_id": holdings[i]["user_id"],
+                "amount": float(amounts[i]),
+                "tokens_held": holdings[i]["quantity"],
+                "period": period
+            }
+            for i in np.flatnonzero(eligible).tolist()
+        ]
+        
+        logger.info(f"Calculated {len(dividends)} dividends totaling ${float(amounts[eligible].sum()):.2f}")
         return dividends
     
     async def distribute_dividends(self, asset_id: str, period: str) -> Dict[str, Any]:
-        """Distribute dividends to all token holders"""
+        """Distribute dividends to all token holders
+        
+        Writes go out in chunks of ``dividend_batch_size`` holders, each chunk
+        inside a transaction when available. A run is idempotent per
+        (asset_id, period): re-running after a crash only pays the holders
+        that were not reached, and never credits a holding twice.
+        """
         
         # Calculate dividends
         dividends = await self.calculate_dividends(asset_id, period)
@@ -125,41 +193,105 @@ class EarningsService:
                 "total_amount": 0
             }
         
+        # Resume: skip holders already paid for this period
+        already_paid = set(await self.db.dividend_distributions.distinct(
+            "user_id", {"asset_id": asset_id, "period": period}
+        ))
+        pending = [d for d in dividends if d["user_id"] not in already_paid]
+        
+        use_transactions = await self._use_transactions()
+        
         # Create distribution records
         distributions_created = 0
         total_distributed = 0.0
         
-        for div_data in dividends:
-            distribution = DividendDistribution(**div_data)
-            distribution.status = "completed"  # Auto-complete for demo
-            distribution.transaction_hash = f"0x{distribution.id[:16]}"
+        for start in range(0, len(pending), self.dividend_batch_size):
+            batch = pending[start:start + self.dividend_batch_size]
+            if use_transactions:
+                async with await self.db.client.start_session() as session:
+                    async with session.start_transaction():
+                        await self._write_dividend_batch(batch, period, session)
+            else:
+                await self._write_dividend_batch(batch, period)
             
-            dist_dict = distribution.model_dump()
-            dist_dict['distribution_date'] = dist_dict['distribution_date'].isoformat()
-            await self.db.dividend_distributions.insert_one(dist_dict)
-            
-            # Update user's portfolio holding
-            await self.db.portfolio_holdings.update_one(
-                {"user_id": div_data["user_id"], "token_id": div_data["token_id"]},
-                {"$inc": {"total_dividends_received": div_data["amount"]}}
-            )
-            
-            distributions_created += 1
-            total_distributed += div_data["amount"]
-        
-        # Update asset performance
-        await self._update_asset_performance(asset_id)
+            distributions_created += len(batch)
+            total_distributed += sum(d["amount"] for d in batch)
         
-        logger.info(f"Distributed ${total_distributed:.2f} to {distributions_created} holders")
+        logger.info(f"Distributed ${total_distributed:.2f} to {distributions_created} holders "
+                    f"({len(already_paid)} already paid for {period})")
         
         return {
             "success": True,
             "distributions": distributions_created,
+            "already_distributed": len(already_paid),
             "total_amount": round(total_distributed, 2),
             "period": period,
             "asset_id": asset_id
         }
     
+    async def _write_dividend_batch(self, batch: List[Dict[str, Any]], period: str, session=None):
+        """Credit holdings, then record distributions, for one chunk of holders.
+        
+        Both steps are idempotent so a chunk interrupted without a transaction
+        can simply be replayed: holdings remember their last
+        ``DIVIDEND_PERIOD_HISTORY`` credited periods in ``dividend_periods``
+        and distributions are unique per (asset_id, period, user_id).
+        Holders with a recorded distribution are skipped before this runs,
+        so only a chunk interrupted between the two writes is replayed here.
+        """
+        # Update users' portfolio holdings
+        await self.db.portfolio_holdings.bulk_write([
+            UpdateOne(
+                {"user_id": d["user_id"], "token_id": d["token_id"], "dividend_periods": {"$ne": period}},
+                {"$inc": {"total_dividends_received": d["amount"]},
+                 "$push": {"dividend_periods": {"$each": [period], "$slice": -DIVIDEND_PERIOD_HISTORY}}}
+            )
+            for d in batch
+        ], ordered=False, session=session)
+        
+        records = []
+        for div_data in batch:
+            distribution = DividendDistribution(**div_data)
+            distribution.status = "completed"  # Auto-complete for demo
+            distribution.transaction_hash = f"0x{distribution.id[:16]}"
+            
+            records.append(distribution.model_dump())
+        
+        inserted = records
+        try:
+            await self.db.dividend_distributions.insert_many(records, ordered=False, session=session)
+        except BulkWriteError as e:
+            # Duplicates mean another run already recorded those holders. Inside
+            # a transaction the error has aborted the chunk, so let it surface.
+            errors = e.details.get("writeErrors", [])
+            if session is not None or any(err.get("code") != 11000 for err in errors):
+                raise
+            duplicates = {err["index"] for err in errors}
+            inserted = [r for i, r in enumerate(records) if i not in duplicates]
+        
+        # Update asset performance
+        if inserted:
+            await self._inc_asset_performance(
+                inserted[0]["asset_id"],
+                {"total_dividends_paid": sum(r["amount"] for r in inserted)},
+                {"$max": {"last_dividend_date": max(r["distribution_date"] for r in inserted)}},
+                session=session
+            )
+    
+    async def _use_transactions(self) -> bool:
+        """Whether dividend batches should run inside multi-document transactions"""
+        if self.dividend_transactions in ("0", "false", "off"):
+            return False
+        if self._transactions_supported is None:
+            try:
+                hello = await self.db.command("ismaster")
+                # Replica set members report setName, mongos reports isdbgrid
+                self._transactions_supported = bool(hello.get("setName") or hello.get("msg") == "isdbgrid")
+            except OperationFailure as e:
+                logger.warning(f"Could not detect transaction support: {e}")
+                self._transactions_supported = False
+        return self._transactions_supported
+    
     # ========== PORTFOLIO MANAGEMENT ==========
     
     async def create_or_update_holding(self,
@@ -167,44 +299,50 @@ class EarningsService:
                                       token_id: str,
                                       asset_id: str,
                                       quantity: int,
-                                      price_per_token: float) -> PortfolioHolding:
-        """Create or update user's token holding"""
+                                      price_per_token: float,
+                                      purchase_id: Optional[str] = None) -> Optional[PortfolioHolding]:
+        """Create or update user's token holding
+        
+        With ``purchase_id`` (e.g. the checkout session) a purchase is applied
+        at most once: the id is recorded in the holding's ``purchase_ids`` by
+        the same write that credits the tokens, so a replay (or a retry after
+        an interrupted attempt) either finds it there or applies it whole.
+        Returns None when a replay finds no holding to return.
+        """
+        key = {"user_id": user_id, "token_id": token_id}
         
         # Check if holding exists
-        existing = await self.db.portfolio_holdings.find_one(
-            {"user_id": user_id, "token_id": token_id},
-            {"_id": 0}
-        )
+        existing = await self.db.portfolio_holdings.find_one(key, {"_id": 1})
         
         if existing:
-            # Update existing holding
-            new_quantity = existing["quantity"] + quantity
-            new_total = existing["total_invested"] + (quantity * price_per_token)
-            new_avg_price = new_total / new_quantity
-            
-            await self.db.portfolio_holdings.update_one(
-                {"user_id": user_id, "token_id": token_id},
-                {
-                    "$set": {
-                        "quantity": new_quantity,
-                        "total_invested": new_total,
-                        "purchase_price_per_token": new_avg_price,
-                        "last_updated": datetime.now(timezone.utc).isoformat()
-                    }
-                }
-            )
-            
-            updated = await self.db.portfolio_holdings.find_one(
-                {"user_id": user_id, "token_id": token_id},
-                {"_id": 0}
+            # Update existing holding; the average price is derived from the
+            # incremented totals in the same write, so concurrent purchases
+            # can't leave a stale average behind
+            credit = {
+                "quantity": {"$add": ["$quantity", quantity]},
+                "total_invested": {"$add": ["$total_invested", quantity * price_per_token]},
+                "last_updated": datetime.now(timezone.utc)
+            }
+            holding_filter = dict(key)
+            if purchase_id:
+                holding_filter["purchase_ids"] = {"$ne": purchase_id}
+                credit["purchase_ids"] = {"$slice": [
+                    {"$concatArrays": [{"$ifNull": ["$purchase_ids", []]}, [purchase_id]]},
+                    -PURCHASE_ID_HISTORY
+                ]}
+            updated = await self.db.portfolio_holdings.find_one_and_update(
+                holding_filter,
+                [
+                    {"$set": credit},
+                    {"$set": {"purchase_price_per_token": {"$divide": ["$total_invested", "$quantity"]}}}
+                ],
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
             )
-            
-            if isinstance(updated.get('acquisition_date'), str):
-                updated['acquisition_date'] = datetime.fromisoformat(updated['acquisition_date'])
-            if isinstance(updated.get('last_updated'), str):
-                updated['last_updated'] = datetime.fromisoformat(updated['last_updated'])
-            
-            return PortfolioHolding(**updated)
+            if updated is None:
+                # Purchase already applied
+                updated = await self.db.portfolio_holdings.find_one(key, {"_id": 0})
+            return PortfolioHolding(**updated) if updated else None
         else:
             # Create new holding
             holding = PortfolioHolding(
@@ -217,26 +355,33 @@ class EarningsService:
                 current_value=quantity * price_per_token
             )
             
-            holding_dict = holding.model_dump()
-            holding_dict['acquisition_date'] = holding_dict['acquisition_date'].isoformat()
-            holding_dict['last_updated'] = holding_dict['last_updated'].isoformat()
-            await self.db.portfolio_holdings.insert_one(holding_dict)
+            # First holding in this asset makes the user a new investor
+            other_holding = await self.db.portfolio_holdings.find_one(
+                {"user_id": user_id, "asset_id": asset_id},
+                {"_id": 1}
+            )
+            
+            document = holding.model_dump()
+            if purchase_id:
+                document["purchase_ids"] = [purchase_id]
+            try:
+                await self.db.portfolio_holdings.insert_one(document)
+            except DuplicateKeyError:
+                # A concurrent purchase (or a replay of this one) created the holding first
+                return await self.create_or_update_holding(
+                    user_id, token_id, asset_id, quantity, price_per_token, purchase_id
+                )
+            
+            # Update asset performance
+            await self._inc_asset_performance(asset_id, {
+                "holdings_count": 1,
+                "total_investors": 0 if other_holding else 1
+            })
             
             return holding
     
-    async def calculate_roi(self, user_id: str, token_id: str) -> Dict[str, float]:
-        """Calculate ROI for a specific holding"""
-        
-        holding = await self.db.portfolio_holdings.find_one(
-            {"user_id": user_id, "token_id": token_id},
-            {"_id": 0}
-        )
-        
-        if not holding:
-            return {"roi_percentage": 0.0, "total_gain": 0.0}
-        
-        # Get current token price
-        token = await self.db.tokens.find_one({"id": token_id}, {"_id": 0})
+    def _compute_roi(self, holding: Dict[str, Any], token: Optional[Dict[str, Any]]) -> Dict[str, float]:
+        """ROI for a holding given its (possibly missing) token, computed in memory"""
         current_price = token["price_per_token"] if token else holding["purchase_price_per_token"]
         
         current_value = holding["quantity"] * current_price
@@ -247,18 +392,6 @@ class EarningsService:
         total_gain = total_value - total_invested
         roi_percentage = (total_gain / total_invested * 100) if total_invested > 0 else 0.0
         
-        # Update holding with new ROI
-        await self.db.portfolio_holdings.update_one(
-            {"user_id": user_id, "token_id": token_id},
-            {
-                "$set": {
-                    "current_value": current_value,
-                    "roi_percentage": round(roi_percentage, 2),
-                    "last_updated": datetime.now(timezone.utc).isoformat()
-                }
-            }
-        )
-        
         return {
             "roi_percentage": round(roi_percentage, 2),
             "total_gain": round(total_gain, 2),
@@ -267,32 +400,117 @@ class EarningsService:
             "total_dividends": round(dividends, 2)
         }
     
+    def _roi_filter(self, holding: Dict[str, Any]) -> Dict[str, Any]:
+        """Matches the holding only while it still has the ROI it was read with
+        
+        ROI deltas are added to the asset's roi_sum, so only the request whose
+        update actually replaced that ROI may apply its delta; a concurrent
+        refresh of the same holding then matches nothing.
+        """
+        return {
+            "user_id": holding["user_id"],
+            "token_id": holding["token_id"],
+            # None also matches holdings that never stored an ROI
+            "roi_percentage": holding.get("roi_percentage")
+        }
+    
+    def _roi_update(self, holding: Dict[str, Any], token: Optional[Dict[str, Any]],
+                    roi_data: Dict[str, float], now: datetime) -> Dict[str, Any]:
+        """Update document persisting a computed ROI on the holding"""
+        current_price = token["price_per_token"] if token else holding["purchase_price_per_token"]
+        return {
+            "$set": {
+                "current_value": holding["quantity"] * current_price,
+                "roi_percentage": roi_data["roi_percentage"],
+                "last_updated": now
+            }
+        }
+    
+    async def calculate_roi(self, user_id: str, token_id: str) -> Dict[str, float]:
+        """Calculate ROI for a specific holding"""
+        
+        holding = await self.db.portfolio_holdings.find_one(
+            {"user_id": user_id, "token_id": token_id},
+            {"_id": 0}
+        )
+        
+        if not holding:
+            return {"roi_percentage": 0.0, "total_gain": 0.0}
+        
+        # Get current token price
+        token = await self.db.tokens.find_one({"id": token_id}, {"_id": 0})
+        roi_data = self._compute_roi(holding, token)
+        
+        # Update holding with new ROI
+        result = await self.db.portfolio_holdings.update_one(
+            self._roi_filter(holding),
+            self._roi_update(holding, token, roi_data, datetime.now(timezone.utc))
+        )
+        
+        roi_delta = roi_data["roi_percentage"] - (holding.get("roi_percentage") or 0.0)
+        if roi_delta and result.matched_count:
+            await self._inc_asset_performance(holding["asset_id"], {"roi_sum": roi_delta})
+        
+        return roi_data
+    
     async def get_user_portfolio(self, user_id: str) -> Dict[str, Any]:
-        """Get complete portfolio for user"""
+        """Get complete portfolio for user
+        
+        Issues a constant number of queries regardless of holdings count:
+        holdings, tokens ($in), assets ($in), one bulk_write for ROI and one
+        for the per-asset ROI counters. Holdings whose ROI changed are updated
+        conditionally on the ROI read here; if any of those lost a race with a
+        concurrent refresh, the affected assets are recounted instead of
+        applying deltas that may not have landed.
+        """
         
         holdings = await self.db.portfolio_holdings.find(
             {"user_id": user_id},
             {"_id": 0}
         ).to_list(1000)
         
+        # Batch-load tokens and assets
+        token_ids = list({h["token_id"] for h in holdings})
+        asset_ids = list({h["asset_id"] for h in holdings})
+        tokens = {}
+        assets = {}
+        if holdings:
+            tokens = {
+                t["id"]: t for t in await self.db.tokens.find(
+                    {"id": {"$in": token_ids}}, {"_id": 0}
+                ).to_list(None)
+            }
+            assets = {
+                a["id"]: a for a in await self.db.rwa_assets.find(
+                    {"id": {"$in": asset_ids}}, {"_id": 0}
+                ).to_list(None)
+            }
+        
         total_invested = 0.0
         total_current_value = 0.0
         total_dividends = 0.0
         
         portfolio_items = []
+        roi_updates = []
+        roi_deltas: Dict[str, float] = {}
+        now = datetime.now(timezone.utc)
         
         for holding in holdings:
             # Calculate current ROI
-            roi_data = await self.calculate_roi(user_id, holding["token_id"])
-            
-            # Get token and asset info
-            token = await self.db.tokens.find_one({"id": holding["token_id"]}, {"_id": 0})
-            asset = await self.db.rwa_assets.find_one({"id": holding["asset_id"]}, {"_id": 0})
+            token = tokens.get(holding["token_id"])
+            roi_data = self._compute_roi(holding, token)
+            roi_updates.append(UpdateOne(
+                self._roi_filter(holding),
+                self._roi_update(holding, token, roi_data, now)
+            ))
+            roi_delta = roi_data["roi_percentage"] - (holding.get("roi_percentage") or 0.0)
+            if roi_delta:
+                roi_deltas[holding["asset_id"]] = roi_deltas.get(holding["asset_id"], 0.0) + roi_delta
             
             portfolio_items.append({
                 "holding": holding,
                 "token": token,
-                "asset": asset,
+                "asset": assets.get(holding["asset_id"]),
                 "performance": roi_data
             })
             
@@ -300,6 +518,23 @@ class EarningsService:
             total_current_value += roi_data["current_value"]
             total_dividends += roi_data["total_dividends"]
         
+        if roi_updates:
+            result = await self.db.portfolio_holdings.bulk_write(roi_updates, ordered=False)
+            if result.matched_count < len(roi_updates) and roi_deltas:
+                # Some holding changed since it was read; the bulk result
+                # doesn't say which, so recount rather than guess
+                await asyncio.gather(*(self.rebuild_asset_performance(a) for a in roi_deltas))
+                roi_deltas = {}
+        if roi_deltas:
+            await self.db.asset_performance.bulk_write([
+                UpdateOne(
+                    {"asset_id": asset_id},
+                    {"$inc": {"roi_sum": delta}, "$set": {"metadata.last_updated": now}},
+                    upsert=True
+                )
+                for asset_id, delta in roi_deltas.items()
+            ], ordered=False)
+        
         total_gain = total_current_value + total_dividends - total_invested
         overall_roi = (total_gain / total_invested * 100) if total_invested > 0 else 0.0
         
@@ -317,33 +552,34 @@ class EarningsService:
         }
     
     # ========== ASSET PERFORMANCE ==========
+    #
+    # asset_performance holds running counters maintained with $inc by the
+    # write paths (revenue, dividends, holdings, ROI refreshes), so reading
+    # performance is a single indexed lookup. rebuild_asset_performance
+    # recomputes the counters from source collections for reconciliation.
     
-    async def _update_asset_performance(self, asset_id: str):
-        """Update performance metrics for an asset"""
-        
-        # Get revenue
-        total_revenue = await self.get_asset_total_revenue(asset_id)
-        
-        # Get dividends paid
-        dividends = await self.db.dividend_distributions.find(
-            {"asset_id": asset_id, "status": "completed"},
-            {"_id": 0}
-        ).to_list(10000)
-        total_dividends = sum(d["amount"] for d in dividends)
-        
-        # Get investor count
-        holdings = await self.db.portfolio_holdings.find(
-            {"asset_id": asset_id},
-            {"_id": 0}
-        ).to_list(10000)
-        total_investors = len(set(h["user_id"] for h in holdings))
+    async def _inc_asset_performance(self, asset_id: str, inc: Dict[str, Any],
+                                     extra: Optional[Dict[str, Any]] = None, session=None):
+        """Apply counter deltas to an asset's performance record"""
+        update = {
+            "$inc": inc,
+            "$set": {"metadata.last_updated": datetime.now(timezone.utc)}
+        }
+        if extra:
+            update.update(extra)
+        await self.db.asset_performance.update_one(
+            {"asset_id": asset_id}, update, upsert=True, session=session
+        )
+    
+    def _performance_view(self, asset_id: str, counters: Dict[str, Any]) -> Dict[str, Any]:
+        """Derive the public performance metrics from stored counters"""
+        total_revenue = counters.get("total_revenue", 0.0)
+        total_dividends = counters.get("total_dividends_paid", 0.0)
+        total_investors = counters.get("total_investors", 0)
+        holdings_count = counters.get("holdings_count", 0)
         
         # Calculate average ROI
-        if holdings:
-            roi_sum = sum(h.get("roi_percentage", 0.0) for h in holdings)
-            average_roi = roi_sum / len(holdings)
-        else:
-            average_roi = 0.0
+        average_roi = counters.get("roi_sum", 0.0) / holdings_count if holdings_count > 0 else 0.0
         
         # Performance score (0-100)
         revenue_score = min(total_revenue / 10000 * 50, 50)  # Max 50 points
@@ -351,38 +587,91 @@ class EarningsService:
         investor_score = min(total_investors / 10 * 20, 20)  # Max 20 points
         performance_score = revenue_score + roi_score + investor_score
         
-        # Get last dividend date
-        last_div = None
-        if dividends:
-            last_div = max(d["distribution_date"] for d in dividends)
-            if isinstance(last_div, str):
-                last_div = datetime.fromisoformat(last_div)
+        last_div = counters.get("last_dividend_date")
+        if isinstance(last_div, datetime):
+            last_div = last_div.isoformat()
         
-        performance = {
+        return {
             "asset_id": asset_id,
             "total_revenue": round(total_revenue, 2),
             "total_dividends_paid": round(total_dividends, 2),
             "total_investors": total_investors,
             "average_roi": round(average_roi, 2),
-            "last_dividend_date": last_div.isoformat() if last_div else None,
+            "last_dividend_date": last_div,
             "performance_score": round(performance_score, 2),
+            "metadata": counters.get("metadata", {})
+        }
+    
+    async def rebuild_asset_performance(self, asset_id: str) -> Dict[str, Any]:
+        """Recompute an asset's performance counters from source collections"""
+        
+        # Get revenue
+        total_revenue = await self.get_asset_total_revenue(asset_id)
+        
+        # Get dividends paid
+        dividend_stats = await self._aggregate_one(self.db.dividend_distributions, [
+            {"$match": {"asset_id": asset_id, "status": "completed"}},
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": "$amount"},
+                "last_date": {"$max": "$distribution_date"}
+            }}
+        ])
+        
+        # Get investor count and ROI totals
+        holding_stats = await self._aggregate_one(self.db.portfolio_holdings, [
+            {"$match": {"asset_id": asset_id}},
+            {"$group": {
+                "_id": "$user_id",
+                "roi_sum": {"$sum": {"$ifNull": ["$roi_percentage", 0.0]}},
+                "holdings": {"$sum": 1}
+            }},
+            {"$group": {
+                "_id": None,
+                "investors": {"$sum": 1},
+                "roi_sum": {"$sum": "$roi_sum"},
+                "holdings": {"$sum": "$holdings"}
+            }}
+        ])
+        
+        counters = {
+            "asset_id": asset_id,
+            "total_revenue": total_revenue,
+            "total_dividends_paid": dividend_stats.get("total", 0.0),
+            "last_dividend_date": dividend_stats.get("last_date"),
+            "total_investors": holding_stats.get("investors", 0),
+            "roi_sum": holding_stats.get("roi_sum", 0.0),
+            "holdings_count": holding_stats.get("holdings", 0),
             "metadata": {
-                "last_updated": datetime.now(timezone.utc).isoformat()
+                "last_updated": datetime.now(timezone.utc),
+                "last_rebuilt": datetime.now(timezone.utc)
             }
         }
         
         # Upsert performance record
         await self.db.asset_performance.update_one(
             {"asset_id": asset_id},
-            {"$set": performance},
+            {"$set": counters},
             upsert=True
         )
+        return self._performance_view(asset_id, counters)
+    
+    async def rebuild_all_asset_performance(self) -> int:
+        """Reconcile counters for every asset that has holdings, revenue or a record"""
+        asset_ids = set(await self.db.rwa_assets.distinct("id"))
+        asset_ids.update(await self.db.portfolio_holdings.distinct("asset_id"))
+        asset_ids.update(await self.db.asset_revenues.distinct("asset_id"))
+        asset_ids.update(await self.db.asset_performance.distinct("asset_id"))
+        
+        for asset_id in asset_ids:
+            await self.rebuild_asset_performance(asset_id)
+        
+        logger.info(f"Rebuilt performance for {len(asset_ids)} assets")
+        return len(asset_ids)
     
     async def get_asset_performance(self, asset_id: str) -> Dict[str, Any]:
         """Get performance metrics for an asset"""
         
-        await self._update_asset_performance(asset_id)
-        
         performance = await self.db.asset_performance.find_one(
             {"asset_id": asset_id},
             {"_id": 0}
@@ -398,7 +687,29 @@ class EarningsService:
                 "performance_score": 0.0
             }
         
-        return performance
+        if "holdings_count" not in performance or "roi_sum" not in performance:
+            # Record written before the incremental counters existed
+            return await self.rebuild_asset_performance(asset_id)
+        
+        return self._performance_view(asset_id, performance)
+    
+    async def rebuild_legacy_asset_performance(self) -> int:
+        """Rebuild records that predate the holdings_count/roi_sum counters
+        
+        Incremental $inc updates assume both counters hold a full recount, so
+        this must run before serving traffic on a database that was never
+        rebuilt. Records that already have both counters are left untouched.
+        """
+        asset_ids = await self.db.asset_performance.distinct("asset_id", {"$or": [
+            {"holdings_count": {"$exists": False}},
+            {"roi_sum": {"$exists": False}}
+        ]})
+        for asset_id in asset_ids:
+            await self.rebuild_asset_performance(asset_id)
+        
+        if asset_ids:
+            logger.info(f"Rebuilt legacy performance records for {len(asset_ids)} assets")
+        return len(asset_ids)
     
     # ========== PLATFORM EARNINGS ==========
     
@@ -406,16 +717,17 @@ class EarningsService:
         """Get platform's total earnings from fees"""
         
         # Transaction fees (5%)
-        transactions = await self.db.transactions.find(
-            {"status": "completed"},
-            {"_id": 0}
-        ).to_list(10000)
-        
-        transaction_fees = sum(t["total_amount"] * self.platform_fee for t in transactions)
+        transaction_stats = await self._aggregate_one(self.db.transactions, [
+            {"$match": {"status": "completed"}},
+            {"$group": {"_id": None, "volume": {"$sum": "$total_amount"}, "count": {"$sum": 1}}}
+        ])
+        transaction_fees = transaction_stats.get("volume", 0.0) * self.platform_fee
         
         # Dividend retention (20%)
-        all_revenues = await self.db.asset_revenues.find({}, {"_id": 0}).to_list(10000)
-        total_revenue = sum(r["amount"] for r in all_revenues)
+        revenue_stats = await self._aggregate_one(self.db.asset_revenues, [
+            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
+        ])
+        total_revenue = revenue_stats.get("total", 0.0)
         dividend_retention = total_revenue * (1 - self.dividend_split)
         
         total_platform_earnings = transaction_fees + dividend_retention
@@ -424,6 +736,38 @@ class EarningsService:
             "transaction_fees": round(transaction_fees, 2),
             "dividend_retention": round(dividend_retention, 2),
             "total_earnings": round(total_platform_earnings, 2),
-            "transactions_count": len(transactions),
+            "transactions_count": transaction_stats.get("count", 0),
             "total_revenue_generated": round(total_revenue, 2)
         }
+
+
+# ========== CLI ==========
+
+async def _main(argv: List[str] = None) -> int:
+    import argparse
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+    
+    parser = argparse.ArgumentParser(description="Earnings maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild-performance", help="recompute asset_performance counters")
+    rebuild.add_argument("--asset-id", help="only rebuild this asset")
+    args = parser.parse_args(argv)
+    
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    try:
+        service = EarningsService(client[os.environ['DB_NAME']])
+        if args.asset_id:
+            print(await service.rebuild_asset_performance(args.asset_id))
+        else:
+            print(f"Rebuilt {await service.rebuild_all_asset_performance()} assets")
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    raise SystemExit(asyncio.run(_main()))
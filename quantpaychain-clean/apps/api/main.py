@@ -11,6 +11,7 @@ from services.ai_advisor_service import AIAdvisorService
 from services.pqc_service import PQCService
 from services.iso20022_service import ISO20022Service
 from services.kyc_aml_service import KYCAMLService
+from services.llm_dispatcher import get_llm_dispatcher
 
 # Import advanced QPC routes
 from routes.qpc_advanced import router as qpc_router
@@ -326,6 +327,7 @@ async def test_ai_status():
             }
         },
         "api_key_status": key_status,
+        "llm_dispatcher": get_llm_dispatcher().stats(),
         "test_timestamp": datetime.utcnow().isoformat(),
         "note": "This is a lightweight health check. For full AI testing, use specific endpoints."
     }
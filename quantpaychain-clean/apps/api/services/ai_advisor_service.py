@@ -1,7 +1,8 @@
 import os
 import json
 from typing import Dict, Optional
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from emergentintegrations.llm.chat import LlmChat
+from services.llm_calls import send_coalesced
 
 class AIAdvisorService:
     """
@@ -191,9 +192,8 @@ Responde en JSON con esta estructura exacta:
                 system_message=self.system_message
             ).with_model(self.provider, self.model)
             
-            # Enviar mensaje
-            user_message = UserMessage(text=user_prompt)
-            response = await chat.send_message(user_message)
+            # Enviar mensaje (prompts idénticos concurrentes comparten una sola llamada)
+            response = await send_coalesced(chat, user_prompt, self.model, self.system_message, use_case="analysis")
             
             print(f"📥 AI Legal Analysis received (length: {len(response) if response else 0})")
             
@@ -3,7 +3,8 @@ from typing import Dict, Optional
 import json
 import hashlib
 from datetime import datetime
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from emergentintegrations.llm.chat import LlmChat
+from services.llm_calls import send_coalesced
 
 class KYCAMLService:
     """
@@ -103,9 +104,8 @@ Responde con JSON exacto:
                 system_message=self.system_message
             ).with_model(self.provider, self.model)
             
-            # Enviar mensaje
-            user_message = UserMessage(text=user_prompt)
-            response = await chat.send_message(user_message)
+            # Enviar mensaje (prioridad máxima en el despachador LLM)
+            response = await send_coalesced(chat, user_prompt, self.model, self.system_message, use_case="kyc")
             
             print(f"📥 Raw KYC response type: {type(response)}")
             print(f"📥 Raw KYC response (first 200 chars): {str(response)[:200]}")
@@ -0,0 +1,28 @@
+"""Coalesced, dispatched LLM calls shared by the AI-backed services
+
+``send_coalesced`` puts ``chat.send_message`` behind the single-flight
+coalescer and the process-wide dispatcher, so identical prompts in flight
+cost one call and every call respects the concurrency cap and deadline.
+"""
+
+from typing import Any
+
+from emergentintegrations.llm.chat import UserMessage
+from services.llm_dispatcher import get_llm_dispatcher
+from services.singleflight import get_llm_singleflight, prompt_key
+
+
+async def send_coalesced(chat, prompt: str, *key_parts: Any, use_case: str = "analysis",
+                         deadline_seconds: float = None) -> str:
+    """chat.send_message(prompt), sharing the call with identical in-flight prompts.
+    
+    ``key_parts`` must identify everything else that shapes the answer
+    (model, system message). The call runs through the shared dispatcher
+    under ``use_case``'s priority and raises LLMOverloaded when shed.
+    """
+    return await get_llm_singleflight().do(
+        prompt_key(*key_parts, prompt),
+        lambda: get_llm_dispatcher().run(
+            lambda: chat.send_message(UserMessage(text=prompt)), use_case, deadline_seconds
+        )
+    )
@@ -15,7 +15,8 @@ import json
 import hashlib
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from emergentintegrations.llm.chat import LlmChat
+from services.llm_calls import send_coalesced
 
 class RiskAnalyticsService:
     """
@@ -177,13 +178,14 @@ Provide a JSON response with:
 }}
 """
 
+            system_message = "You are an expert asset validator specializing in RWA tokenization, regulatory compliance, and fraud detection."
             chat = LlmChat(
                 api_key=self.api_key,
                 session_id=f"asset-validation-{asset_data.get('id', 'unknown')}",
-                system_message="You are an expert asset validator specializing in RWA tokenization, regulatory compliance, and fraud detection."
+                system_message=system_message
             ).with_model(self.provider, self.model)
             
-            response = await chat.send_message(UserMessage(text=context))
+            response = await send_coalesced(chat, context, self.model, system_message, use_case="risk")
             
             # Parse AI response
             cleaned = response.strip()
@@ -337,13 +339,14 @@ Provide JSON:
 """
         
         try:
+            system_message = "You are a financial crime analyst specializing in AML/CFT."
             chat = LlmChat(
                 api_key=self.api_key,
                 session_id=f"risk-{transaction.get('transaction_id', 'unknown')}",
-                system_message="You are a financial crime analyst specializing in AML/CFT."
+                system_message=system_message
             ).with_model(self.provider, self.model)
             
-            response = await chat.send_message(UserMessage(text=prompt))
+            response = await send_coalesced(chat, prompt, self.model, system_message, use_case="risk")
             cleaned = response.strip().strip("```json").strip("```").strip()
             return json.loads(cleaned)
         except:
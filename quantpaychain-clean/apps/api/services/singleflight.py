@@ -0,0 +1,69 @@
+"""
+Single-flight Request Coalescing
+================================
+
+Collapses concurrent identical async calls into one. The first caller for a
+key starts the call; everyone arriving while it is in flight awaits the same
+result (or exception). Nothing is cached: once the call finishes the key is
+free again, so this only removes duplicate work that overlaps in time.
+
+Used in front of ``LlmChat.send_message`` so N users submitting the same
+asset at once cost one LLM call instead of N.
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+
+
+def prompt_key(*parts: Any) -> str:
+    """Hash of the prompt parts with whitespace normalized"""
+    normalized = "\x1f".join(" ".join(str(p).split()) for p in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Per-key deduplication of concurrent coroutine calls"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            # A task rather than a direct await: if the first caller is
+            # cancelled (client went away) the others still get the result
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter was cancelled
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced
+        }
+
+
+# Singleton instance
+_llm_singleflight = None
+
+def get_llm_singleflight() -> SingleFlight:
+    """Obtiene instancia singleton del coalescedor de llamadas LLM"""
+    global _llm_singleflight
+    if _llm_singleflight is None:
+        _llm_singleflight = SingleFlight()
+    return _llm_singleflight